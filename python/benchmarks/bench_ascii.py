@@ -0,0 +1,100 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  benchmarks/bench_ascii.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# micro-benchmark of the ascii <DataArray> encoding
+# compare the former per-value str.format loop with vtkxml.DataArrayEncoder.EncodeAscii
+# which formats whole chunks at once, with the shortest representation and with %.6g
+# usage: python bench_ascii.py --rows 1000000 --components 6
+
+import os
+import sys
+import argparse
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import vtkxml
+
+
+def PerValueAscii(array, buffer):
+    # the per-value formatting used before the bulk encoder
+    for start in range(0, len(array), vtkxml.ASCII_CHUNK_ROWS):
+        lines = []
+        for data in array[start : start + vtkxml.ASCII_CHUNK_ROWS]:
+            lines.append("".join(("{0} ".format(d) for d in data)))
+            lines.append("\n")
+        buffer.append("".join(lines))
+    return buffer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default=1000000, type=int, help="number of tuples")
+    parser.add_argument(
+        "--components", default=6, type=int, help="number of components"
+    )
+    parser.add_argument("--repeat", default=3, type=int, help="number of timed runs")
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    # Float32 values stored in float64 like the DataArrays read from the odb
+    array = rng.standard_normal((args.rows, args.components)).astype(np.float32)
+    array = array.astype(np.float64)
+    megabytes = array.size * 4 / 1024.0**2
+
+    def Time(function):
+        return min(timeit.repeat(function, number=1, repeat=args.repeat))
+
+    perValue = Time(lambda: PerValueAscii(array, []))
+    print(
+        "{0:<16} {1:.3f}s {2:.1f} MB/s of Float32".format(
+            "per value", perValue, megabytes / perValue
+        )
+    )
+
+    reference = "".join(PerValueAscii(array, []))
+    for name, precision in (("bulk shortest", None), ("bulk %.6g", 6)):
+        encoder = vtkxml.DataArrayEncoder("ascii", asciiPrecision=precision)
+        seconds = Time(lambda: encoder.EncodeAscii(array, []))
+        text = "".join(encoder.EncodeAscii(array, []))
+        if precision is None:
+            assert text == reference
+        else:
+            values = np.array(text.split(), dtype=np.float64).reshape(array.shape)
+            assert np.allclose(values, array, rtol=1e-5, atol=0)
+        print(
+            "{0:<16} {1:.3f}s {2:.1f} MB/s of Float32 speedup={3:.1f}x size={4:.2f}x".format(
+                name,
+                seconds,
+                megabytes / seconds,
+                perValue / seconds,
+                len(text) / float(len(reference)),
+            )
+        )
@@ -0,0 +1,94 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  benchmarks/bench_labelmap.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# micro-benchmark of the label -> index lookup used by WriteSortedPointData/WriteSortedCellData
+# compare the dictionary lookup with the vectorized LabelMap on a synthetic instance
+# usage: python bench_labelmap.py --size 5000000
+
+import os
+import sys
+import argparse
+import timeit
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from labelmap import LabelMap
+
+
+def DictLookup(labelsMap, labels):
+    return [labelsMap[label] for label in labels]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default=5000000, type=int, help="number of labels")
+    parser.add_argument("--repeat", default=3, type=int, help="number of timed lookups")
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    for name, labels in (
+        ("dense", np.arange(1, args.size + 1, dtype=np.int64)),
+        (
+            "sparse",
+            np.sort(rng.choice(args.size * 100, args.size, replace=False)) + 1,
+        ),
+    ):
+        # a bulkDataBlock usually lists the labels in a different order
+        query = rng.permutation(labels)
+
+        start = timeit.default_timer()
+        labelsMap = dict((int(label), i) for i, label in enumerate(labels))
+        dictBuild = timeit.default_timer() - start
+        queryList = query.tolist()
+        dictTime = (
+            timeit.timeit(lambda: DictLookup(labelsMap, queryList), number=args.repeat)
+            / args.repeat
+        )
+
+        start = timeit.default_timer()
+        labelMap = LabelMap(labels)
+        mapBuild = timeit.default_timer() - start
+        mapTime = (
+            timeit.timeit(lambda: labelMap.Lookup(query), number=args.repeat)
+            / args.repeat
+        )
+
+        assert np.array_equal(DictLookup(labelsMap, queryList), labelMap.Lookup(query))
+        print(
+            "{0:>6} labels={1} build dict={2:.3f}s LabelMap={3:.3f}s | lookup dict={4:.3f}s LabelMap={5:.3f}s speedup={6:.1f}x".format(
+                name,
+                args.size,
+                dictBuild,
+                mapBuild,
+                dictTime,
+                mapTime,
+                dictTime / mapTime,
+            )
+        )
@@ -0,0 +1,206 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  benchmarks/bench_odb2vtk.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# benchmark of the odb2vtk.py conversion on synthetic models of increasing size
+# the odb is provided by the synthetic backend in fakeodb/, no Abaqus licence is needed.
+# every model has a C3D8 solid instance and an S4R shell instance with 2 section points
+# with about the same number of elements each.
+# the results are written as JSON to compare the timings between versions
+# usage: python bench_odb2vtk.py --cells 10000 100000 1000000 --output results.json
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+import timeit
+import numpy as np
+
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(benchmarks_dir, "fakeodb"))
+sys.path.insert(0, os.path.join(benchmarks_dir, ".."))
+from odb2vtk import ODB2VTK
+
+STEP_NAME = "Step-1"
+
+
+def ModelSpec(cells, frames):
+    # half of the cells in a solid cube, half in a square shell
+    solid = max(1, int(round((cells / 2.0) ** (1.0 / 3.0))))
+    shell = max(1, int(round((cells / 2.0) ** 0.5)))
+    return {
+        "instances": {
+            "SOLID-1": {"type": "C3D8", "shape": [solid, solid, solid]},
+            "SHELL-1": {"type": "S4R", "shape": [shell, shell], "sectionPoints": 2},
+        },
+        "steps": {
+            STEP_NAME: {
+                "frames": frames,
+                "historyRegions": 20,
+                "historyOutputs": 10,
+                "historyPoints": 10 * frames,
+            }
+        },
+    }
+
+
+def Time(function, repeat):
+    # seconds of every run, the first run isn't discarded since ConstructMap
+    # and the first frame matter in a conversion
+    seconds = []
+    for i in range(repeat):
+        start = timeit.default_timer()
+        function()
+        seconds.append(timeit.default_timer() - start)
+    return seconds
+
+
+def GitVersion():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "describe", "--always", "--dirty"],
+                cwd=benchmarks_dir,
+                stderr=subprocess.STDOUT,
+            )
+            .decode("ascii")
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def BenchmarkModel(workDir, cells, frames, formats, repeat):
+    # --workDir may name a directory which doesn't exist yet
+    if not os.path.exists(workDir):
+        os.makedirs(workDir)
+    odbFile = os.path.join(workDir, "bench_{0}.odb".format(cells))
+    with open(odbFile, "w") as f:
+        json.dump(ModelSpec(cells, frames), f)
+
+    converter = ODB2VTK(odbFile, "")
+    instanceNames = sorted(converter.odb.getInstancesKeys)
+    converter.ReadArgs(instanceNames, {STEP_NAME: list(range(frames))})
+    converter.ConstructMap()
+    model = {"cells": converter._cellsNum, "points": converter._nodesNum}
+
+    results = []
+
+    def Record(name, seconds, **extra):
+        result = dict(model)
+        result.update(extra)
+        result.update(
+            {
+                "benchmark": name,
+                "seconds": seconds,
+                "best": min(seconds),
+                "mean": sum(seconds) / len(seconds),
+            }
+        )
+        results.append(result)
+        print(
+            "{0:>8} cells {1:<24} best={2:.4f}s mean={3:.4f}s".format(
+                model["cells"],
+                name + " " + extra.get("format", ""),
+                result["best"],
+                result["mean"],
+            )
+        )
+
+    Record("ConstructMap", Time(converter.ConstructMap, repeat))
+    for dataFormat in formats:
+        converter.SetDataFormat(dataFormat)
+        frameIdx = frames - 1
+        vtuFileName = converter.GetVTUFileName(STEP_NAME, frameIdx)
+        Record(
+            "WriteVTUFile",
+            Time(lambda: converter.WriteVTUFile((STEP_NAME, frameIdx)), repeat),
+            format=dataFormat,
+            bytes=os.path.getsize(vtuFileName),
+        )
+    Record(
+        "ReadLocalCS",
+        Time(lambda: converter.ReadLocalCS(STEP_NAME, frames - 1), repeat),
+    )
+    Record("WriteCSVFILE", Time(converter.WriteCSVFILE, repeat))
+    Record("WritePVDFile", Time(converter.WritePVDFile, repeat))
+    converter.odb.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--cells",
+        default=[10000, 100000],
+        type=int,
+        nargs="*",
+        help="approximate number of cells of every model",
+    )
+    parser.add_argument("--frames", default=3, type=int, help="frames per model")
+    parser.add_argument(
+        "--formats",
+        default=["ascii", "binary", "appended"],
+        nargs="*",
+        help="formats of the .vtu files",
+    )
+    parser.add_argument("--repeat", default=3, type=int, help="number of timed runs")
+    parser.add_argument("--output", help="JSON file of the results")
+    parser.add_argument(
+        "--workDir", help="directory of the synthetic odb and the output files"
+    )
+    args = parser.parse_args()
+
+    workDir = args.workDir or tempfile.mkdtemp(prefix="odb2vtk_bench_")
+    results = []
+    try:
+        for cells in args.cells:
+            results += BenchmarkModel(
+                workDir, cells, args.frames, args.formats, args.repeat
+            )
+    finally:
+        if args.workDir is None:
+            shutil.rmtree(workDir, ignore_errors=True)
+
+    report = {
+        "version": GitVersion(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print("results written to {0}".format(args.output))
@@ -0,0 +1,51 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  benchmarks/fakeodb/abaqusConstants.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# abaqusConstants.py of the synthetic backend, see odbAccess.py
+# the symbolic constants are strings which print as their name like in Abaqus
+
+
+class SymbolicConstant(str):
+    def __repr__(self):
+        return str(self)
+
+
+NODAL = SymbolicConstant("NODAL")
+INTEGRATION_POINT = SymbolicConstant("INTEGRATION_POINT")
+ELEMENT_NODAL = SymbolicConstant("ELEMENT_NODAL")
+CENTROID = SymbolicConstant("CENTROID")
+WHOLE_ELEMENT = SymbolicConstant("WHOLE_ELEMENT")
+SCALAR = SymbolicConstant("SCALAR")
+VECTOR = SymbolicConstant("VECTOR")
+TENSOR_3D_FULL = SymbolicConstant("TENSOR_3D_FULL")
+TENSOR_3D_SURFACE = SymbolicConstant("TENSOR_3D_SURFACE")
+TENSOR_3D_PLANAR = SymbolicConstant("TENSOR_3D_PLANAR")
+TENSOR_2D_SURFACE = SymbolicConstant("TENSOR_2D_SURFACE")
+TENSOR_2D_PLANAR = SymbolicConstant("TENSOR_2D_PLANAR")
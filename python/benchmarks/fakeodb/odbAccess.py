@@ -0,0 +1,488 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  benchmarks/fakeodb/odbAccess.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# odbAccess.py is a synthetic stand-in of the Abaqus odbAccess module, so that
+# odb2vtk.py can be run and timed without an Abaqus licence.
+# it implements the part of the odb API used by utilities.ReadableOdb:
+# instances with nodes, elements, element/node sets, steps with frames,
+# fieldOutputs with getSubset and bulkDataBlocks, and historyRegions.
+#
+# the "odb" file is a JSON description of the model, e.g.
+# {"instances": {"PART-1-1": {"type": "C3D8", "shape": [10, 10, 10]},
+#                "SHELL-1": {"type": "S4R", "shape": [20, 20], "sectionPoints": 2}},
+#  "steps": {"Step-1": {"frames": 3, "timePeriod": 1.0}},
+#  "fields": ["U", "RF", "S", "E", "PEEQ"]}
+# usage: PYTHONPATH=benchmarks/fakeodb python odb2vtk.py --odbFile model.odb ...
+
+import json
+
+import numpy as np
+
+from abaqusConstants import (
+    NODAL,
+    INTEGRATION_POINT,
+    ELEMENT_NODAL,
+    CENTROID,
+    SCALAR,
+    VECTOR,
+    TENSOR_3D_FULL,
+)
+
+# element type: (number of integration points, number of nodes, dimension)
+# the instance is a structured grid of these elements
+ELEMENT_TYPES = {
+    "C3D8": (8, 8, 3),
+    "C3D8R": (1, 8, 3),
+    "S4R": (1, 4, 2),
+    "S4": (4, 4, 2),
+}
+
+# fieldOutput name: (type, position, componentLabels)
+FIELDS = {
+    "U": (VECTOR, NODAL, ("U1", "U2", "U3")),
+    "RF": (VECTOR, NODAL, ("RF1", "RF2", "RF3")),
+    "S": (
+        TENSOR_3D_FULL,
+        INTEGRATION_POINT,
+        ("S11", "S22", "S33", "S12", "S13", "S23"),
+    ),
+    "E": (
+        TENSOR_3D_FULL,
+        INTEGRATION_POINT,
+        ("E11", "E22", "E33", "E12", "E13", "E23"),
+    ),
+    "PEEQ": (SCALAR, INTEGRATION_POINT, ()),
+}
+
+
+class OdbError(Exception):
+    pass
+
+
+class Repository(object):
+    # attribute access to a dictionary, e.g. rootAssembly.instances
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class SectionPoint(object):
+    def __init__(self, number, description):
+        self.number = number
+        self.description = description
+
+
+class OdbMeshNode(object):
+    __slots__ = ("label", "coordinates", "instanceName")
+
+    def __init__(self, label, coordinates, instanceName):
+        self.label = label
+        self.coordinates = coordinates
+        self.instanceName = instanceName
+
+
+class OdbMeshElement(object):
+    __slots__ = ("label", "type", "connectivity", "instanceName")
+
+    def __init__(self, label, type, connectivity, instanceName):
+        self.label = label
+        self.type = type
+        self.connectivity = connectivity
+        self.instanceName = instanceName
+
+
+class LazySequence(object):
+    # nodes and elements are created when they are accessed, like the odb does
+    def __init__(self, size, factory):
+        self._size = size
+        self._factory = factory
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._factory(j) for j in range(*i.indices(self._size))]
+        if i < 0:
+            i += self._size
+        if i < 0 or i >= self._size:
+            raise IndexError(i)
+        return self._factory(i)
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._factory(i)
+
+
+class OdbSet(object):
+    def __init__(self, name, instance, nodeIndices=None, elementIndices=None):
+        self.name = name
+        self.instance = instance
+        self._nodeIndices = nodeIndices
+        self._elementIndices = elementIndices
+
+    @property
+    def nodes(self):
+        indices = self._nodeIndices
+        if indices is None:
+            return []
+        return LazySequence(len(indices), lambda i: self.instance.nodes[indices[i]])
+
+    @property
+    def elements(self):
+        indices = self._elementIndices
+        if indices is None:
+            return []
+        return LazySequence(len(indices), lambda i: self.instance.elements[indices[i]])
+
+    def Labels(self):
+        # ('element' or 'node', labels) used by FieldOutput.getSubset
+        if self._elementIndices is not None:
+            return ("element", self.instance.elementLabels[self._elementIndices])
+        return ("node", self.instance.nodeLabels[self._nodeIndices])
+
+
+class OdbInstance(object):
+    # spec keys:
+    # type - one of ELEMENT_TYPES
+    # shape - number of elements along each axis
+    # sectionPoints - number of section points of the integration point fields
+    # orientation - if false, localCoordSystem is None
+    # labelStart, labelStride - node and element labels are labelStart + labelStride * i
+    def __init__(self, name, spec, seed):
+        self.name = name
+        self.elementType = spec.get("type", "C3D8")
+        self.numIntegrationPoints, nodesPerElement, dim = ELEMENT_TYPES[
+            self.elementType
+        ]
+        shape = list(spec.get("shape", [4, 4, 4]))[:dim]
+        self.sectionPoints = [
+            SectionPoint(i + 1, ", (fraction = {0})".format(i))
+            for i in range(spec.get("sectionPoints", 0))
+        ]
+        self.orientation = bool(spec.get("orientation", True))
+        labelStride = int(spec.get("labelStride", 1))
+        labelStart = int(spec.get("labelStart", 1))
+
+        nodeShape = [n + 1 for n in shape]
+        grid = np.indices(nodeShape).reshape(dim, -1).T.astype(np.float32)
+        coordinates = np.zeros((len(grid), 3), dtype=np.float32)
+        coordinates[:, :dim] = grid
+        # instances are shifted so that they don't overlap
+        coordinates += seed
+        self.coordinates = coordinates
+        self.nodeLabels = labelStart + labelStride * np.arange(
+            len(grid), dtype=np.int64
+        )
+
+        cellIdx = np.indices(shape).reshape(dim, -1).T
+        strides = np.cumprod([1] + nodeShape[::-1][:-1])[::-1]
+        if dim == 3:
+            corners = [
+                (0, 0, 0),
+                (1, 0, 0),
+                (1, 1, 0),
+                (0, 1, 0),
+                (0, 0, 1),
+                (1, 0, 1),
+                (1, 1, 1),
+                (0, 1, 1),
+            ]
+        else:
+            corners = [(0, 0), (1, 0), (1, 1), (0, 1)]
+        conn = np.stack(
+            [((cellIdx + np.array(c)) * strides).sum(axis=1) for c in corners], axis=1
+        )
+        self.connectivity = self.nodeLabels[conn]
+        self.elementLabels = labelStart + labelStride * np.arange(
+            len(conn), dtype=np.int64
+        )
+        # the material orientation rotates about z from 0 to 90 degrees over the elements
+        self.quaternions = np.zeros((len(conn), 4), dtype=np.float32)
+        angle = np.linspace(0.0, np.pi / 2, len(conn)).astype(np.float32)
+        self.quaternions[:, 2] = np.sin(angle / 2)
+        self.quaternions[:, 3] = np.cos(angle / 2)
+
+        self.nodes = LazySequence(
+            len(self.nodeLabels),
+            lambda i: OdbMeshNode(
+                int(self.nodeLabels[i]), self.coordinates[i], self.name
+            ),
+        )
+        self.elements = LazySequence(
+            len(self.elementLabels),
+            lambda i: OdbMeshElement(
+                int(self.elementLabels[i]),
+                self.elementType,
+                tuple(int(label) for label in self.connectivity[i]),
+                self.name,
+            ),
+        )
+        # HALF - the first half of the elements, FIRST - the first 10 nodes
+        half = max(1, len(self.elementLabels) // 2)
+        self.elementSets = {
+            "HALF": OdbSet("HALF", self, elementIndices=np.arange(half)),
+        }
+        self.nodeSets = {
+            "FIRST": OdbSet("FIRST", self, nodeIndices=np.arange(min(10, len(grid)))),
+        }
+
+
+class FieldLocation(object):
+    def __init__(self, position, sectionPoints):
+        self.position = position
+        self.sectionPoints = sectionPoints
+
+
+class FieldBulkData(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FieldOutput(object):
+    def __init__(self, frame, name, filters=None):
+        self._frame = frame
+        self.name = name
+        self.type, self._nativePosition, self.componentLabels = FIELDS[name]
+        self.description = name
+        # the section points of every instance, see SectionPoints
+        self.locations = [FieldLocation(self._nativePosition, self.SectionPoints())]
+        self._filters = dict(filters or {})
+        self._blocks = None
+
+    def SectionPoints(self):
+        if self._nativePosition == NODAL:
+            return []
+        sectionPoints = {}
+        for instance in self._frame.odb.rootAssembly.instances.values():
+            for sectionPoint in instance.sectionPoints:
+                sectionPoints.setdefault(sectionPoint.description, sectionPoint)
+        return sorted(sectionPoints.values(), key=lambda s: s.number)
+
+    def getSubset(self, region=None, position=None, sectionPoint=None):
+        filters = dict(self._filters)
+        if isinstance(region, OdbInstance):
+            filters["instance"] = region.name
+        elif isinstance(region, OdbSet):
+            filters["instance"] = region.instance.name
+            filters["labels"] = region.Labels()
+        elif region is not None:
+            raise OdbError("unsupported region")
+        if position is not None:
+            filters["position"] = position
+        if sectionPoint is not None:
+            filters["sectionPoint"] = sectionPoint.number
+        return FieldOutput(self._frame, self.name, filters)
+
+    @property
+    def bulkDataBlocks(self):
+        if self._blocks is None:
+            self._blocks = self.BuildBlocks()
+        return self._blocks
+
+    @property
+    def values(self):
+        raise OdbError("values is not provided by the synthetic backend")
+
+    def Values(self, labels, ncomp, offset):
+        # smooth values which depend on the label, the component and the frame
+        frame = self._frame
+        scale = np.float32(frame.frameId) / max(1, frame.numFrames - 1)
+        base = labels.astype(np.float32)[:, None] * np.float32(1e-3)
+        comps = np.arange(max(1, ncomp), dtype=np.float32)[None, :]
+        return (np.sin(base + comps + np.float32(offset)) * scale).astype(np.float32)
+
+    def BuildBlocks(self):
+        # one block per instance and section point, like the odb
+        odb = self._frame.odb
+        position = self._filters.get("position", self._nativePosition)
+        ncomp = len(self.componentLabels)
+        labelFilter = self._filters.get("labels")
+        blocks = []
+        for instance in odb.rootAssembly.instances.values():
+            if self._filters.get("instance", instance.name) != instance.name:
+                continue
+            if self._nativePosition == NODAL:
+                if position != NODAL:
+                    continue
+                labels = instance.nodeLabels
+                if labelFilter is not None:
+                    if labelFilter[0] != "node":
+                        continue
+                    labels = np.intersect1d(labels, labelFilter[1])
+                blocks.append(
+                    FieldBulkData(
+                        data=self.Values(labels, ncomp, 0),
+                        nodeLabels=labels,
+                        elementLabels=None,
+                        integrationPoints=None,
+                        sectionPoint=None,
+                        localCoordSystem=None,
+                        position=NODAL,
+                        instance=instance,
+                        baseElementType=instance.elementType,
+                        componentLabels=self.componentLabels,
+                    )
+                )
+                continue
+            if position == NODAL:
+                continue
+            for sectionPoint in instance.sectionPoints or [None]:
+                if "sectionPoint" in self._filters and (
+                    sectionPoint is None
+                    or sectionPoint.number != self._filters["sectionPoint"]
+                ):
+                    continue
+                labels = instance.elementLabels
+                quaternions = instance.quaternions
+                if labelFilter is not None:
+                    if labelFilter[0] != "element":
+                        continue
+                    mask = np.isin(labels, labelFilter[1])
+                    labels = labels[mask]
+                    quaternions = quaternions[mask]
+                offset = 0 if sectionPoint is None else sectionPoint.number
+                n = instance.numIntegrationPoints
+                if position == INTEGRATION_POINT:
+                    elementLabels = np.repeat(labels, n)
+                    integrationPoints = np.tile(np.arange(1, n + 1), len(labels))
+                    data = self.Values(elementLabels, ncomp, offset)
+                    data *= (1.0 + 0.01 * integrationPoints)[:, None].astype(np.float32)
+                    nodeLabels = None
+                    localCoordSystem = np.repeat(quaternions, n, axis=0)
+                elif position == CENTROID:
+                    elementLabels = labels
+                    integrationPoints = None
+                    data = self.Values(elementLabels, ncomp, offset)
+                    nodeLabels = None
+                    localCoordSystem = quaternions
+                elif position == ELEMENT_NODAL:
+                    conn = instance.connectivity[
+                        np.isin(instance.elementLabels, labels)
+                    ]
+                    elementLabels = np.repeat(labels, conn.shape[1])
+                    nodeLabels = conn.reshape(-1)
+                    integrationPoints = None
+                    data = self.Values(elementLabels, ncomp, offset)
+                    data += self.Values(nodeLabels, ncomp, offset) * np.float32(0.1)
+                    localCoordSystem = np.repeat(quaternions, conn.shape[1], axis=0)
+                else:
+                    continue
+                blocks.append(
+                    FieldBulkData(
+                        data=data,
+                        nodeLabels=nodeLabels,
+                        elementLabels=elementLabels,
+                        integrationPoints=integrationPoints,
+                        sectionPoint=sectionPoint,
+                        localCoordSystem=(
+                            localCoordSystem if instance.orientation else None
+                        ),
+                        position=position,
+                        instance=instance,
+                        baseElementType=instance.elementType,
+                        componentLabels=self.componentLabels,
+                    )
+                )
+        return blocks
+
+
+class OdbFrame(object):
+    def __init__(self, odb, step, frameId, numFrames, fields):
+        self.odb = odb
+        self.frameId = frameId
+        self.numFrames = numFrames
+        self.frameValue = step.timePeriod * frameId / max(1, numFrames - 1)
+        self.description = "Increment {0}".format(frameId)
+        self.fieldOutputs = dict(
+            (name, FieldOutput(self, name)) for name in fields if name in FIELDS
+        )
+
+
+class HistoryOutput(object):
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+
+
+class OdbStep(object):
+    # spec keys:
+    # frames - number of frames
+    # timePeriod - frameValue of the last frame
+    # historyRegions, historyOutputs, historyPoints - size of the history output,
+    # region i has historyPoints - i points
+    def __init__(self, odb, name, spec, fields, totalTime=0.0):
+        self.name = name
+        self.timePeriod = float(spec.get("timePeriod", 1.0))
+        # time at the start of the step, the steps follow each other in name order
+        self.totalTime = totalTime
+        numFrames = int(spec.get("frames", 2))
+        self.frames = [
+            OdbFrame(odb, self, i, numFrames, fields) for i in range(numFrames)
+        ]
+        self.historyRegions = {}
+        numHistory = int(spec.get("historyOutputs", 2))
+        numPoints = int(spec.get("historyPoints", numFrames))
+        for r in range(int(spec.get("historyRegions", 2))):
+            outputs = {}
+            time = np.linspace(0.0, self.timePeriod, max(1, numPoints - r))
+            for h in range(numHistory):
+                name = "H{0}".format(h)
+                outputs[name] = HistoryOutput(
+                    name, tuple((float(t), float(t * (h + 1) + r)) for t in time)
+                )
+            self.historyRegions["Region {0}".format(r)] = Repository(
+                historyOutputs=outputs
+            )
+
+
+class Odb(object):
+    def __init__(self, spec):
+        fields = spec.get("fields", list(FIELDS))
+        instances = spec.get("instances", {"PART-1-1": {}})
+        self.rootAssembly = Repository(
+            instances=dict(
+                (name, OdbInstance(name, instanceSpec, i))
+                for i, (name, instanceSpec) in enumerate(sorted(instances.items()))
+            )
+        )
+        self.steps = {}
+        totalTime = 0.0
+        for name, stepSpec in sorted(spec.get("steps", {"Step-1": {}}).items()):
+            self.steps[name] = OdbStep(self, name, stepSpec, fields, totalTime)
+            totalTime += self.steps[name].timePeriod
+
+    def close(self):
+        pass
+
+
+def openOdb(path, readOnly=True):
+    with open(path) as f:
+        spec = json.load(f)
+    return Odb(spec)
@@ -0,0 +1,259 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  celltypes.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# celltypes.py maps Abaqus element types to vtk cell types and node orders
+# linear cell
+# https://raw.githubusercontent.com/Kitware/vtk-examples/gh-pages/src/Testing/Baseline/Cxx/GeometricObjects/TestLinearCellDemo.png
+# quadratic cell
+# https://raw.githubusercontent.com/Kitware/vtk-examples/gh-pages/src/Testing/Baseline/Cxx/GeometricObjects/TestIsoparametricCellsDemo.png
+
+import numpy as np
+
+# vtk cell types
+VTK_VERTEX = 1
+VTK_LINE = 3
+VTK_TRIANGLE = 5
+VTK_QUAD = 9
+VTK_TETRA = 10
+VTK_HEXAHEDRON = 12
+VTK_WEDGE = 13
+VTK_PYRAMID = 14
+VTK_QUADRATIC_EDGE = 21
+VTK_QUADRATIC_TRIANGLE = 22
+VTK_QUADRATIC_QUAD = 23
+VTK_QUADRATIC_TETRA = 24
+VTK_QUADRATIC_HEXAHEDRON = 25
+VTK_QUADRATIC_WEDGE = 26
+VTK_BIQUADRATIC_QUAD = 28
+VTK_TRIQUADRATIC_HEXAHEDRON = 29
+
+# Abaqus element type prefix: vtk cell type
+# an element type is matched by the longest prefix in the table, i.e. the suffixes for
+# reduced integration, hybrid, incompatible modes, temperature, etc. are ignored:
+# C3D8 matches C3D8R, C3D8H, C3D8I, C3D8RHT and S4 matches S4R, S4R5, S4RS
+ABAQUS_VTK_CELL_TYPES = {
+    # 3D continuum (stress, heat transfer, acoustic)
+    "C3D4": VTK_TETRA,
+    "C3D5": VTK_PYRAMID,
+    "C3D6": VTK_WEDGE,
+    "C3D8": VTK_HEXAHEDRON,
+    "C3D10": VTK_QUADRATIC_TETRA,
+    "C3D15": VTK_QUADRATIC_WEDGE,
+    "C3D20": VTK_QUADRATIC_HEXAHEDRON,
+    "C3D27": VTK_TRIQUADRATIC_HEXAHEDRON,
+    "DC3D4": VTK_TETRA,
+    "DC3D6": VTK_WEDGE,
+    "DC3D8": VTK_HEXAHEDRON,
+    "DC3D10": VTK_QUADRATIC_TETRA,
+    "DC3D15": VTK_QUADRATIC_WEDGE,
+    "DC3D20": VTK_QUADRATIC_HEXAHEDRON,
+    "AC3D4": VTK_TETRA,
+    "AC3D6": VTK_WEDGE,
+    "AC3D8": VTK_HEXAHEDRON,
+    "AC3D10": VTK_QUADRATIC_TETRA,
+    "AC3D15": VTK_QUADRATIC_WEDGE,
+    "AC3D20": VTK_QUADRATIC_HEXAHEDRON,
+    # continuum shells
+    "SC6R": VTK_WEDGE,
+    "SC8R": VTK_HEXAHEDRON,
+    "CSS8": VTK_HEXAHEDRON,
+    # cohesive
+    "COH2D4": VTK_QUAD,
+    "COHAX4": VTK_QUAD,
+    "COH3D6": VTK_WEDGE,
+    "COH3D8": VTK_HEXAHEDRON,
+    # gaskets
+    "GK2D2": VTK_LINE,
+    "GKPS4": VTK_QUAD,
+    "GKPE4": VTK_QUAD,
+    "GKAX4": VTK_QUAD,
+    "GK3D6": VTK_WEDGE,
+    "GK3D8": VTK_HEXAHEDRON,
+    # 2D continuum: plane stress, plane strain, generalized plane strain, axisymmetric
+    "CPS3": VTK_TRIANGLE,
+    "CPS4": VTK_QUAD,
+    "CPS6": VTK_QUADRATIC_TRIANGLE,
+    "CPS8": VTK_QUADRATIC_QUAD,
+    "CPE3": VTK_TRIANGLE,
+    "CPE4": VTK_QUAD,
+    "CPE6": VTK_QUADRATIC_TRIANGLE,
+    "CPE8": VTK_QUADRATIC_QUAD,
+    "CPEG3": VTK_TRIANGLE,
+    "CPEG4": VTK_QUAD,
+    "CPEG6": VTK_QUADRATIC_TRIANGLE,
+    "CPEG8": VTK_QUADRATIC_QUAD,
+    "CAX3": VTK_TRIANGLE,
+    "CAX4": VTK_QUAD,
+    "CAX6": VTK_QUADRATIC_TRIANGLE,
+    "CAX8": VTK_QUADRATIC_QUAD,
+    "CGAX3": VTK_TRIANGLE,
+    "CGAX4": VTK_QUAD,
+    "CGAX6": VTK_QUADRATIC_TRIANGLE,
+    "CGAX8": VTK_QUADRATIC_QUAD,
+    "DC2D3": VTK_TRIANGLE,
+    "DC2D4": VTK_QUAD,
+    "DC2D6": VTK_QUADRATIC_TRIANGLE,
+    "DC2D8": VTK_QUADRATIC_QUAD,
+    "DCAX3": VTK_TRIANGLE,
+    "DCAX4": VTK_QUAD,
+    "DCAX6": VTK_QUADRATIC_TRIANGLE,
+    "DCAX8": VTK_QUADRATIC_QUAD,
+    # shells
+    "S3": VTK_TRIANGLE,
+    "S4": VTK_QUAD,
+    "S8": VTK_QUADRATIC_QUAD,
+    "S9": VTK_BIQUADRATIC_QUAD,
+    "STRI3": VTK_TRIANGLE,
+    "STRI65": VTK_QUADRATIC_TRIANGLE,
+    "DS3": VTK_TRIANGLE,
+    "DS4": VTK_QUAD,
+    "DS6": VTK_QUADRATIC_TRIANGLE,
+    "DS8": VTK_QUADRATIC_QUAD,
+    "SAX1": VTK_LINE,
+    "SAX2": VTK_QUADRATIC_EDGE,
+    # membranes and surfaces
+    "M3D3": VTK_TRIANGLE,
+    "M3D4": VTK_QUAD,
+    "M3D6": VTK_QUADRATIC_TRIANGLE,
+    "M3D8": VTK_QUADRATIC_QUAD,
+    "M3D9": VTK_BIQUADRATIC_QUAD,
+    "SFM3D3": VTK_TRIANGLE,
+    "SFM3D4": VTK_QUAD,
+    "SFM3D6": VTK_QUADRATIC_TRIANGLE,
+    "SFM3D8": VTK_QUADRATIC_QUAD,
+    # rigid
+    "R3D3": VTK_TRIANGLE,
+    "R3D4": VTK_QUAD,
+    "R2D2": VTK_LINE,
+    "RAX2": VTK_LINE,
+    "RB2D2": VTK_LINE,
+    "RB3D2": VTK_LINE,
+    # beams, pipes and trusses
+    "B21": VTK_LINE,
+    "B22": VTK_QUADRATIC_EDGE,
+    "B23": VTK_LINE,
+    "B31": VTK_LINE,
+    "B32": VTK_QUADRATIC_EDGE,
+    "B33": VTK_LINE,
+    "PIPE21": VTK_LINE,
+    "PIPE22": VTK_QUADRATIC_EDGE,
+    "PIPE31": VTK_LINE,
+    "PIPE32": VTK_QUADRATIC_EDGE,
+    "ELBOW31": VTK_LINE,
+    "ELBOW32": VTK_QUADRATIC_EDGE,
+    "T2D2": VTK_LINE,
+    "T2D3": VTK_QUADRATIC_EDGE,
+    "T3D2": VTK_LINE,
+    "T3D3": VTK_QUADRATIC_EDGE,
+    # connectors, springs and dashpots
+    "CONN2D2": VTK_LINE,
+    "CONN3D2": VTK_LINE,
+    "SPRING1": VTK_VERTEX,
+    "SPRING2": VTK_LINE,
+    "SPRINGA": VTK_LINE,
+    "DASHPOT1": VTK_VERTEX,
+    "DASHPOT2": VTK_LINE,
+    "DASHPOTA": VTK_LINE,
+    # point elements
+    "RNODE2D": VTK_VERTEX,
+    "RNODE3D": VTK_VERTEX,
+    "MASS": VTK_VERTEX,
+    "ROTARYI": VTK_VERTEX,
+    "HEATCAP": VTK_VERTEX,
+}
+
+# vtk node i of a cell is the Abaqus node ABAQUS_VTK_NODE_ORDERS[prefix][i] of the element,
+# only for the element types whose node orders differ
+# 3 node lines: Abaqus has the middle node second, vtk has it last
+# C3D27: the face centers are bottom, top, -y, +x, +y, -x in Abaqus and
+# -x, +x, -y, +y, bottom, top in vtk
+QUADRATIC_LINE_ORDER = [0, 2, 1]
+ABAQUS_VTK_NODE_ORDERS = {
+    "C3D27": list(range(20)) + [25, 23, 22, 24, 20, 21, 26],
+    "SAX2": QUADRATIC_LINE_ORDER,
+    "B22": QUADRATIC_LINE_ORDER,
+    "B32": QUADRATIC_LINE_ORDER,
+    "PIPE22": QUADRATIC_LINE_ORDER,
+    "PIPE32": QUADRATIC_LINE_ORDER,
+    "ELBOW32": QUADRATIC_LINE_ORDER,
+    "T2D3": QUADRATIC_LINE_ORDER,
+    "T3D3": QUADRATIC_LINE_ORDER,
+}
+
+# {abaqusElementType: (vtkCellType, nodeOrder)} of the element types already resolved
+_resolved_cell_types = {}
+
+
+def AbaqusVTKCellType(abaqusElementType):
+    # returns (vtkCellType, nodeOrder), nodeOrder is None if the nodes are in the vtk order
+    # raise KeyError if the element type isn't supported
+    resolved = _resolved_cell_types.get(abaqusElementType)
+    if resolved is not None:
+        return resolved
+    prefix = None
+    for key in ABAQUS_VTK_CELL_TYPES:
+        if abaqusElementType.startswith(key) and (
+            prefix is None or len(key) > len(prefix)
+        ):
+            prefix = key
+    if prefix is None:
+        raise KeyError(abaqusElementType)
+    nodeOrder = ABAQUS_VTK_NODE_ORDERS.get(prefix)
+    if nodeOrder is not None:
+        nodeOrder = np.array(nodeOrder, dtype=np.int64)
+    resolved = (ABAQUS_VTK_CELL_TYPES[prefix], nodeOrder)
+    _resolved_cell_types[abaqusElementType] = resolved
+    return resolved
+
+
+def ReorderCellNodes(connectivity, cellSizes, cellTypeIds, cellTypes):
+    # connectivity - nodes of every cell one after the other
+    # cellSizes - number of nodes of every cell
+    # cellTypeIds - index in cellTypes of every cell
+    # cellTypes - [(vtkCellType, nodeOrder), ...], see AbaqusVTKCellType
+    # returns connectivity with the nodes of every cell in the vtk order
+    connectivity = np.asarray(connectivity)
+    cellSizes = np.asarray(cellSizes, dtype=np.int64)
+    cellTypeIds = np.asarray(cellTypeIds, dtype=np.int64)
+    starts = None
+    for typeId, (vtkCellType, nodeOrder) in enumerate(cellTypes):
+        if nodeOrder is None:
+            continue
+        # elements with optional nodes left out keep the Abaqus order
+        selected = (cellTypeIds == typeId) & (cellSizes == len(nodeOrder))
+        if not selected.any():
+            continue
+        if starts is None:
+            starts = np.cumsum(cellSizes) - cellSizes
+        cellStarts = starts[selected][:, None]
+        connectivity[cellStarts + np.arange(len(nodeOrder))] = connectivity[
+            cellStarts + nodeOrder
+        ]
+    return connectivity
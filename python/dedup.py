@@ -0,0 +1,59 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  dedup.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# dedup.py finds the DataArrays whose content didn't change since a previous frame, so that a
+# writer storing all the frames in one file writes every distinct array once and points the
+# other frames to the first copy, e.g. Material_Orientation or a field which is zero in the
+# early frames. the arrays are compared by a hash of their content, kept per key.
+
+import hashlib
+import numpy as np
+
+
+def ContentHash(array, dtype=None):
+    # hash of the bytes of the array
+    # dtype - the type the array is stored as, arrays which differ only below its precision
+    #         have the same hash
+    return hashlib.sha1(np.ascontiguousarray(array, dtype=dtype).tobytes()).hexdigest()
+
+
+class ContentIndex(object):
+    # {key: {content hash: location}} of the arrays written, the key is e.g. (group, array name)
+    # and the location is where the writer stored the first copy, e.g. a row offset
+    def __init__(self):
+        self._locations = {}
+
+    def Find(self, key, digest):
+        # location of an array of the same key and content, None if the content is new
+        return self._locations.get(key, {}).get(digest)
+
+    def Add(self, key, digest, location):
+        # the later copies keep pointing to the first one
+        self._locations.setdefault(key, {}).setdefault(digest, location)
@@ -0,0 +1,198 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  derived.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# derived.py computes quantities derived from the field values while they are in memory,
+# e.g. the von Mises stress or the displacement magnitude, so that they don't have to be
+# computed over the .vtu files afterwards. a quantity is computed for every integration
+# point of the DataArray: the components of one point are next to each other, e.g.
+# S11 S22 S33 S12 S13 S23 S11 S22 ... for an _IntegrationPoints DataArray.
+
+import fnmatch
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# quantity: (vtkType of the fields it applies to, vtkType of the result, name suffix,
+# component labels of one point)
+DERIVED_QUANTITIES = OrderedDict(
+    [
+        ("mises", ("Tensors", "Scalars", "Mises", ("Mises",))),
+        (
+            "principal",
+            (
+                "Tensors",
+                "Vectors",
+                "Principal",
+                ("Max. Principal", "Mid. Principal", "Min. Principal"),
+            ),
+        ),
+        ("magnitude", ("Vectors", "Scalars", "Magnitude", ("Magnitude",))),
+        # failure indices of the plane stress in the material directions (11, 22, 12)
+        ("maxstress", ("Tensors", "Scalars", "MSTRS", ("MSTRS",))),
+        ("tsaihill", ("Tensors", "Scalars", "TSAIH", ("TSAIH",))),
+        ("tsaiwu", ("Tensors", "Scalars", "TSAIW", ("TSAIW",))),
+    ]
+)
+FAILURE_INDICES = ("maxstress", "tsaihill", "tsaiwu")
+# row and column of the tensor components, from the last two characters of the labels
+TENSOR_COMPONENTS = {
+    "11": (0, 0),
+    "22": (1, 1),
+    "33": (2, 2),
+    "12": (0, 1),
+    "13": (0, 2),
+    "23": (1, 2),
+}
+
+
+def ParseDerived(specs):
+    # specs = ['FIELD:quantity', ...], FIELD is a glob pattern of fieldOutput names,
+    # e.g. ['S:mises', 'S:principal', 'U*:magnitude']. returns [(pattern, quantity), ...]
+    derived = []
+    for spec in specs:
+        pattern, sep, quantity = spec.rpartition(":")
+        if sep == "" or pattern == "" or quantity not in DERIVED_QUANTITIES:
+            raise ValueError(
+                "{0} is not a derived quantity, use FIELD:QUANTITY with one of {1}".format(
+                    spec, list(DERIVED_QUANTITIES)
+                )
+            )
+        derived.append((pattern, quantity))
+    return derived
+
+
+def SelectQuantities(derived, fldName, vtkType, componentLabels):
+    # the quantities of derived which apply to the fieldOutput, in the order given
+    quantities = []
+    for pattern, quantity in derived:
+        if quantity in quantities or not fnmatch.fnmatchcase(fldName, pattern):
+            continue
+        sourceType = DERIVED_QUANTITIES[quantity][0]
+        if sourceType != vtkType:
+            continue
+        components = [label[-2:] for label in componentLabels]
+        if sourceType == "Tensors" and not all(
+            component in TENSOR_COMPONENTS for component in components
+        ):
+            continue
+        if quantity in FAILURE_INDICES and not all(
+            component in components for component in ("11", "22", "12")
+        ):
+            continue
+        quantities.append(quantity)
+    return quantities
+
+
+def Compute(quantity, values, componentLabels, strengths=None):
+    # values = (n, number of points x len(componentLabels)) array of a DataArray,
+    # returns the (n, number of points x number of labels of the quantity) Float32 array.
+    # strengths = (Xt, Xc, Yt, Yc, S) of the failure indices, all positive
+    values = np.asarray(values)
+    n = values.shape[0]
+    points = values.reshape(-1, len(componentLabels)).astype(np.float64)
+    if quantity == "magnitude":
+        result = np.sqrt(np.einsum("ij,ij->i", points, points))
+    elif quantity in FAILURE_INDICES:
+        result = FailureIndex(quantity, points, componentLabels, strengths)
+    else:
+        tensors = Tensors(points, componentLabels)
+        if quantity == "mises":
+            deviatoric = tensors - np.trace(tensors, axis1=1, axis2=2)[
+                :, np.newaxis, np.newaxis
+            ] / 3.0 * np.eye(3)
+            result = np.sqrt(1.5 * np.einsum("ijk,ijk->i", deviatoric, deviatoric))
+        else:
+            # eigvalsh returns the eigenvalues in ascending order
+            result = np.linalg.eigvalsh(tensors)[:, ::-1]
+    return result.reshape(n, -1).astype(np.float32)
+
+
+def Tensors(points, componentLabels):
+    # symmetric 3x3 tensors of the points, the components which aren't output are zero
+    tensors = np.zeros((len(points), 3, 3))
+    for i, label in enumerate(componentLabels):
+        row, column = TENSOR_COMPONENTS[label[-2:]]
+        tensors[:, row, column] = points[:, i]
+        tensors[:, column, row] = points[:, i]
+    return tensors
+
+
+def FailureIndex(quantity, points, componentLabels, strengths):
+    components = [label[-2:] for label in componentLabels]
+    s11 = points[:, components.index("11")]
+    s22 = points[:, components.index("22")]
+    s12 = points[:, components.index("12")]
+    xt, xc, yt, yc, s = strengths
+    # tensile or compressive strength depending on the sign of the stress
+    x = np.where(s11 >= 0.0, xt, xc)
+    y = np.where(s22 >= 0.0, yt, yc)
+    if quantity == "maxstress":
+        return np.maximum(np.maximum(np.abs(s11) / x, np.abs(s22) / y), np.abs(s12) / s)
+    if quantity == "tsaihill":
+        return (s11 / x) ** 2 - s11 * s22 / x**2 + (s22 / y) ** 2 + (s12 / s) ** 2
+    # Tsai-Wu with the interaction coefficient F12 = 0, the default of Abaqus
+    return (
+        (1.0 / xt - 1.0 / xc) * s11
+        + (1.0 / yt - 1.0 / yc) * s22
+        + s11**2 / (xt * xc)
+        + s22**2 / (yt * yc)
+        + (s12 / s) ** 2
+    )
+
+
+class SharedValues(object):
+    # the values of a DataArray computed once for the DataArray and the quantities derived
+    # from it, possibly by different threads. users = number of DataArrays reading them,
+    # the values are released after the last one
+    def __init__(self, users):
+        self._lock = threading.Lock()
+        self._users = users
+        self._fetched = None
+        self._values = None
+
+    def Fetch(self, fetch):
+        # the odb reads, done once by the thread reading the odb
+        if self._fetched is None:
+            self._fetched = fetch()
+        return self._fetched
+
+    def Get(self, compute):
+        with self._lock:
+            values = self._values
+            if values is None:
+                values = compute()
+            self._users -= 1
+            if self._users > 0:
+                self._values = values
+            else:
+                self._values = None
+                self._fetched = None
+            return values
@@ -0,0 +1,146 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  history.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# history.py writes the historyOutputs as one table with a row per time and a column per historyOutput
+# csv     - comma separated values with a Time column first
+# npz     - numpy archive with the Time, Values and Names arrays
+# hdf5    - the same arrays as datasets of an .h5 file, Values is chunked by column (needs h5py)
+# parquet - a Time column and one column per historyOutput (needs pyarrow)
+
+import numpy as np
+
+try:
+    import h5py
+except ImportError:
+    # optional dependency, only needed for the hdf5 output
+    h5py = None
+
+HISTORY_FORMATS = ("csv", "npz", "hdf5", "parquet")
+HISTORY_EXTENSIONS = {
+    "csv": ".csv",
+    "npz": ".npz",
+    "hdf5": ".h5",
+    "parquet": ".parquet",
+}
+
+# number of rows formatted at once in csv
+CSV_CHUNK_ROWS = 65536
+# number of values of a chunk of the hdf5 Values dataset
+HDF5_CHUNK_VALUES = 65536
+
+
+def AlignOnTime(columns):
+    # columns - list of (n, 2) arrays of (time, value), like historyOutput.data
+    # returns (times, values), times is the sorted union of the times of every column and
+    # values is a (len(times), len(columns)) array, NaN where a column has no value at that time
+    if len(columns) == 0:
+        return np.zeros(0), np.zeros((0, 0))
+    data = np.concatenate(columns)
+    times = np.unique(data[:, 0])
+    rows = np.searchsorted(times, data[:, 0])
+    cols = np.repeat(np.arange(len(columns)), [len(column) for column in columns])
+    values = np.full((len(times), len(columns)), np.nan)
+    values[rows, cols] = data[:, 1]
+    return times, values
+
+
+def WriteHistory(fileName, historyFormat, names, times, values, asciiPrecision=None):
+    if historyFormat == "csv":
+        WriteCSV(fileName, names, times, values, asciiPrecision)
+    elif historyFormat == "npz":
+        np.savez(fileName, Time=times, Values=values, Names=np.array(names))
+    elif historyFormat == "hdf5":
+        WriteHDF5(fileName, names, times, values)
+    elif historyFormat == "parquet":
+        WriteParquet(fileName, names, times, values)
+    else:
+        raise ValueError(
+            "{0} is not a valid history format, use one of {1}".format(
+                historyFormat, HISTORY_FORMATS
+            )
+        )
+
+
+def CSVName(name):
+    # names are quoted if they contain a separator
+    if "," in name or '"' in name:
+        return '"{0}"'.format(name.replace('"', '""'))
+    return name
+
+
+def WriteCSV(fileName, names, times, values, asciiPrecision=None):
+    # asciiPrecision = number of significant digits, None writes the shortest representation
+    table = np.column_stack([times, values])
+    if asciiPrecision is None:
+        valueFormat = "%r"
+    else:
+        valueFormat = "%.{0}g".format(asciiPrecision)
+    rowFormat = ",".join([valueFormat] * table.shape[1]) + "\n"
+    with open(fileName, "w") as f:
+        f.write(",".join(CSVName(name) for name in ["Time"] + list(names)) + "\n")
+        for start in range(0, len(table), CSV_CHUNK_ROWS):
+            chunk = table[start : start + CSV_CHUNK_ROWS]
+            f.write((rowFormat * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def WriteHDF5(fileName, names, times, values):
+    if h5py is None:
+        raise ImportError("the hdf5 history output needs the h5py python package")
+    with h5py.File(fileName, "w") as f:
+        f.create_dataset("Time", data=times)
+        # chunks of whole columns so that a historyOutput is read without the others
+        options = {}
+        if values.size != 0:
+            columns = max(1, min(values.shape[1], HDF5_CHUNK_VALUES // len(times)))
+            options = {
+                "chunks": (len(times), columns),
+                "compression": "gzip",
+                "shuffle": True,
+            }
+        f.create_dataset("Values", data=values, **options)
+        f.create_dataset(
+            "Names",
+            data=np.array(names, dtype=object),
+            dtype=h5py.string_dtype("utf-8"),
+        )
+
+
+def WriteParquet(fileName, names, times, values):
+    # optional dependency, only needed for the parquet output
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("the parquet history output needs the pyarrow python package")
+    columns = [pyarrow.array(times)] + [
+        pyarrow.array(values[:, j]) for j in range(values.shape[1])
+    ]
+    table = pyarrow.Table.from_arrays(columns, names=["Time"] + list(names))
+    pyarrow.parquet.write_table(table, fileName)
@@ -0,0 +1,98 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  labelmap.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# labelmap.py maps Abaqus node/element labels of one instance to vtk indices
+
+import numpy as np
+
+# labels are usually numbered 1..n with a few gaps, a dense lookup table is used
+# as long as it isn't much bigger than the number of labels.
+# Otherwise the labels are sorted and looked up with np.searchsorted
+DENSE_FACTOR = 4
+
+
+class LabelMap(object):
+    def __init__(self, labels, start=0):
+        # labels - node or element labels in the order they are written to the vtu
+        # start - vtk index of the first label
+        labels = np.asarray(labels, dtype=np.int64).reshape(-1)
+        self.start = start
+        self.labels = labels
+        self._dense = None
+        self._sorted = None
+        self._indices = None
+        if len(labels) == 0:
+            return
+        maxLabel = int(labels.max())
+        if labels.min() >= 0 and maxLabel < DENSE_FACTOR * len(labels) + 1024:
+            self._dense = np.full(maxLabel + 1, -1, dtype=np.int64)
+            self._dense[labels] = np.arange(start, start + len(labels))
+        else:
+            order = np.argsort(labels, kind="mergesort")
+            self._sorted = labels[order]
+            self._indices = order + start
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, label):
+        return int(self.Lookup([label])[0])
+
+    def Lookup(self, labels):
+        # vectorized label -> index, raise KeyError like a dict if a label is unknown
+        labels = np.asarray(labels, dtype=np.int64).reshape(-1)
+        indices, valid = self.Find(labels)
+        if not valid.all():
+            raise KeyError(int(labels[np.argmin(valid)]))
+        return indices
+
+    def Find(self, labels):
+        # vectorized label -> index, returns (indices, valid), the indices of the unknown
+        # labels (valid is False) are undefined
+        labels = np.asarray(labels, dtype=np.int64).reshape(-1)
+        if self._dense is not None:
+            valid = (labels >= 0) & (labels < len(self._dense))
+            indices = self._dense[np.where(valid, labels, 0)]
+            valid &= indices >= 0
+        elif self._sorted is not None:
+            if np.all(labels[1:] >= labels[:-1]):
+                pos = np.searchsorted(self._sorted, labels)
+            else:
+                # searchsorted is much faster (cache friendly) on a sorted query
+                order = np.argsort(labels, kind="mergesort")
+                pos = np.empty(len(labels), dtype=np.int64)
+                pos[order] = np.searchsorted(self._sorted, labels[order])
+            pos = np.minimum(pos, len(self._sorted) - 1)
+            valid = self._sorted[pos] == labels
+            indices = self._indices[pos]
+        else:
+            valid = np.zeros(len(labels), dtype=bool)
+            indices = labels
+        return indices, valid
@@ -0,0 +1,154 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  manifest.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# manifest.py keeps track of the converted frames so that an export can be resumed.
+# For every .vtu file, the manifest records the odb it was converted from,
+# the selected instances, the writer options, the DataArrays and a checksum of the file
+# and of the pieces of a partitioned frame.
+
+import json
+import zlib
+import os
+
+MANIFEST_VERSION = 1
+CHECKSUM_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def OdbSignature(odbFile):
+    stat = os.stat(odbFile)
+    return {
+        "path": os.path.abspath(odbFile),
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+    }
+
+
+def Checksum(fileName):
+    checksum = 0
+    with open(fileName, "rb") as f:
+        chunk = f.read(CHECKSUM_CHUNK_SIZE)
+        while chunk:
+            checksum = zlib.crc32(chunk, checksum)
+            chunk = f.read(CHECKSUM_CHUNK_SIZE)
+    return "crc32:{0:08x}".format(checksum & 0xFFFFFFFF)
+
+
+def IsUnchanged(fileName, entry):
+    # entry - the size and checksum recorded for the file
+    if not os.path.exists(fileName) or entry["size"] != os.path.getsize(fileName):
+        return False
+    return entry["checksum"] == Checksum(fileName)
+
+
+class FrameManifest(object):
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self._frames = {}
+        if os.path.exists(fileName):
+            try:
+                with open(fileName) as f:
+                    content = json.load(f)
+                if content.get("version") == MANIFEST_VERSION:
+                    self._frames = content.get("frames", {})
+            except ValueError:
+                # a broken manifest only means the frames are converted again
+                print("{0} is not a valid manifest, ignored".format(fileName))
+
+    def Record(
+        self,
+        vtuFileName,
+        odbSignature,
+        instances,
+        options,
+        extra=None,
+        pieceFileNames=(),
+    ):
+        # call it once the file is completely written
+        # pieceFileNames - the .vtu pieces referenced by a .pvtu, checked like the file
+        directory = os.path.dirname(vtuFileName)
+        entry = {
+            "odb": odbSignature,
+            "instances": list(instances),
+            "options": options,
+            "size": os.path.getsize(vtuFileName),
+            "checksum": Checksum(vtuFileName),
+            "pieces": [
+                {
+                    "file": os.path.relpath(pieceFileName, directory),
+                    "size": os.path.getsize(pieceFileName),
+                    "checksum": Checksum(pieceFileName),
+                }
+                for pieceFileName in pieceFileNames
+            ],
+        }
+        if extra is not None:
+            entry.update(extra)
+        self._frames[os.path.basename(vtuFileName)] = entry
+        self.Save()
+
+    def IsComplete(
+        self, vtuFileName, odbSignature, instances, options, growingOdb=False
+    ):
+        # growingOdb - the analysis is still running and appending frames to the odb,
+        # frames converted earlier are valid even though the odb mtime and size changed
+        entry = self._frames.get(os.path.basename(vtuFileName))
+        if entry is None or not os.path.exists(vtuFileName):
+            return False
+        if growingOdb:
+            if entry["odb"]["path"] != odbSignature["path"]:
+                return False
+        elif entry["odb"] != odbSignature:
+            return False
+        if entry["instances"] != list(instances) or entry["options"] != options:
+            return False
+        if not IsUnchanged(vtuFileName, entry):
+            return False
+        directory = os.path.dirname(vtuFileName)
+        for piece in entry.get("pieces", []):
+            if not IsUnchanged(os.path.join(directory, piece["file"]), piece):
+                return False
+        return True
+
+    def Save(self):
+        WriteJSON(self.fileName, {"version": MANIFEST_VERSION, "frames": self._frames})
+
+
+def WriteJSON(fileName, content):
+    # write a temporary file first so that a crash never leaves a truncated file
+    tempName = "{0}.{1}.tmp".format(fileName, os.getpid())
+    with open(tempName, "w") as f:
+        json.dump(content, f, indent=4, sort_keys=True)
+    if hasattr(os, "replace"):
+        os.replace(tempName, fileName)
+    else:
+        # python 2 can't rename over an existing file on Windows
+        if os.path.exists(fileName):
+            os.remove(fileName)
+        os.rename(tempName, fileName)
@@ -28,7 +28,10 @@
 # SOFTWARE.
 # ========================================================================*/
 
-# Command line tool to spawn 'abaqus python' call in parallel
+# Command line tool to run 'abaqus python' conversions in parallel
+# engine 'pool'       - one 'abaqus python' call converting the frames with a pool of workers,
+#                       every worker opens the odb once (see workerpool.py)
+# engine 'subprocess' - one 'abaqus python' call per frame
 
 import multiprocessing
 import subprocess
@@ -36,6 +39,8 @@ import argparse
 import sys
 import os
 
+import profiler
+
 
 def spawn(cmd):
     return subprocess.call(cmd, shell=True)
@@ -69,6 +74,204 @@ if __name__ == "__main__":
     parser.add_argument(
         "--suffix", default="", type=str, help="string appended to the file"
     )
+    parser.add_argument(
+        "--format",
+        default="ascii",
+        choices=("ascii", "binary", "appended"),
+        help="format of the <DataArray> in the .vtu file",
+    )
+    parser.add_argument(
+        "--output",
+        default="vtu",
+        choices=("vtu", "vtkhdf"),
+        help="'vtkhdf' writes all frames into one .vtkhdf file by a single abaqus python call",
+    )
+    parser.add_argument(
+        "--hdfChunkRows",
+        default=None,
+        type=int,
+        help="rows of the chunks of the .vtkhdf datasets, the default of odb2vtk.py if not set",
+    )
+    parser.add_argument(
+        "--asciiPrecision",
+        default=0,
+        type=int,
+        help="significant digits of the ascii floats, 0 writes the shortest representation",
+    )
+    parser.add_argument(
+        "--compress",
+        default="none",
+        choices=("none", "zlib", "lz4"),
+        help="compression of the binary and appended DataArrays",
+    )
+    parser.add_argument(
+        "--compressionLevel",
+        default=-1,
+        type=int,
+        help="compression level, -1 for the default of the compressor",
+    )
+    parser.add_argument(
+        "--compressionBlockSize",
+        default=None,
+        type=int,
+        help="uncompressed size in bytes of the compressed blocks, the default of odb2vtk.py if not set",
+    )
+    parser.add_argument(
+        "--compressionThreads",
+        default=None,
+        type=int,
+        help="number of threads compressing the blocks of every worker, the number of cpus divided by --workers by default",
+    )
+    parser.add_argument(
+        "--engine",
+        default="pool",
+        choices=("pool", "subprocess"),
+        help="'pool' converts all frames in one abaqus python call with a pool of workers, 'subprocess' spawns one abaqus python call per frame",
+    )
+    parser.add_argument(
+        "--workers",
+        default=None,
+        type=int,
+        help="number of frames converted in parallel, the number of cpus by default, 1 with --watch",
+    )
+    parser.add_argument(
+        "--workerMemory",
+        default=0,
+        type=float,
+        help="memory (GB) needed to convert one frame to limit the number of workers, if 0 it is estimated from the mesh size",
+    )
+    parser.add_argument(
+        "--resume",
+        default=0,
+        type=int,
+        help="if 1, skip the frames which are already converted (pool engine only)",
+    )
+    parser.add_argument(
+        "--watch",
+        default=0,
+        type=int,
+        help="if 1, keep converting the frames appended to the odb while the analysis is running, one frame at a time (pool engine only)",
+    )
+    parser.add_argument(
+        "--fields",
+        help="fieldOutputs to convert, glob patterns separated by whitespace",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--excludeFields",
+        help="fieldOutputs not to convert, glob patterns separated by whitespace",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--positions",
+        help="positions of the DataArrays to write, any of NODAL CENTROID INTEGRATION_POINT",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--integrationPoints",
+        default=1,
+        type=int,
+        help="if 0, skip the _IntegrationPoints DataArrays",
+    )
+    parser.add_argument(
+        "--partition",
+        default="none",
+        type=str,
+        help="'instance' or a number of cells to write a .pvtu per frame with one .vtu piece per instance or per chunk of cells",
+    )
+    parser.add_argument(
+        "--chunkMemory",
+        default=1.0,
+        type=float,
+        help="DataArrays bigger than this (GB) are read and written one instance at a time, 0 to read them at once",
+    )
+    parser.add_argument(
+        "--subsetCacheMemory",
+        default=None,
+        type=float,
+        help="memory (GB) of the fieldOutput subsets kept during a frame to read them once, 0 to disable, half of --chunkMemory by default",
+    )
+    parser.add_argument(
+        "--pieceThreads",
+        default=None,
+        type=int,
+        help="number of threads writing the pieces of a partitioned frame of every worker, the number of cpus divided by --workers by default",
+    )
+    parser.add_argument(
+        "--fieldThreads",
+        default=1,
+        type=int,
+        help="number of threads mapping and encoding the DataArrays of a frame while the odb is read, 1 converts one DataArray after the other",
+    )
+    parser.add_argument(
+        "--elementSets",
+        help="only write the elements of these element sets of the instances",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--nodeSets",
+        help="only write the elements whose nodes are all in these node sets of the instances",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--box",
+        help="only write the elements whose center is in the box xmin ymin zmin xmax ymax zmax",
+        nargs=6,
+        type=float,
+    )
+    parser.add_argument(
+        "--sphere",
+        help="only write the elements whose center is within radius of the point x y z radius",
+        nargs=4,
+        type=float,
+    )
+    parser.add_argument(
+        "--nodalAverage",
+        default="none",
+        choices=("none", "centroid", "elementNodal"),
+        help="write the integration point fields averaged to the nodes as _Nodal PointData, from the centroid or the ELEMENT_NODAL values of the elements around each node",
+    )
+    parser.add_argument(
+        "--derived",
+        help="quantities derived from the fieldOutputs as FIELD:QUANTITY, FIELD is a glob pattern and QUANTITY one of mises principal magnitude maxstress tsaihill tsaiwu, e.g. 'S:mises' 'U:magnitude'",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--strengths",
+        help="strengths Xt Xc Yt Yc S of the failure indices maxstress tsaihill tsaiwu, all positive",
+        nargs=5,
+        type=float,
+    )
+    parser.add_argument(
+        "--localCS",
+        default="axis1",
+        choices=("axis1", "frame", "quaternion"),
+        help="material orientation written as the local axis 1 vector, the local frame tensor or the quaternion",
+    )
+    parser.add_argument(
+        "--cacheLocalCS",
+        default=0,
+        type=int,
+        help="if 1, read the material orientation once per worker and reuse it for every frame",
+    )
+    parser.add_argument(
+        "--timing",
+        default="none",
+        choices=("none", "summary", "jsonl"),
+        help="time the phases of every frame, print a summary table of all workers or keep the JSON lines file",
+    )
+    parser.add_argument(
+        "--profile",
+        default=0,
+        type=int,
+        help="if 1, dump the cProfile stats of every frame to <step>_<frame>.prof",
+    )
+    parser.add_argument(
+        "--index",
+        default=1,
+        type=int,
+        help="if 1, cache the metadata of the odb in <odb name>.index.json and reuse it while the odb is unchanged",
+    )
 
     args = parser.parse_args()
 
@@ -78,8 +281,10 @@ if __name__ == "__main__":
         sys.exit("{0} doesn't exist".format(args.odbFile))
     # if --header is on, ignore all others and extract header information
     if args.header:
-        cmd = "abaqus python {0}/odb2vtk.py --header 1 --odbFile {1}".format(
-            script_dir, args.odbFile
+        cmd = (
+            "abaqus python {0}/odb2vtk.py --header 1 --odbFile {1} --index {2}".format(
+                script_dir, args.odbFile, args.index
+            )
         )
         spawn(cmd)
         sys.exit()
@@ -88,45 +293,169 @@ if __name__ == "__main__":
     if not args.step:
         sys.exit("Step not provided.")
 
+    # the manifest is written by one process, the subprocess engine can't resume
+    if args.engine == "subprocess" and (args.resume or args.watch):
+        sys.exit("--resume and --watch need the pool engine")
+    # the frames appended to the odb are converted one at a time
+    if args.watch:
+        if args.workers is not None and args.workers > 1:
+            sys.exit(
+                "--watch converts the frames one at a time, it can't be used with --workers"
+            )
+        args.workers = 1
+    elif args.workers is None:
+        args.workers = multiprocessing.cpu_count()
+    # the workers share the cpus, the same default as odb2vtk.py --workers
+    threads = max(1, multiprocessing.cpu_count() // args.workers)
+    for option in ("compressionThreads", "pieceThreads"):
+        if getattr(args, option) is None:
+            setattr(args, option, threads)
+    # the processes of the subprocess engine would overwrite the manifest and the odb index
+    # of each other, the frames aren't recorded and the metadata is read from the odb
+    if args.engine == "subprocess":
+        args.index = 0
+
     # split the frames and run them in parallel
     step_frame_dict = []
     steps = ""
     for item in args.step:
         steps += '"{0}" '.format(item)
         split = item.split(":")
+        if split[1] == "all":
+            # expanded by odb2vtk.py which reads the odb
+            if args.engine == "subprocess":
+                sys.exit("'all' frames need the pool engine")
+            continue
         for i in split[1].split(","):
             step_frame_dict.append("{0}:{1}".format(split[0], int(i)))
     instances = ""
     for inst in args.instance:
         instances += '"{0}"'.format(inst) + " "
-
-    cmd = []
-    for step in step_frame_dict:
-        if args.suffix == "":
-            cmd.append(
-                'abaqus python {0}/odb2vtk.py --header 0 --odbFile {1} --instance {2} --step "{3}"'.format(
-                    script_dir, args.odbFile, instances, step
-                )
+    options = "--format {0} --asciiPrecision {1} --resume {2} --watch {3}".format(
+        args.format, args.asciiPrecision, args.resume, args.watch
+    )
+    if args.suffix != "":
+        options += " --suffix {0}".format(args.suffix)
+    options += " --integrationPoints {0}".format(args.integrationPoints)
+    options += " --partition {0} --fieldThreads {1}".format(
+        args.partition, args.fieldThreads
+    )
+    options += " --chunkMemory {0}".format(args.chunkMemory)
+    if args.subsetCacheMemory is not None:
+        options += " --subsetCacheMemory {0}".format(args.subsetCacheMemory)
+    options += " --localCS {0} --cacheLocalCS {1}".format(
+        args.localCS, args.cacheLocalCS
+    )
+    options += " --nodalAverage {0}".format(args.nodalAverage)
+    for option in ("box", "sphere"):
+        if getattr(args, option) is not None:
+            options += " --{0} {1}".format(
+                option, " ".join(str(v) for v in getattr(args, option))
             )
+    if args.strengths is not None:
+        options += " --strengths {0}".format(
+            " ".join(str(strength) for strength in args.strengths)
+        )
+    # the workers of both engines append their frame timings to one JSON lines file
+    timingFile = None
+    if args.timing != "none":
+        exportDir = os.path.join(
+            os.path.dirname(os.path.abspath(args.odbFile)),
+            os.path.basename(args.odbFile).split(".")[0] + args.suffix,
+        )
+        if not os.path.exists(exportDir):
+            os.mkdir(exportDir)
+        timingFile = os.path.join(
+            exportDir, os.path.basename(exportDir) + ".timing.jsonl"
+        )
+        if os.path.exists(timingFile):
+            os.remove(timingFile)
+        options += ' --timing jsonl --timingFile "{0}"'.format(timingFile)
+    options += " --profile {0} --index {1}".format(args.profile, args.index)
+    if args.engine == "subprocess":
+        options += " --manifest 0"
+    options += " --compress {0} --compressionLevel {1} --compressionThreads {2}".format(
+        args.compress,
+        args.compressionLevel,
+        args.compressionThreads,
+    )
+    options += " --pieceThreads {0}".format(args.pieceThreads)
+    # the options without default here are only forwarded when they are set,
+    # odb2vtk.py applies its own default otherwise
+    for option in ("compressionBlockSize", "hdfChunkRows"):
+        if getattr(args, option) is not None:
+            options += " --{0} {1}".format(option, getattr(args, option))
+
+    def Report():
+        # one report of the frames converted by every worker
+        if timingFile is None or not os.path.exists(timingFile):
+            return
+        if args.timing == "summary":
+            print(profiler.Summary(profiler.ReadJSONLines(timingFile)))
         else:
-            cmd.append(
-                'abaqus python {0}/odb2vtk.py --header 0 --odbFile {1} --instance {2} --step "{3}" --suffix {4}'.format(
-                    script_dir, args.odbFile, instances, step, args.suffix
-                )
+            print("frame timings written to {0}".format(timingFile))
+
+    for option in (
+        "fields",
+        "excludeFields",
+        "positions",
+        "derived",
+        "elementSets",
+        "nodeSets",
+    ):
+        if getattr(args, option):
+            options += " --{0} {1}".format(
+                option, " ".join('"{0}"'.format(v) for v in getattr(args, option))
             )
-    # append one mroe command to generate PVD file
-    if args.suffix == "":
+
+    # a single process writes the .vtkhdf file
+    if args.output == "vtkhdf":
+        cmd = "abaqus python {0}/odb2vtk.py --header 0 --odbFile {1} --instance {2} --step {3} {4} --output vtkhdf".format(
+            script_dir, args.odbFile, instances, steps, options
+        )
+        returnCode = spawn(cmd)
+        Report()
+        sys.exit(returnCode)
+
+    if args.engine == "pool":
+        cmd = "abaqus python {0}/odb2vtk.py --header 0 --odbFile {1} --instance {2} --step {3} {4} --workers {5} --workerMemory {6}".format(
+            script_dir,
+            args.odbFile,
+            instances,
+            steps,
+            options,
+            args.workers,
+            args.workerMemory,
+        )
+        returnCode = spawn(cmd)
+        Report()
+        sys.exit(returnCode)
+
+    cmd = []
+    for step in step_frame_dict:
         cmd.append(
-            "abaqus python {0}/odb2vtk.py --header 0 --odbFile {1} --instance {2} --step {3} --writePVD 1".format(
-                script_dir, args.odbFile, instances, steps
+            'abaqus python {0}/odb2vtk.py --header 0 --odbFile {1} --instance {2} --step "{3}" {4}'.format(
+                script_dir, args.odbFile, instances, step, options
             )
         )
-    else:
-        cmd.append(
-            "abaqus python {0}/odb2vtk.py --header 0 --odbFile {1} --instance {2} --step {3} --writePVD 1 --suffix {4}".format(
-                script_dir, args.odbFile, instances, steps, args.suffix
+    pool = multiprocessing.Pool(processes=max(1, min(args.workers, len(cmd))))
+    returnCodes = pool.map(spawn, cmd)
+    pool.close()
+    pool.join()
+    Report()
+    failed = [step for step, code in zip(step_frame_dict, returnCodes) if code != 0]
+    if len(failed) != 0:
+        sys.exit(
+            "{0} of {1} frames failed, pvd file not written: {2}".format(
+                len(failed), len(cmd), " ".join(failed)
             )
         )
-    count = multiprocessing.cpu_count()
-    pool = multiprocessing.Pool(processes=count)
-    pool.map(spawn, cmd)
+
+    # generate the PVD file once all frames are converted
+    sys.exit(
+        spawn(
+            "abaqus python {0}/odb2vtk.py --header 0 --odbFile {1} --instance {2} --step {3} --writePVD 1 {4}".format(
+                script_dir, args.odbFile, instances, steps, options
+            )
+        )
+    )
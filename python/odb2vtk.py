@@ -31,6 +31,17 @@
 # ODB2VTK class to access the data inside odb file and write it into vtu
 
 import utilities
+import celltypes
+import derived
+import vtkxml
+import manifest
+import history
+import odbindex
+import partition
+import profiler
+import subsetcache
+import vtkhdf
+from labelmap import LabelMap
 
 # import necessary modules to handle Abaqus output database, files and string
 import numpy as np
@@ -42,6 +53,11 @@ import sys
 import json
 import argparse
 import timeit
+import fnmatch
+import multiprocessing
+import collections
+from multiprocessing.pool import ThreadPool
+from xml.etree import ElementTree
 
 # abaqus position
 from abaqusConstants import NODAL, INTEGRATION_POINT, ELEMENT_NODAL, CENTROID
@@ -60,47 +76,56 @@ from abaqusConstants import (
 
 MATERIAL_ORIENTATION = "Material_Orientation"
 
+# how the material orientation is written
+# axis1 - the direction of the local axis 1 as a vector
+# frame - the local axes 1, 2, 3 as the rows of a 3x3 tensor
+# quaternion - the localCoordSystem quaternion (q1, q2, q3, q4), q4 is the scalar term
+LOCAL_CS_OUTPUTS = ("axis1", "frame", "quaternion")
+
+# positions of the DataArrays which can be selected
+# NODAL - PointData of nodal fields, e.g., U
+# CENTROID - CellData of integration point fields at the centroid, e.g., S_Centroid
+# INTEGRATION_POINT - CellData of all integration points, e.g., S_IntegrationPoints
+DATA_POSITIONS = ("NODAL", "CENTROID", "INTEGRATION_POINT")
+
+# values of the integration point fields averaged to the nodes, e.g., S_Nodal
+# none - no nodal average
+# centroid - mean of the centroid values of the elements around the node
+# elementNodal - mean of the ELEMENT_NODAL values extrapolated to the node by every element
+NODAL_AVERAGE_SOURCES = ("none", "centroid", "elementNodal")
+
+# DataArrays of the .vtu files bigger than this (bytes) are read one instance at a time
+CHUNK_MEMORY = 1024**3
+
+
+def QuaternionToDirectionCosines(quaternions):
+    # convert the (n, 4) localCoordSystem quaternions to (n, 3, 3) direction cosines,
+    # row i is the local axis i + 1
+    # note that localCoordSystem is a quaternion with the scalar term last
+    # see http://130.149.89.49:2080/v6.14/books/ker/default.htm?startat=pt02ch61pyo05.html
+    # https://www.vectornav.com/resources/inertial-navigation-primer/math-fundamentals/math-attitudetran
+    q1 = quaternions[:, 0]
+    q2 = quaternions[:, 1]
+    q3 = quaternions[:, 2]
+    q4 = quaternions[:, 3]
+    cosines = np.empty((len(quaternions), 3, 3))
+    cosines[:, 0, 0] = q4**2 + q1**2 - q2**2 - q3**2
+    cosines[:, 0, 1] = 2 * (q1 * q2 - q3 * q4)
+    cosines[:, 0, 2] = 2 * (q1 * q3 + q2 * q4)
+    cosines[:, 1, 0] = 2 * (q1 * q2 + q3 * q4)
+    cosines[:, 1, 1] = q4**2 - q1**2 + q2**2 - q3**2
+    cosines[:, 1, 2] = 2 * (q2 * q3 - q1 * q4)
+    cosines[:, 2, 0] = 2 * (q1 * q3 - q2 * q4)
+    cosines[:, 2, 1] = 2 * (q2 * q3 + q1 * q4)
+    cosines[:, 2, 2] = q4**2 - q1**2 - q2**2 + q3**2
+    return cosines
+
 
 def ABAQUS_VTK_CELL_MAP(abaqusElementType):
-    # this function maps the abaqus element type to vtk cell type
-    # linear cell
-    # https://raw.githubusercontent.com/Kitware/vtk-examples/gh-pages/src/Testing/Baseline/Cxx/GeometricObjects/TestLinearCellDemo.png
-    # quadratic cell
-    # https://raw.githubusercontent.com/Kitware/vtk-examples/gh-pages/src/Testing/Baseline/Cxx/GeometricObjects/TestIsoparametricCellsDemo.png
-
-    if "C3D4" in abaqusElementType:
-        return 10
-    elif "C3D6" in abaqusElementType:
-        return 13
-    elif "C3D8" in abaqusElementType:
-        return 12
-    elif "C3D10" in abaqusElementType:
-        return 24
-    elif "C3D15" in abaqusElementType:
-        return 26
-    elif "C3D20" in abaqusElementType:
-        return 25
-    elif "S3" in abaqusElementType:
-        return 5
-    elif "S4" in abaqusElementType:
-        return 9
-    elif "S8" in abaqusElementType:
-        return 23
-    elif "S9" in abaqusElementType:
-        return 28
-    elif "B31" in abaqusElementType:
-        return 3
-    elif "R3D3" in abaqusElementType:
-        return 5
-    elif "R3D4" in abaqusElementType:
-        return 9
-    elif "CAX3" in abaqusElementType:
-        return 5
-    elif "RNODE3D" in abaqusElementType:
-        return 1
-    elif "M3D6" in abaqusElementType:
-        return 22
-    else:
+    # this function maps the abaqus element type to vtk cell type, see celltypes.py
+    try:
+        return celltypes.AbaqusVTKCellType(abaqusElementType)[0]
+    except KeyError:
         sys.exit("{0} element type not found".format(abaqusElementType))
         return None
 
@@ -151,28 +176,92 @@ class ODB2VTK:
 
         self.odb = utilities.ReadableOdb(self.fileFullName)
         # private variables
-        # nodes and elements map are nested dictionary
-        # {'instanceName': {'nodeLabel1': 0, 'nodeLabel1': 0, ...}, .....}
+        # nodes and elements map are dictionary of LabelMap
+        # {'instanceName': LabelMap(labels), .....}
+        # LabelMap.Lookup(labels) returns the vtk indices of an array of labels
         self._nodes_map = {}
         self._elements_map = {}
         self._instance_names = []
         self._step_frame_map = {}
         self._nodesNum = 0
         self._cellsNum = 0
+        self._data_format = "ascii"
+        self._ascii_precision = None
+        self._compressor = None
+        # 'vtu' or 'vtkhdf', see SetOutput
+        self._output = "vtu"
+        self._hdf_chunk_rows = vtkhdf.CHUNK_ROWS
+        # mesh is identical across frames, cache it once in ConstructMap
+        # points, connectivity (global node index), offsets and vtk cell types
+        self._points = None
+        self._connectivity = None
+        self._offsets = None
+        self._cell_types = None
+        # (cell, node) of every connectivity entry, see GetNodeIncidence
+        self._node_incidence = None
+        # [(pointStart, pointEnd, cellStart, cellEnd), ...] of every instance
+        self._instance_ranges = []
+        # the mesh split into partition.MeshPiece, see GetPieces
+        self._pieces = None
+        self._partition = None
+        self._piece_threads = 1
+        # DataArrays mapped and encoded at once by a thread pool, see SetFieldThreads
+        self._field_threads = 1
+        self._field_pool = None
+        # DataArrays bigger than this (bytes) are read one instance at a time, see SetChunkMemory
+        self._chunk_memory = CHUNK_MEMORY
+        # bulkDataBlocks read during the frame, see GetBulkDataBlocks
+        self._subset_cache = subsetcache.SubsetCache(
+            subsetcache.DefaultMaxBytes(CHUNK_MEMORY)
+        )
+        # converted frames are recorded in the manifest, see manifest.py
+        self._manifest = None
+        self._record_manifest = True
+        self._resume = False
+        # field selection, see SetFieldSelection
+        self._fields = []
+        self._exclude_fields = []
+        self._positions = list(DATA_POSITIONS)
+        # quantities derived from the fieldOutputs, see SetDerived
+        self._derived_specs = []
+        self._derived = []
+        self._strengths = None
+        # elements written, None for every element of the instances, see SetRegion
+        self._region = None
+        self._region_sets_found = set()
+        # source of the nodal average, see SetNodalAverage
+        self._nodal_average = "none"
+        # probe nodes and elements, see SetProbes
+        self._probe_nodes = []
+        self._probe_elements = []
+        # material orientation output, see SetLocalCS
+        self._local_cs = "axis1"
+        self._cache_local_cs = False
+        self._local_cs_quaternions = None
+        # phase timing of the frames, see profiler.py
+        self._profiler = profiler.Profiler()
+        self._frame_profile = profiler.NULL_FRAME_PROFILE
+        self._frame_timing = None
+        # format of the historyOutputs table, see history.py
+        self._history_format = "csv"
+        # cached metadata of the odb, see odbindex.py
+        self._index = None
+        self._use_index = True
 
     def ExtractHeader(self):
         dictJson = {"instances": [], "steps": []}
+        index = self.ScanHeader()
 
         print("Scan instances...")
-        for instanceName in self.odb.getInstancesKeys:
+        for instanceName, nodesNum, elementsNum in index.instances:
             dictJson["instances"].append(instanceName)
 
         print("Scan steps and frames...")
-        for stepName in self.odb.getStepsKeys:
+        for stepName, frameValues in index.steps:
             step_frame_map = []
             step_frame_map.append(stepName)
             frames = []
-            frameNum = len(self.odb.getFrames(stepName))
+            frameNum = len(frameValues)
             for i in range(frameNum):
                 frames.append(
                     stepName + "-frame-{0}".format(str(i).zfill(len(str(frameNum))))
@@ -186,100 +275,708 @@ class ODB2VTK:
         ) as fp:
             json.dump(dictJson, fp, indent=4)
 
+    def SetHistoryFormat(self, historyFormat):
+        if historyFormat not in history.HISTORY_FORMATS:
+            raise ValueError(
+                "{0} is not a valid history format, use one of {1}".format(
+                    historyFormat, history.HISTORY_FORMATS
+                )
+            )
+        self._history_format = historyFormat
+
+    def SetIndex(self, enabled):
+        # if False, every metadata is read from the odb and no index file is written
+        self._use_index = bool(enabled)
+        self._index = None
+
+    def GetIndexFileName(self):
+        # next to the odb, shared by every suffix
+        return os.path.join(
+            self.odbPath, self.odbFileName.split(".")[0] + ".index.json"
+        )
+
+    def GetIndex(self):
+        if self._index is None:
+            self._index = odbindex.OdbIndex(
+                self.GetIndexFileName(), manifest.OdbSignature(self.fileFullName)
+            )
+        return self._index
+
+    def SaveIndex(self):
+        if self._use_index and self._index is not None:
+            self._index.Save()
+
+    def ScanHeader(self):
+        # instances, steps and frame values of the odb, only scanned once per odb
+        index = self.GetIndex()
+        if self._use_index and index.HasHeader():
+            return index
+        instances = []
+        for instanceName in self.odb.getInstancesKeys:
+            instances.append(
+                [
+                    instanceName,
+                    len(self.odb.getNodes(instanceName)),
+                    len(self.odb.getElements(instanceName)),
+                ]
+            )
+        steps = []
+        for stepName in self.odb.getStepsKeys:
+            steps.append(
+                [
+                    stepName,
+                    [frame.frameValue for frame in self.odb.getFrames(stepName)],
+                ]
+            )
+        index.SetHeader(instances, steps)
+        return index
+
+    def GetFrameValue(self, stepName, frameIdx):
+        if self._use_index:
+            frameValue = self.GetIndex().GetFrameValue(stepName, frameIdx)
+            if frameValue is not None:
+                return frameValue
+        return self.odb.getFrame(stepName, frameIdx).frameValue
+
+    def GetInstanceSize(self, instanceName):
+        # (number of nodes, number of elements) of the instance
+        if self._use_index:
+            size = self.ScanHeader().GetInstanceSize(instanceName)
+            if size is not None:
+                return size
+        return (
+            len(self.odb.getNodes(instanceName)),
+            len(self.odb.getElements(instanceName)),
+        )
+
+    def GetIndexFrame(self, stepName, frameIdx):
+        # metadata of the frame to merge into the index of another process
+        if not self._use_index:
+            return None
+        return self.GetIndex().GetFrame(stepName, frameIdx)
+
+    def SetIndexFrame(self, stepName, frameIdx, frame):
+        if self._use_index:
+            self.GetIndex().SetFrame(stepName, frameIdx, frame)
+
+    def GetFieldOutputsKeys(self, stepName, frameIdx):
+        if not self._use_index:
+            return self.odb.getFieldOutputsKeys(stepName, frameIdx)
+        index = self.GetIndex()
+        fldNames = index.GetFieldOutputsKeys(stepName, frameIdx)
+        if fldNames is None:
+            fldNames = list(self.odb.getFieldOutputsKeys(stepName, frameIdx))
+            index.SetFieldOutputsKeys(stepName, frameIdx, fldNames)
+        return fldNames
+
     # instanceNames = ['names', 'names']
     # stepFrameDict = {'stepname': [0, 1, 2, 3], 'stepname': [0,1,2]}
     def ReadArgs(self, instanceNames, stepsFramesDict):
         self._instance_names = instanceNames
         self._step_frame_map = stepsFramesDict
 
+    # dataFormat = 'ascii', 'binary' or 'appended'
+    def SetDataFormat(self, dataFormat):
+        if dataFormat not in vtkxml.DATA_FORMATS:
+            sys.exit(
+                "{0} format not supported, use one of {1}".format(
+                    dataFormat, vtkxml.DATA_FORMATS
+                )
+            )
+        self._data_format = dataFormat
+
+    # asciiPrecision = significant digits of the ascii floats, None for the shortest
+    # representation which reads back the same value
+    def SetAsciiPrecision(self, asciiPrecision):
+        if asciiPrecision is not None and asciiPrecision <= 0:
+            sys.exit("ascii precision must be a positive number of digits")
+        self._ascii_precision = asciiPrecision
+
+    # compress = None, 'zlib' or 'lz4', compression of the binary and appended DataArrays
+    # level = compression level, -1 for the default of the compressor
+    # blockSize = uncompressed size of the compressed blocks
+    # threads = number of threads compressing the blocks
+    def SetCompression(self, compress, level=-1, blockSize=None, threads=1):
+        if compress is None:
+            self._compressor = None
+            return
+        if self._output == "vtkhdf":
+            # hdf5 compresses the datasets itself, see vtkhdf.py
+            if compress != "zlib":
+                sys.exit("the vtkhdf output only supports zlib compression")
+        elif self._data_format == "ascii":
+            sys.exit("compression needs the binary or appended format")
+        try:
+            self._compressor = vtkxml.Compressor(
+                compress,
+                level,
+                blockSize or vtkxml.COMPRESSION_BLOCK_SIZE,
+                max(1, threads),
+            )
+        except ValueError as e:
+            sys.exit(str(e))
+
+    # output = 'vtu' for a .vtu file per frame or 'vtkhdf' for a single .vtkhdf file
+    # hdfChunkRows = rows of the chunks of the .vtkhdf datasets
+    def SetOutput(self, output="vtu", hdfChunkRows=None):
+        if output not in ("vtu", "vtkhdf"):
+            sys.exit("{0} output not supported, use vtu or vtkhdf".format(output))
+        self._output = output
+        self._hdf_chunk_rows = hdfChunkRows or vtkhdf.CHUNK_ROWS
+
+    def NewEncoder(self):
+        # empty encoder with the output options
+        return vtkxml.DataArrayEncoder(
+            self._data_format,
+            asciiPrecision=self._ascii_precision,
+            compressor=self._compressor,
+        )
+
+    # partition = None to write one .vtu per frame,
+    # 'instance' or the number of cells per piece to write a .pvtu per frame
+    # pieceThreads = number of threads writing the pieces of a frame
+    def SetPartition(self, partition, pieceThreads=1):
+        if partition is not None and partition != "instance":
+            try:
+                partition = int(partition)
+            except ValueError:
+                partition = 0
+            if partition <= 0:
+                sys.exit("partition must be 'instance' or a number of cells")
+        self._partition = partition
+        self._piece_threads = max(1, pieceThreads)
+        self._pieces = None
+
+    def SetFieldThreads(self, fieldThreads):
+        # number of threads mapping and encoding the DataArrays of a frame, the odb is
+        # still read by a single thread. 1 converts one DataArray after the other
+        self._field_threads = max(1, fieldThreads)
+
+    def GetFieldPool(self):
+        # created on first use so that a converter forked by workerpool.py has its own threads
+        if self._field_pool is None:
+            self._field_pool = ThreadPool(self._field_threads)
+        return self._field_pool
+
+    def SetChunkMemory(self, chunkMemory):
+        # DataArrays of the .vtu files bigger than chunkMemory bytes are read and written
+        # one instance at a time, 0 reads every DataArray at once
+        self._chunk_memory = chunkMemory
+
+    def SetSubsetCache(self, maxBytes=None):
+        # memory of the bulkDataBlocks kept during a frame, 0 reads every subset from the odb
+        # None - a fraction of the chunk memory, call SetChunkMemory first
+        if maxBytes is None:
+            maxBytes = subsetcache.DefaultMaxBytes(self._chunk_memory)
+        if maxBytes > 0:
+            self._subset_cache = subsetcache.SubsetCache(maxBytes)
+        else:
+            self._subset_cache = None
+
+    # if resume, frames which are already converted with the same odb and options are skipped
+    def SetResume(self, resume):
+        self._resume = resume
+
+    # if False, the converted frames aren't recorded in the manifest, e.g. when several
+    # processes convert frames of the same export and would overwrite each other's manifest
+    def SetManifest(self, enabled):
+        self._record_manifest = bool(enabled)
+
+    # fields, excludeFields = glob patterns of fieldOutput names, e.g. ['U', 'S*']
+    # an empty fields selects all fieldOutputs
+    # positions = subset of DATA_POSITIONS
+    def SetFieldSelection(self, fields=None, excludeFields=None, positions=None):
+        self._fields = list(fields or [])
+        self._exclude_fields = list(excludeFields or [])
+        if positions is None:
+            positions = DATA_POSITIONS
+        for position in positions:
+            if position not in DATA_POSITIONS:
+                sys.exit(
+                    "{0} position not supported, use one of {1}".format(
+                        position, DATA_POSITIONS
+                    )
+                )
+        self._positions = list(positions)
+
+    def IsFieldSelected(self, fldName):
+        if len(self._fields) != 0 and not any(
+            fnmatch.fnmatchcase(fldName, pattern) for pattern in self._fields
+        ):
+            return False
+        return not any(
+            fnmatch.fnmatchcase(fldName, pattern) for pattern in self._exclude_fields
+        )
+
+    # specs = ['FIELD:QUANTITY', ...] e.g. ['S:mises', 'U:magnitude'], see derived.py
+    # strengths = (Xt, Xc, Yt, Yc, S) of the failure indices
+    def SetDerived(self, specs=None, strengths=None):
+        try:
+            self._derived = derived.ParseDerived(specs or [])
+        except ValueError as e:
+            sys.exit(str(e))
+        if strengths is not None:
+            strengths = [float(strength) for strength in strengths]
+            if len(strengths) != 5 or min(strengths) <= 0.0:
+                sys.exit("strengths must be the 5 positive values Xt Xc Yt Yc S")
+        elif any(
+            quantity in derived.FAILURE_INDICES for pattern, quantity in self._derived
+        ):
+            sys.exit("the failure indices need the strengths Xt Xc Yt Yc S")
+        self._derived_specs = list(specs or [])
+        self._strengths = strengths
+
+    # the elements written are restricted to the elements
+    # in the elementSets, with all their nodes in the nodeSets (set names of the instances),
+    # with their center in the box (xmin, ymin, zmin, xmax, ymax, zmax)
+    # and within the sphere (x, y, z, radius). None selects every element
+    def SetRegion(self, elementSets=None, nodeSets=None, box=None, sphere=None):
+        if box is not None and len(box) != 6:
+            sys.exit("box must be xmin ymin zmin xmax ymax zmax")
+        if sphere is not None and (len(sphere) != 4 or sphere[3] < 0.0):
+            sys.exit("sphere must be x y z radius")
+        self._region = None
+        if elementSets or nodeSets or box is not None or sphere is not None:
+            self._region = {
+                "elementSets": list(elementSets or []),
+                "nodeSets": list(nodeSets or []),
+                "box": None if box is None else [float(v) for v in box],
+                "sphere": None if sphere is None else [float(v) for v in sphere],
+            }
+
+    # nodes, elements = labels or set names of the selected instances, prefixed with
+    # 'INSTANCE.' for a single instance, e.g. ['12', 'BOLT', 'PART-1-1.7'], see WriteProbes
+    def SetProbes(self, nodes=None, elements=None):
+        self._probe_nodes = list(nodes or [])
+        self._probe_elements = list(elements or [])
+
+    def HasProbes(self):
+        return len(self._probe_nodes) != 0 or len(self._probe_elements) != 0
+
+    # source = one of NODAL_AVERAGE_SOURCES
+    def SetNodalAverage(self, source="none"):
+        if source not in NODAL_AVERAGE_SOURCES:
+            sys.exit(
+                "{0} nodal average not supported, use one of {1}".format(
+                    source, NODAL_AVERAGE_SOURCES
+                )
+            )
+        self._nodal_average = source
+
+    # output = one of LOCAL_CS_OUTPUTS
+    # if cache, the orientation is read from the first frame converted and reused
+    # for the other frames, the orientation of most models doesn't change over time
+    def SetLocalCS(self, output="axis1", cache=False):
+        if output not in LOCAL_CS_OUTPUTS:
+            sys.exit(
+                "{0} local CS output not supported, use one of {1}".format(
+                    output, LOCAL_CS_OUTPUTS
+                )
+            )
+        self._local_cs = output
+        self._cache_local_cs = cache
+        self._local_cs_quaternions = None
+
+    # timing = 'none', 'summary' or 'jsonl', see profiler.Profiler
+    def SetTiming(self, timing="none", timingFile=None, cprofile=False):
+        self._profiler = profiler.Profiler(timing, timingFile, cprofile)
+
+    def GetProfiler(self):
+        return self._profiler
+
+    def PopFrameTiming(self):
+        # timing record of the last frame written, None if the timing is disabled
+        timing = self._frame_timing
+        self._frame_timing = None
+        return timing
+
+    def GetWriterOptions(self):
+        # every option which changes the content of the .vtu files
+        return {
+            "format": self._data_format,
+            "asciiPrecision": self._ascii_precision,
+            "compressor": (
+                None if self._compressor is None else list(self._compressor.Settings())
+            ),
+            "fields": self._fields,
+            "excludeFields": self._exclude_fields,
+            "positions": self._positions,
+            "derived": self._derived_specs,
+            "strengths": self._strengths,
+            "nodalAverage": self._nodal_average,
+            "region": self._region,
+            "partition": self._partition,
+            "localCS": self._local_cs,
+        }
+
+    # stepFrameDict = {'stepname': [0, 1, 2, 3], 'stepname': None}
+    def ExpandStepFrames(self, stepsFramesDict):
+        # None stands for all the frames of the step that are in the odb
+        expanded = {}
+        for stepName, frameList in stepsFramesDict.items():
+            if frameList is None:
+                frameList = []
+                if stepName in self.odb.getStepsKeys:
+                    frameList = list(range(len(self.odb.getFrames(stepName))))
+            expanded[stepName] = frameList
+        return expanded
+
     def ConstructMap(self):
-        # self._nodes_map = {{node.label: index}, {}}
+        # self._nodes_map = {instanceName: LabelMap, ...}
         self._nodes_map.clear()
         self._elements_map.clear()
         self._nodesNum = 0
         self._cellsNum = 0
-        indexNode = 0
-        indexElement = 0
-        for i, instanceName in enumerate(self._instance_names):
-            self._nodes_map[instanceName] = {}
-            self._elements_map[instanceName] = {}
+        self._instance_ranges = []
+        self._pieces = None
+        self._node_incidence = None
+        self._local_cs_quaternions = None
+        self._region_sets_found = set()
+        points = []
+        connectivity = []
+        offsets = []
+        cellTypes = []
+        offset = 0
+        # the element types are resolved once per distinct type, see celltypes.py
+        # {abaqusElementType: index in elementTypes}
+        typeIds = {}
+        elementTypes = []
+        for instanceName in self._instance_names:
             nodes = self.odb.getNodes(instanceName)
             elements = self.odb.getElements(instanceName)
-            self._nodesNum += len(nodes)
-            self._cellsNum += len(elements)
-            for i in range(len(nodes)):
-                self._nodes_map[instanceName][nodes[i].label] = indexNode
-                indexNode += 1
-            for i in range(len(elements)):
-                self._elements_map[instanceName][elements[i].label] = indexElement
-                indexElement += 1
-
-    def WriteFieldOutputData(
+            nodeLabels = []
+            nodeCoordinates = []
+            for node in nodes:
+                nodeLabels.append(node.label)
+                nodeCoordinates.append(node.coordinates)
+            nodeLabels = np.array(nodeLabels, dtype=np.int64)
+            nodeCoordinates = np.array(nodeCoordinates).reshape(-1, 3)
+            elementLabels = []
+            connectivityLabels = []
+            cellSizes = []
+            cellTypeIds = []
+            for cell in elements:
+                elementLabels.append(cell.label)
+                ## connectivity
+                connectivityLabels += cell.connectivity
+                cellSizes.append(len(cell.connectivity))
+                ## type
+                typeId = typeIds.get(cell.type)
+                if typeId is None:
+                    try:
+                        elementTypes.append(celltypes.AbaqusVTKCellType(cell.type))
+                    except KeyError:
+                        sys.exit("{0} element type not found".format(cell.type))
+                    typeId = typeIds[cell.type] = len(elementTypes) - 1
+                cellTypeIds.append(typeId)
+            elementLabels = np.array(elementLabels, dtype=np.int64)
+            connectivityLabels = np.array(connectivityLabels, dtype=np.int64)
+            cellSizes = np.array(cellSizes, dtype=np.int64)
+            cellTypeIds = np.array(cellTypeIds, dtype=np.int64)
+            if self._region is not None:
+                # only the elements in the region and their nodes are written,
+                # the nodes are renumbered
+                selected = self.SelectRegion(
+                    instanceName,
+                    elementLabels,
+                    connectivityLabels,
+                    cellSizes,
+                    nodeLabels,
+                    nodeCoordinates,
+                )
+                connectivityLabels = connectivityLabels[np.repeat(selected, cellSizes)]
+                elementLabels = elementLabels[selected]
+                cellSizes = cellSizes[selected]
+                cellTypeIds = cellTypeIds[selected]
+                usedNodes = np.isin(nodeLabels, connectivityLabels)
+                nodeLabels = nodeLabels[usedNodes]
+                nodeCoordinates = nodeCoordinates[usedNodes]
+            points.append(nodeCoordinates)
+            self._nodes_map[instanceName] = LabelMap(nodeLabels, self._nodesNum)
+            self._elements_map[instanceName] = LabelMap(elementLabels, self._cellsNum)
+            ## offset
+            offsets.append(offset + np.cumsum(cellSizes))
+            offset += int(cellSizes.sum())
+            cellTypes.append(
+                np.array(
+                    [vtkType for vtkType, nodeOrder in elementTypes], dtype=np.int64
+                )[cellTypeIds]
+            )
+            # quadratic lines and C3D27 have a different node order in vtk
+            connectivityLabels = celltypes.ReorderCellNodes(
+                connectivityLabels,
+                cellSizes,
+                cellTypeIds,
+                elementTypes,
+            )
+            connectivity.append(
+                self._nodes_map[instanceName].Lookup(connectivityLabels)
+            )
+            self._instance_ranges.append(
+                (
+                    self._nodesNum,
+                    self._nodesNum + len(nodeLabels),
+                    self._cellsNum,
+                    self._cellsNum + len(elementLabels),
+                )
+            )
+            self._nodesNum += len(nodeLabels)
+            self._cellsNum += len(elementLabels)
+        if self._region is not None:
+            missing = [
+                name
+                for kind in ("elementSets", "nodeSets")
+                for name in self._region[kind]
+                if (kind, name) not in self._region_sets_found
+            ]
+            if len(missing) != 0:
+                sys.exit(
+                    "{0} not found in the instances {1}".format(
+                        missing, self._instance_names
+                    )
+                )
+        self._points = np.concatenate(points or [np.zeros((0, 3))])
+        self._connectivity = np.concatenate(connectivity or [np.zeros(0, np.int64)])
+        self._offsets = np.concatenate(offsets or [np.zeros(0, np.int64)])
+        self._cell_types = np.concatenate(cellTypes or [np.zeros(0, np.int64)])
+
+    def SelectRegion(
+        self,
+        instanceName,
+        elementLabels,
+        connectivityLabels,
+        cellSizes,
+        nodeLabels,
+        nodeCoordinates,
+    ):
+        # mask of the elements of the instance in the region, see SetRegion
+        region = self._region
+        selected = np.ones(len(elementLabels), dtype=bool)
+        if len(elementLabels) == 0:
+            return selected
+        instance = self.odb.getInstance(instanceName)
+        starts = np.concatenate(([0], np.cumsum(cellSizes)[:-1]))
+        if len(region["elementSets"]) != 0:
+            labels = self.GetSetLabels(
+                instance.elementSets, "elementSets", region["elementSets"]
+            )
+            selected &= np.isin(elementLabels, labels)
+        if len(region["nodeSets"]) != 0:
+            labels = self.GetSetLabels(
+                instance.nodeSets, "nodeSets", region["nodeSets"]
+            )
+            # every node of the element is in the node sets
+            selected &= np.logical_and.reduceat(
+                np.isin(connectivityLabels, labels), starts
+            )
+        if region["box"] is not None or region["sphere"] is not None:
+            # the center of the element is the mean of its nodes
+            nodeIndices = LabelMap(nodeLabels).Lookup(connectivityLabels)
+            centers = (
+                np.add.reduceat(nodeCoordinates[nodeIndices].astype(np.float64), starts)
+                / cellSizes[:, np.newaxis]
+            )
+            if region["box"] is not None:
+                lower = np.array(region["box"][:3])
+                upper = np.array(region["box"][3:])
+                selected &= np.all((centers >= lower) & (centers <= upper), axis=1)
+            if region["sphere"] is not None:
+                center = np.array(region["sphere"][:3])
+                selected &= (
+                    np.linalg.norm(centers - center, axis=1) <= region["sphere"][3]
+                )
+        return selected
+
+    def GetSetLabels(self, sets, kind, names):
+        # labels of the members of the sets of the instance, the sets which aren't in
+        # the instance are skipped
+        labels = []
+        for name in names:
+            if name not in sets.keys():
+                continue
+            self._region_sets_found.add((kind, name))
+            members = sets[name].elements if kind == "elementSets" else sets[name].nodes
+            labels += [member.label for member in members]
+        return np.array(labels, dtype=np.int64)
+
+    def FindLabels(self, labelMap, labels):
+        # (vtk indices, rows of the labels in the mesh), without region every label is
+        # in the mesh. the values outside the region are dropped
+        if self._region is None:
+            return labelMap.Lookup(labels), slice(None)
+        indices, found = labelMap.Find(labels)
+        return indices[found], found
+
+    def GetNodeIncidence(self):
+        # the element -> node incidence of the mesh as (cell index, node index) of every
+        # connectivity entry, built once and used by the nodal average of every field
+        if self._node_incidence is None:
+            cellSizes = np.diff(np.concatenate(([0], self._offsets)))
+            self._node_incidence = (
+                np.repeat(np.arange(self._cellsNum), cellSizes),
+                self._connectivity,
+            )
+        return self._node_incidence
+
+    def GetPieces(self):
+        # the mesh split according to the partition, a single piece without partition
+        if self._pieces is None:
+            self._pieces = partition.SplitMesh(
+                self._points,
+                self._connectivity,
+                self._offsets,
+                self._cell_types,
+                self._instance_ranges,
+                self._partition,
+            )
+        return self._pieces
+
+    def PlanFieldOutputData(
         self, fldName, stepName, frameIdx, pointdata_map, celldata_map
     ):
+        # find out which DataArrays the fieldOutput generates without converting its values,
+        # so that the <PointData>/<CellData> headers can be written before any DataArray.
+        # returns the DataArrays to write as (reader, args, vtkType, attributes)
+        # for PointData and CellData, reader(*args) returns the values
         fldOutput = self.odb.getFieldOutput(stepName, frameIdx, fldName)
         vtkData = ABAQUS_VTK_FIELDOUPUTS_MAP(fldOutput)
-        bufferPointDataArray = []
-        bufferCellDataArray = []
+        pointDataArrays = []
+        cellDataArrays = []
+        writeNodal = vtkData[2] == NODAL and "NODAL" in self._positions
+        writeCentroid = (
+            vtkData[2] == INTEGRATION_POINT and "CENTROID" in self._positions
+        )
+        writeIntegrationPoints = (
+            vtkData[2] == INTEGRATION_POINT and "INTEGRATION_POINT" in self._positions
+        )
+        writeNodalAverage = (
+            vtkData[2] == INTEGRATION_POINT and self._nodal_average != "none"
+        )
+        if not (
+            writeNodal or writeCentroid or writeIntegrationPoints or writeNodalAverage
+        ):
+            return (pointDataArrays, cellDataArrays)
         # if fieldOutput contains sectionPoint data, we need to generate separate dataset
-        sectionPointMap = {}
-        maxNumOfIntegrationPoint = 1
-        for instanceName in self._instance_names:
-            # get data block of the instance
-            subset = fldOutput.getSubset(region=self.odb.getInstance(instanceName))
-            # filter by position
-            # note that subset.bulkDataBlocks may have more than one
-            # because of different element type or sectionPoint in the same instance
-            subset = subset.getSubset(position=vtkData[2])
-            # we are checking the bulkDataBlocks here
-            # We need to write vtu data according to what is included in bulkDataBlocks
-            # we are assuming that element in one instance should be consistent in terms of sectionPoint
-            # i.e., they either all have sectionPoint, or don't have sectionPoint
-            for block in subset.bulkDataBlocks:
-                if block.sectionPoint is not None:
-                    sectionPointMap[block.sectionPoint.description] = block.sectionPoint
-                if block.integrationPoints is not None:
-                    if maxNumOfIntegrationPoint < block.integrationPoints.max():
-                        maxNumOfIntegrationPoint = block.integrationPoints.max()
-
-        if vtkData[2] == NODAL:
-            self.WriteDataArrayWithSectionPoints(
+        sectionPointMap, maxNumOfIntegrationPoint = self.ScanSectionPoints(
+            fldOutput, vtkData, fldName, stepName, frameIdx
+        )
+
+        if writeNodal:
+            self.PlanDataArrayWithSectionPoints(
                 sectionPointMap,
                 fldOutput,
                 vtkData,
                 fldName,
                 pointdata_map,
                 "PointData",
-                buffer=bufferPointDataArray,
+                dataArrays=pointDataArrays,
             )
-        if vtkData[2] == INTEGRATION_POINT:
+        if writeCentroid:
             # visualize the data based on the value at the centroid from Abaqus
             vtkDataNew = (vtkData[0], vtkData[1], CENTROID)
-            self.WriteDataArrayWithSectionPoints(
+            self.PlanDataArrayWithSectionPoints(
                 sectionPointMap,
                 fldOutput,
                 vtkDataNew,
                 fldName + "_Centroid",
                 celldata_map,
                 "CellData",
-                buffer=bufferCellDataArray,
+                dataArrays=cellDataArrays,
             )
+        if writeIntegrationPoints:
             # we also want to store the values for each integration point
             vtkDataNew = (vtkData[0], vtkData[1] * maxNumOfIntegrationPoint, vtkData[2])
-            self.WriteDataArrayWithSectionPoints(
+            self.PlanDataArrayWithSectionPoints(
                 sectionPointMap,
                 fldOutput,
                 vtkDataNew,
                 fldName + "_IntegrationPoints",
                 celldata_map,
                 "CellData",
-                buffer=bufferCellDataArray,
+                dataArrays=cellDataArrays,
+            )
+        if writeNodalAverage:
+            # smooth PointData from the elements around each node
+            position = CENTROID
+            if self._nodal_average == "elementNodal":
+                position = ELEMENT_NODAL
+            vtkDataNew = (vtkData[0], vtkData[1], position)
+            self.PlanDataArrayWithSectionPoints(
+                sectionPointMap,
+                fldOutput,
+                vtkDataNew,
+                fldName + "_Nodal",
+                pointdata_map,
+                "NodalAverage",
+                dataArrays=pointDataArrays,
             )
         # if vtkData[2] == CENTROID:
-        # 	bufferCellDataArray += self.WriteDataArrayWithSectionPoints(sectionPointMap, fldOutput, vtkData, fldName, celldata_map, "CellData")
-        return (bufferPointDataArray, bufferCellDataArray)
+        # 	cellDataArrays += self.PlanDataArrayWithSectionPoints(sectionPointMap, fldOutput, vtkData, fldName, celldata_map, "CellData")
+        return (pointDataArrays, cellDataArrays)
+
+    def ScanSectionPoints(self, fldOutput, vtkData, fldName, stepName, frameIdx):
+        # returns ({description: sectionPoint}, max number of integration points) of the
+        # selected instances, the bulkDataBlocks are only scanned for the instances which
+        # aren't in the index yet
+        index = self.GetIndex() if self._use_index else None
+        field = None
+        if index is not None:
+            field = index.GetField(stepName, frameIdx, fldName)
+        if field is None or field["position"] != str(vtkData[2]):
+            field = {
+                "type": str(fldOutput.type),
+                "position": str(vtkData[2]),
+                "componentLabels": list(fldOutput.componentLabels),
+                "instances": {},
+            }
+        # the index only keeps the descriptions, the sectionPoint is looked up in the fieldOutput
+        sectionPoints = dict(
+            (sectionPoint.description, sectionPoint)
+            for sectionPoint in fldOutput.locations[0].sectionPoints
+        )
+        sectionPointMap = {}
+        maxNumOfIntegrationPoint = 1
+        scanned = False
+        for instanceName in self._instance_names:
+            cached = field["instances"].get(instanceName)
+            if cached is not None and all(
+                description in sectionPoints for description in cached[0]
+            ):
+                descriptions, numOfIntegrationPoint = cached
+                for description in descriptions:
+                    sectionPointMap[description] = sectionPoints[description]
+            else:
+                descriptions = []
+                numOfIntegrationPoint = 1
+                # get data blocks of the instance filtered by position
+                # note that bulkDataBlocks may have more than one
+                # because of different element type or sectionPoint in the same instance
+                # we are checking the bulkDataBlocks here
+                # We need to write vtu data according to what is included in bulkDataBlocks
+                # we are assuming that element in one instance should be consistent in terms of sectionPoint
+                # i.e., they either all have sectionPoint, or don't have sectionPoint
+                for block in self.GetBulkDataBlocks(
+                    fldOutput, instanceName, vtkData[2]
+                ):
+                    if block.sectionPoint is not None:
+                        description = block.sectionPoint.description
+                        sectionPointMap[description] = block.sectionPoint
+                        if description not in descriptions:
+                            descriptions.append(description)
+                    if block.integrationPoints is not None:
+                        numOfIntegrationPoint = max(
+                            numOfIntegrationPoint, int(block.integrationPoints.max())
+                        )
+                field["instances"][instanceName] = [descriptions, numOfIntegrationPoint]
+                scanned = True
+            maxNumOfIntegrationPoint = max(
+                maxNumOfIntegrationPoint, numOfIntegrationPoint
+            )
+        if index is not None and scanned:
+            index.SetField(stepName, frameIdx, fldName, field)
+        return sectionPointMap, maxNumOfIntegrationPoint
 
-    def WriteDataArrayWithSectionPoints(
+    def PlanDataArrayWithSectionPoints(
         self,
         sectionPointMap,
         fldOutput,
@@ -287,290 +984,972 @@ class ODB2VTK:
         fldName,
         data_map,
         dataType,
-        buffer=None,
+        dataArrays=None,
     ):
-        if buffer is None:
-            buffer = []
+        if dataArrays is None:
+            dataArrays = []
         if len(sectionPointMap) == 0:
             # meaning we don't have any sectionPoint in the current fieldOutput
             # generate one dataset
-            buffer += self.WriteDataArray(fldOutput, vtkData, fldName, dataType)
-            data_map[vtkData[0]].append(fldName)
+            self.PlanDataArray(
+                fldOutput, vtkData, fldName, "", None, data_map, dataType, dataArrays
+            )
         else:
             # meaning we have sectionPoint in the current fieldOutput
             # we need to split the data
             for description, sectionP in sectionPointMap.items():
-                subset = fldOutput.getSubset(sectionPoint=sectionP)
-                buffer += self.WriteDataArray(
-                    subset, vtkData, fldName + description, dataType
+                self.PlanDataArray(
+                    fldOutput,
+                    vtkData,
+                    fldName,
+                    description,
+                    sectionP,
+                    data_map,
+                    dataType,
+                    dataArrays,
                 )
-                data_map[vtkData[0]].append(fldName + description)
-        return buffer
+        return dataArrays
 
-    def WriteDataArray(self, fldOutput, vtkData, description, dataType, buffer=None):
-        if buffer is None:
-            buffer = []
+    def PlanDataArray(
+        self,
+        fldOutput,
+        vtkData,
+        fldName,
+        description,
+        sectionPoint,
+        data_map,
+        dataType,
+        dataArrays,
+    ):
+        # the DataArray of the fieldOutput followed by the quantities derived from it,
+        # which share its values so that they are read and mapped once
+        quantities = derived.SelectQuantities(
+            self._derived, fldOutput.name, vtkData[0], fldOutput.componentLabels
+        )
+        shared = None
+        if len(quantities) != 0:
+            shared = derived.SharedValues(1 + len(quantities))
+        dataArrays.append(
+            (
+                self.ReadDataArray,
+                (fldOutput, vtkData, dataType, sectionPoint, shared),
+                "Float32",
+                self.DataArrayAttributes(fldName + description, vtkData),
+            )
+        )
+        data_map[vtkData[0]].append(fldName + description)
+        for quantity in quantities:
+            # e.g. 8 integration points of the _IntegrationPoints DataArray
+            numOfPoints = len(vtkData[1]) // len(fldOutput.componentLabels)
+            sourceType, vtkType, suffix, labels = derived.DERIVED_QUANTITIES[quantity]
+            name = "{0}_{1}{2}".format(fldName, suffix, description)
+            dataArrays.append(
+                (
+                    self.ReadDerivedDataArray,
+                    (quantity, fldOutput, vtkData, dataType, sectionPoint, shared),
+                    "Float32",
+                    self.DataArrayAttributes(
+                        name, (vtkType, labels * numOfPoints, vtkData[2])
+                    ),
+                )
+            )
+            data_map[vtkType].append(name)
+
+    def DataArrayAttributes(self, description, vtkData):
         # use the same componentLabel from Abaqus
-        header = (
-            [
-                '<DataArray type="Float32" Name="{0}" NumberOfComponents="{1}"'.format(
-                    description, len(vtkData[1])
+        return [
+            ("Name", description),
+            ("NumberOfComponents", len(vtkData[1])),
+        ] + [
+            ("ComponentName{0}".format(i), label)
+            for (i, label) in enumerate(vtkData[1])
+        ]
+
+    def DataArrayShape(self, vtkData, dataType):
+        size = 0
+        if dataType in ("PointData", "NodalAverage"):
+            size = self._nodesNum
+        elif dataType == "CellData":
+            size = self._cellsNum
+        return (size, len(vtkData[1]))
+
+    def IsChunked(self, shape):
+        # Float32 like the DataArray, e.g. 27 integration points x 6 components of a C3D20
+        # stress are 648 bytes per cell
+        return (
+            self._chunk_memory > 0
+            and self._output == "vtu"
+            and self._partition is None
+            and shape[0] * shape[1] * 4 > self._chunk_memory
+        )
+
+    def ReadDataArray(
+        self, fldOutput, vtkData, dataType, sectionPoint=None, shared=None
+    ):
+        values = self.FetchDataArray(
+            self.ReadDataArray, (fldOutput, vtkData, dataType, sectionPoint, shared)
+        )
+        if values is None:
+            # only one instance is held in memory, it is encoded before the next one is read
+            return vtkxml.ChunkedArray(
+                self.DataArrayShape(vtkData, dataType),
+                lambda: self.ReadDataArrayChunks(
+                    fldOutput, vtkData, dataType, sectionPoint
+                ),
+            )
+        with self._frame_profile.Phase("map"):
+            return values()
+
+    def ReadDerivedDataArray(
+        self, quantity, fldOutput, vtkData, dataType, sectionPoint=None, shared=None
+    ):
+        # a quantity derived from the DataArray of the fieldOutput, see derived.py
+        values = self.FetchDataArray(
+            self.ReadDerivedDataArray,
+            (quantity, fldOutput, vtkData, dataType, sectionPoint, shared),
+        )
+        if values is None:
+            # derived from one instance of the ChunkedArray at a time
+            shape = self.DataArrayShape(vtkData, dataType)
+            numOfPoints = shape[1] // len(fldOutput.componentLabels)
+            labels = derived.DERIVED_QUANTITIES[quantity][3]
+            return vtkxml.ChunkedArray(
+                (shape[0], numOfPoints * len(labels)),
+                lambda: (
+                    derived.Compute(
+                        quantity, chunk, fldOutput.componentLabels, self._strengths
+                    )
+                    for chunk in self.ReadDataArrayChunks(
+                        fldOutput, vtkData, dataType, sectionPoint
+                    )
+                ),
+            )
+        with self._frame_profile.Phase("map"):
+            return values()
+
+    def FetchDataArray(self, reader, args):
+        # the odb reads of a planned DataArray, returns a function computing its values
+        # without touching the odb, or None for a ChunkedArray, see WriteDataArrays
+        if reader == self.ReadDerivedDataArray:
+            quantity, fldOutput = args[:2]
+            values = self.FetchDataArray(self.ReadDataArray, args[1:])
+            if values is None:
+                return None
+            return lambda: derived.Compute(
+                quantity, values(), fldOutput.componentLabels, self._strengths
+            )
+        if reader != self.ReadDataArray:
+            values = reader(*args)
+            return lambda: values
+        fldOutput, vtkData, dataType = args[:3]
+        sectionPoint = args[3] if len(args) > 3 else None
+        shared = args[4] if len(args) > 4 else None
+        shape = self.DataArrayShape(vtkData, dataType)
+        # the nodal average needs every element around the node, it is never chunked
+        if dataType != "NodalAverage" and self.IsChunked(shape):
+            return None
+        writer = None
+        if dataType == "PointData":
+            writer = self.WriteSortedPointData
+        elif dataType == "CellData":
+            writer = self.WriteSortedCellData
+
+        def Fetch():
+            instanceBlocks = [
+                (
+                    instanceName,
+                    self.GetBulkDataBlocks(
+                        fldOutput,
+                        instanceName,
+                        vtkData[2],
+                        sectionPoint,
+                        self.InstanceDataBytes(instanceName, dataType, shape),
+                    ),
                 )
+                for instanceName in self._instance_names
             ]
-            + [
-                'ComponentName{0}="{1}"'.format(i, label)
-                for (i, label) in enumerate(vtkData[1])
-            ]
-            + ['format="ascii">\n']
-        )
-        buffer.append(" ".join(header))
 
+            def MapDataArray():
+                if dataType == "NodalAverage":
+                    return self.AverageToNodes(instanceBlocks, vtkData[2], shape)
+                dataArray = np.zeros(shape, dtype=np.float32)
+                for instanceName, bulkDataBlocks in instanceBlocks:
+                    writer(bulkDataBlocks, instanceName, dataArray)
+                return dataArray
+
+            return MapDataArray
+
+        if shared is None:
+            return Fetch()
+        # the derived quantities reuse the blocks and the values of the DataArray
+        values = shared.Fetch(Fetch)
+        return lambda: shared.Get(values)
+
+    def InstanceDataBytes(self, instanceName, dataType, shape):
+        # Float32 bytes of the rows of the instance in a DataArray of the shape,
+        # the estimated size of the blocks of one section point
+        pointStart, pointEnd, cellStart, cellEnd = self._instance_ranges[
+            self._instance_names.index(instanceName)
+        ]
+        if dataType == "PointData":
+            return (pointEnd - pointStart) * shape[1] * 4
+        if dataType == "NodalAverage":
+            # the element nodal values, one row per node of every cell
+            offsets = np.concatenate(([0], self._offsets))
+            return int(offsets[cellEnd] - offsets[cellStart]) * shape[1] * 4
+        return (cellEnd - cellStart) * shape[1] * 4
+
+    def ReadDataArrayChunks(self, fldOutput, vtkData, dataType, sectionPoint=None):
+        # yields the rows of the DataArray of one instance after the other
+        for instanceName, (pointStart, pointEnd, cellStart, cellEnd) in zip(
+            self._instance_names, self._instance_ranges
+        ):
+            if dataType == "PointData":
+                start, end = pointStart, pointEnd
+            else:
+                start, end = cellStart, cellEnd
+            dataArray = np.zeros((end - start, len(vtkData[1])), dtype=np.float32)
+            self.ReadInstanceData(
+                fldOutput,
+                vtkData,
+                dataType,
+                sectionPoint,
+                instanceName,
+                dataArray,
+                start,
+            )
+            yield dataArray
+
+    def ReadInstanceData(
+        self,
+        fldOutput,
+        vtkData,
+        dataType,
+        sectionPoint,
+        instanceName,
+        dataArray,
+        start=0,
+    ):
+        # fill the rows of the instance, dataArray holds the rows from start on
         writer = None
-        size = 0
         if dataType == "PointData":
             writer = self.WriteSortedPointData
-            size = self._nodesNum
         elif dataType == "CellData":
             writer = self.WriteSortedCellData
-            size = self._cellsNum
-        dataArray = np.zeros((size, len(vtkData[1])))
-        for instanceName in self._instance_names:
-            subset = fldOutput.getSubset(region=self.odb.getInstance(instanceName))
-            subset = subset.getSubset(position=vtkData[2])
-            writer(subset.bulkDataBlocks, instanceName, dataArray)
-        # can we make this faster???
-        for data in dataArray:
-            buffer.append("".join(("{0} ".format(d) for d in data)))
-            buffer.append("\n")
-        buffer.append("</DataArray>\n")
-        return buffer
-
-    def WriteSortedPointData(self, bulkDataBlocks, instanceName, pointDataArray):
+        # a chunked DataArray doesn't fit in the cache, its section points are read alone
+        bulkDataBlocks = self.GetBulkDataBlocks(
+            fldOutput, instanceName, vtkData[2], sectionPoint
+        )
+        with self._frame_profile.Phase("map"):
+            writer(bulkDataBlocks, instanceName, dataArray, start)
+
+    def GetBulkDataBlocks(
+        self,
+        fldOutput,
+        instanceName,
+        position,
+        sectionPoint=None,
+        sectionPointBytes=None,
+    ):
+        # bulkDataBlocks of the fieldOutput in the instance at the position,
+        # only the blocks of sectionPoint if it isn't None.
+        # with the subset cache the blocks of every section point are read once per frame
+        # and split by section point, see subsetcache.py
+        # sectionPointBytes - estimated size of the blocks of sectionPoint, the blocks of every
+        # section point are only read at once if all of them fit in the cache. None reads
+        # the blocks of sectionPoint alone, e.g. for a chunked DataArray
+        cache = self._subset_cache
+        key = (fldOutput.name, instanceName, str(position), None)
+        bulkDataBlocks = None
+        if cache is not None:
+            bulkDataBlocks = cache.Get(key)
+            if (
+                bulkDataBlocks is None
+                and sectionPoint is not None
+                and (
+                    sectionPointBytes is None
+                    or not cache.Fits(
+                        sectionPointBytes * len(fldOutput.locations[0].sectionPoints)
+                    )
+                )
+            ):
+                cache.bypasses += 1
+                cache = None
+        if cache is None:
+            with self._frame_profile.Phase("read"):
+                subset = fldOutput.getSubset(region=self.odb.getInstance(instanceName))
+                subset = subset.getSubset(position=position)
+                if sectionPoint is not None:
+                    subset = subset.getSubset(sectionPoint=sectionPoint)
+                return subset.bulkDataBlocks
+        if bulkDataBlocks is None:
+            cache.misses += 1
+            with self._frame_profile.Phase("read"):
+                subset = fldOutput.getSubset(region=self.odb.getInstance(instanceName))
+                subset = subset.getSubset(position=position)
+                bulkDataBlocks = list(subset.bulkDataBlocks)
+            cache.Put(key, bulkDataBlocks)
+        else:
+            cache.hits += 1
+        if sectionPoint is None:
+            return bulkDataBlocks
+        return [
+            block
+            for block in bulkDataBlocks
+            if block.sectionPoint is not None
+            and block.sectionPoint.description == sectionPoint.description
+        ]
+
+    def AverageToNodes(self, instanceBlocks, position, shape):
+        # mean of the values of the elements around every node, the elements without
+        # values (e.g. other section points) don't count. nodes without any are zero
+        nodeIndices = []
+        values = []
+        if position == CENTROID:
+            cellValues = np.zeros((self._cellsNum, shape[1]), dtype=np.float32)
+            hasValues = np.zeros(self._cellsNum, dtype=bool)
+            for instanceName, bulkDataBlocks in instanceBlocks:
+                for block in bulkDataBlocks:
+                    indices, rows = self.FindLabels(
+                        self._elements_map[instanceName], block.elementLabels
+                    )
+                    data = np.asarray(block.data)
+                    cellValues[indices] = data.reshape(len(data), -1)[rows]
+                    hasValues[indices] = True
+            incidenceCells, incidenceNodes = self.GetNodeIncidence()
+            mask = hasValues[incidenceCells]
+            nodeIndices.append(incidenceNodes[mask])
+            values.append(cellValues[incidenceCells[mask]])
+        else:
+            # one value per element and node
+            for instanceName, bulkDataBlocks in instanceBlocks:
+                for block in bulkDataBlocks:
+                    indices, rows = self.FindLabels(
+                        self._nodes_map[instanceName], block.nodeLabels
+                    )
+                    data = np.asarray(block.data)
+                    data = data.reshape(len(data), -1)[rows]
+                    if self._region is not None:
+                        # the same as the centroid values, the elements outside the
+                        # region don't count at the nodes on its boundary
+                        _, inRegion = self._elements_map[instanceName].Find(
+                            np.asarray(block.elementLabels)[rows]
+                        )
+                        indices = indices[inRegion]
+                        data = data[inRegion]
+                    nodeIndices.append(indices)
+                    values.append(data)
+        dataArray = np.zeros(shape, dtype=np.float32)
+        if len(nodeIndices) == 0:
+            return dataArray
+        nodeIndices = np.concatenate(nodeIndices)
+        values = np.concatenate(values)
+        counts = np.bincount(nodeIndices, minlength=shape[0])
+        counts = np.maximum(counts, 1)
+        for component in range(shape[1]):
+            dataArray[:, component] = (
+                np.bincount(
+                    nodeIndices, weights=values[:, component], minlength=shape[0]
+                )
+                / counts
+            )
+        return dataArray
+
+    def WriteSortedPointData(
+        self, bulkDataBlocks, instanceName, pointDataArray, start=0
+    ):
         if bulkDataBlocks is None:
             return
         for block in bulkDataBlocks:
-            indices = [
-                self._nodes_map[instanceName][label] for label in block.nodeLabels
-            ]
-            pointDataArray[indices] = block.data
+            indices, rows = self.FindLabels(
+                self._nodes_map[instanceName], block.nodeLabels
+            )
+            pointDataArray[indices - start] = block.data[rows]
 
-    def WriteSortedCellData(self, bulkDataBlocks, instanceName, cellDataArray):
+    def WriteSortedCellData(self, bulkDataBlocks, instanceName, cellDataArray, start=0):
         if bulkDataBlocks is None:
             return
         for block in bulkDataBlocks:
             if block.integrationPoints is not None:
                 # note that different block may have different number of integration points.
                 # unfilled entries are assumed to be zero
-                indices = [
-                    self._elements_map[instanceName][label]
-                    for label in np.unique(block.elementLabels)
-                ]
                 row, column = map(int, block.data.shape)
                 n = block.integrationPoints.max()
-                cellDataArray[indices, 0 : column * n] = block.data.reshape(
-                    row // n, column * n
+                # every element holds n consecutive rows, one per integration point
+                indices, rows = self.FindLabels(
+                    self._elements_map[instanceName],
+                    np.asarray(block.elementLabels)[::n],
                 )
+                cellDataArray[indices - start, 0 : column * n] = block.data.reshape(
+                    row // n, column * n
+                )[rows]
             else:
-                indices = [
-                    self._elements_map[instanceName][label]
-                    for label in block.elementLabels
-                ]
-                cellDataArray[indices] = block.data
-
-    def WriteLocalCS(self, fldName, stepName, frameIdx, celldata_map, buffer=None):
-        # this function is to extract material orientation and write it as a vector data at cell.
-        if buffer is None:
-            buffer = []
-
-        fldOutput = None
-        try:
-            fldOutput = self.odb.getFieldOutput(stepName, frameIdx, "S")
-        except Exception as e:
-            return buffer
-
-        buffer.append(
-            '<DataArray type="Float32" Name="{0}" NumberOfComponents="3" format="ascii">\n'.format(
-                fldName
+                indices, rows = self.FindLabels(
+                    self._elements_map[instanceName], block.elementLabels
+                )
+                cellDataArray[indices - start] = block.data[rows]
+
+    def PlanLocalCS(self, fldName, stepName, frameIdx, celldata_map):
+        # material orientation is read from the stress output, skip it if there is no "S"
+        if "S" not in self.GetFieldOutputsKeys(stepName, frameIdx):
+            return []
+        if self._local_cs == "frame":
+            celldata_map["Tensors"].append(fldName)
+            numberOfComponents = 9
+        elif self._local_cs == "quaternion":
+            celldata_map["Scalars"].append(fldName)
+            numberOfComponents = 4
+        else:
+            celldata_map["Vectors"].append(fldName)
+            numberOfComponents = 3
+        return [
+            (
+                self.ReadLocalCS,
+                (stepName, frameIdx),
+                "Float32",
+                [("Name", fldName), ("NumberOfComponents", numberOfComponents)],
             )
-        )
+        ]
+
+    def ReadLocalCS(self, stepName, frameIdx):
+        # this function is to extract material orientation as cell data.
+        quaternions = self._local_cs_quaternions
+        if quaternions is None:
+            with self._frame_profile.Phase("read"):
+                quaternions = self.ReadLocalCSQuaternions(stepName, frameIdx)
+            if self._cache_local_cs:
+                self._local_cs_quaternions = quaternions
+        if self._local_cs == "quaternion":
+            return quaternions
+        with self._frame_profile.Phase("map"):
+            cosines = QuaternionToDirectionCosines(quaternions)
+        if self._local_cs == "frame":
+            return cosines.reshape(-1, 9)
+        # x y z is the orientation of 11
+        return cosines[:, 0, :]
+
+    def ReadLocalCSQuaternions(self, stepName, frameIdx):
+        # localCoordSystem of the first section point at the centroid of every cell
+        fldOutput = self.odb.getFieldOutput(stepName, frameIdx, "S")
+
         tempSectionPoint = None
-        for instanceName in self._instance_names:
-            subset = fldOutput.getSubset(region=self.odb.getInstance(instanceName))
-            subset = subset.getSubset(position=CENTROID)
-            for block in subset.bulkDataBlocks:
-                tempSectionPoint = block.sectionPoint
-                break
+        for block in self.GetBulkDataBlocks(
+            fldOutput, self._instance_names[0], CENTROID
+        ):
+            tempSectionPoint = block.sectionPoint
             break
 
-        cellDataArray = np.zeros((self._cellsNum, 4))
+        quaternions = np.zeros((self._cellsNum, 4))
         for instanceName in self._instance_names:
-            subset = fldOutput.getSubset(region=self.odb.getInstance(instanceName))
-            subset = subset.getSubset(position=CENTROID)
-            if tempSectionPoint is not None:
-                subset = subset.getSubset(sectionPoint=tempSectionPoint)
-
-            for block in subset.bulkDataBlocks:
+            for block in self.GetBulkDataBlocks(
+                fldOutput, instanceName, CENTROID, tempSectionPoint
+            ):
                 if block.localCoordSystem is not None:
-                    indices = [
-                        self._elements_map[instanceName][label]
-                        for label in block.elementLabels
-                    ]
-                    cellDataArray[indices, : len(block.localCoordSystem[0])] = (
-                        block.localCoordSystem
+                    indices, rows = self.FindLabels(
+                        self._elements_map[instanceName], block.elementLabels
                     )
+                    quaternions[indices, : len(block.localCoordSystem[0])] = np.asarray(
+                        block.localCoordSystem
+                    )[rows]
+        return quaternions
 
-        for data in cellDataArray:
-            # note that localCoordSystem return here is quaternion
-            # see http://130.149.89.49:2080/v6.14/books/ker/default.htm?startat=pt02ch61pyo05.html
-            q1 = data[0]
-            q2 = data[1]
-            q3 = data[2]
-            q4 = data[3]  # scalar term
-            # convert quaternion to directional cosine
-            # x y z is the orientation of 11
-            # https://www.vectornav.com/resources/inertial-navigation-primer/math-fundamentals/math-attitudetran
-            x = q4**2 + q1**2 - q2**2 - q3**2
-            y = 2 * (q1 * q2 - q3 * q4)
-            z = 2 * (q1 * q3 + q2 * q4)
-            buffer.append("{0} {1} {2}\n".format(x, y, z))
-
-        buffer.append("</DataArray>\n")
-        celldata_map["Vectors"].append(fldName)
-        return buffer
-
-    def WriteVTUFiles(self):
+    def GetManifest(self):
+        if self._manifest is None:
+            self._manifest = manifest.FrameManifest(
+                self.GetExportFileName(self.odbFileNameNoExt + ".manifest") + ".json"
+            )
+        return self._manifest
+
+    def GetFrameFileName(self, stepName, frameIdx):
+        # name of the file of a frame in the export directory, .pvtu if the mesh is partitioned
+        if self._partition is None:
+            return stepName + "_" + str(frameIdx) + ".vtu"
+        return stepName + "_" + str(frameIdx) + ".pvtu"
+
+    def GetVTUFileName(self, stepName, frameIdx):
+        return self.GetExportFileName(self.GetFrameFileName(stepName, frameIdx))
+
+    def GetPieceFileNames(self, stepName, frameIdx):
+        # pieces of a partitioned frame are written in a directory named after the frame
+        frameName = stepName + "_" + str(frameIdx)
+        pieceDir = self.GetExportFileName(frameName)
+        if not os.path.exists(pieceDir):
+            os.mkdir(pieceDir)
+        return [
+            os.path.join(pieceDir, "{0}_{1}.vtu".format(frameName, i))
+            for i in range(len(self.GetPieces()))
+        ]
+
+    def IsAnalysisRunning(self):
+        # Abaqus keeps a .lck file next to the odb while the analysis writes to it
+        return os.path.exists(os.path.splitext(self.fileFullName)[0] + ".lck")
+
+    def GetPendingFrames(self, growingOdb=False, converted=()):
+        # [(stepName, frameIdx), ...] which need to be converted
+        # growingOdb - the analysis is still running, frames which don't exist yet are skipped
+        # converted - frames known to be up to date, skipped without checking the manifest
+        odbSignature = manifest.OdbSignature(self.fileFullName)
+        options = self.GetWriterOptions()
+        pending = []
         for stepName, frameList in self._step_frame_map.items():
             for frameIdx in frameList:
-                self.WriteVTUFile([stepName, frameIdx])
+                if (stepName, frameIdx) in converted:
+                    continue
+                if growingOdb and (
+                    stepName not in self.odb.getStepsKeys
+                    or frameIdx >= len(self.odb.getFrames(stepName))
+                ):
+                    continue
+                if self._resume and self.GetManifest().IsComplete(
+                    self.GetVTUFileName(stepName, frameIdx),
+                    odbSignature,
+                    self._instance_names,
+                    options,
+                    growingOdb=growingOdb,
+                ):
+                    print("{0}_{1} is up to date, skipped".format(stepName, frameIdx))
+                    continue
+                pending.append((stepName, frameIdx))
+        return pending
+
+    def ReadPieceFileNames(self, fileName):
+        # the pieces referenced by a .pvtu, the parent of the workers has no mesh to
+        # count them
+        directory = os.path.dirname(fileName)
+        return [
+            os.path.join(directory, piece.get("Source"))
+            for piece in ElementTree.parse(fileName).getroot().iter("Piece")
+        ]
+
+    def RecordFrame(self, stepName, frameIdx, dataArrays):
+        if not self._record_manifest:
+            return
+        fileName = self.GetVTUFileName(stepName, frameIdx)
+        pieceFileNames = []
+        if self._partition is not None:
+            pieceFileNames = self.ReadPieceFileNames(fileName)
+        self.GetManifest().Record(
+            fileName,
+            manifest.OdbSignature(self.fileFullName),
+            self._instance_names,
+            self.GetWriterOptions(),
+            {
+                "frameValue": self.GetFrameValue(stepName, frameIdx),
+                "dataArrays": dataArrays,
+            },
+            pieceFileNames,
+        )
+
+    def WriteVTUFiles(self):
+        for stepName, frameIdx in self.GetPendingFrames():
+            dataArrays = self.WriteVTUFile([stepName, frameIdx])
+            self.RecordFrame(stepName, frameIdx, dataArrays)
+            self._profiler.Add(self.PopFrameTiming())
+
+    def WatchVTUFiles(self, stepsFramesDict, interval):
+        # convert the frames appended to the odb by a running analysis until it ends
+        # stepsFramesDict may use None for all the frames of a step
+        self.SetResume(True)
+        converted = set()
+        while True:
+            # check before scanning the frames so that the last frames aren't missed
+            running = self.IsAnalysisRunning()
+            self.ReadArgs(self._instance_names, self.ExpandStepFrames(stepsFramesDict))
+            pending = self.GetPendingFrames(growingOdb=True, converted=converted)
+            for stepName, frameIdx in pending:
+                dataArrays = self.WriteVTUFile([stepName, frameIdx])
+                self.RecordFrame(stepName, frameIdx, dataArrays)
+                self._profiler.Add(self.PopFrameTiming())
+            # every existing frame is now converted, don't check them again
+            for stepName, frameList in self._step_frame_map.items():
+                if stepName in self.odb.getStepsKeys:
+                    frameNum = len(self.odb.getFrames(stepName))
+                    converted.update(
+                        (stepName, frameIdx)
+                        for frameIdx in frameList
+                        if frameIdx < frameNum
+                    )
+            if len(pending) != 0:
+                self.WritePVDFile()
+            if not running:
+                break
+            print("waiting {0}s for new frames...".format(interval))
+            sleep(interval)
+            # frames written since the odb was opened are only visible after reopening it
+            self.odb.close()
+            self.odb = utilities.ReadableOdb(self.fileFullName)
+            # the odb has changed, save what is known and load the index of the new odb
+            self.SaveIndex()
+            self._index = None
 
     def WriteVTUFile(self, args):
-        stepName = args[0]
-        frameIdx = args[1]
+        return self.ProfileFrame(args[0], args[1], self.WriteFrame)
 
-        # start writing the buffer
-        buffer = []
-        buffer.append(
-            '<VTKFile type="UnstructuredGrid" version="1,0" byte_order="LittleEndian">\n'
-        )
-        cellConnectivityBuffer = []
-        cellOffsetBuffer = []
-        cellTypeBuffer = []
-        offset = 0
-        buffer.append("<UnstructuredGrid>\n")
-        buffer.append(
-            '<Piece NumberOfPoints="{0}" NumberOfCells="{1}">\n'.format(
-                self._nodesNum, self._cellsNum
-            )
-        )
-        buffer.append("<Points>\n")
-        buffer.append(
-            '<DataArray type="Float64" NumberOfComponents="3" format="ascii">\n'
-        )
-        for instanceName in self._instance_names:
-            # write nodes
-            for node in self.odb.getNodes(instanceName):
-                buffer.append("{0} {1} {2}\n".format(*node.coordinates))
-            # let's write cell connectivity, offset, and type into a different buffer which will be used later
-            for cell in self.odb.getElements(instanceName):
-                ## connectivity
-                cellConnectivityBuffer.append(
-                    "".join(
-                        (
-                            "{0} ".format(self._nodes_map[instanceName][nodeLabel])
-                            for nodeLabel in cell.connectivity
-                        )
-                    )
+    def ProfileFrame(self, stepName, frameIdx, write):
+        # call write(stepName, frameIdx) with the phase timing of the frame
+        frameProfile = self._profiler.StartFrame(stepName, frameIdx)
+        self._frame_profile = frameProfile
+        try:
+            dataArrays = write(stepName, frameIdx)
+        finally:
+            self._frame_profile = profiler.NULL_FRAME_PROFILE
+            # the subsets belong to the frame
+            if self._subset_cache is not None:
+                frameProfile.AddCounters(self._subset_cache.PopCounters())
+                self._subset_cache.Clear()
+        if self._profiler.enabled:
+            profileFile = None
+            if self._profiler.cprofile:
+                profileFile = self.GetExportFileName(
+                    stepName + "_" + str(frameIdx) + ".prof"
                 )
-                cellConnectivityBuffer.append("\n")
-                ## offset
-                offset += len(cell.connectivity)
-                cellOffsetBuffer.append("{0} \n".format(offset))
-                ## type
-                cellTypeBuffer.append("{0} \n".format(ABAQUS_VTK_CELL_MAP(cell.type)))
-        buffer.append("</DataArray>\n")
-        buffer.append("</Points>\n")
+            self._frame_timing = frameProfile.Finish(profileFile)
+        return dataArrays
 
-        # write field data
-        print("    writing field data")
+    def PlanFrame(self, stepName, frameIdx):
+        # plan the field data first since the <PointData>/<CellData> headers
+        # list every DataArray name before the DataArrays themselves
+        # returns (pointdata_map, celldata_map, pointDataArrays, cellDataArrays)
         pointdata_map = {"Tensors": [], "Vectors": [], "Scalars": []}
         celldata_map = {"Tensors": [], "Vectors": [], "Scalars": []}
-        bufferPointDataArray = []
-        bufferCellDataArray = []
-        for fldName, _ in self.odb.getFieldOutputs(stepName, frameIdx):
-            pBuffer, cBuffer = self.WriteFieldOutputData(
-                fldName, stepName, frameIdx, pointdata_map, celldata_map
+        pointDataArrays = []
+        cellDataArrays = []
+        with self._frame_profile.Phase("plan"):
+            for fldName in self.GetFieldOutputsKeys(stepName, frameIdx):
+                if not self.IsFieldSelected(fldName):
+                    continue
+                pDataArrays, cDataArrays = self.PlanFieldOutputData(
+                    fldName, stepName, frameIdx, pointdata_map, celldata_map
+                )
+                pointDataArrays += pDataArrays
+                cellDataArrays += cDataArrays
+
+            # add material local coordinate CS
+            if self.IsFieldSelected(MATERIAL_ORIENTATION):
+                cellDataArrays += self.PlanLocalCS(
+                    MATERIAL_ORIENTATION, stepName, frameIdx, celldata_map
+                )
+        return pointdata_map, celldata_map, pointDataArrays, cellDataArrays
+
+    def WriteFrame(self, stepName, frameIdx):
+        pointdata_map, celldata_map, pointDataArrays, cellDataArrays = self.PlanFrame(
+            stepName, frameIdx
+        )
+        fileName = self.GetVTUFileName(stepName, frameIdx)
+        print("writing {0}...".format(fileName))
+        if self._partition is None:
+            pieceFileNames = [fileName]
+        else:
+            pieceFileNames = self.GetPieceFileNames(stepName, frameIdx)
+        self.WriteVTUPieces(
+            pieceFileNames,
+            pointdata_map,
+            celldata_map,
+            pointDataArrays,
+            cellDataArrays,
+        )
+        if self._partition is not None:
+            self.WritePVTUFile(
+                fileName,
+                pieceFileNames,
+                pointdata_map,
+                celldata_map,
+                pointDataArrays,
+                cellDataArrays,
+            )
+        print("Complete.")
+        # names of the DataArrays written, recorded in the manifest
+        return [
+            name
+            for data_map in (pointdata_map, celldata_map)
+            for fldNames in data_map.values()
+            for name in fldNames
+        ]
+
+    def WriteVTKHDFFile(self):
+        # write every frame of _step_frame_map into a single .vtkhdf file,
+        # unchanged DataArrays are shared between the steps, see vtkhdf.py
+        fileName = self.GetExportFileName(self.odbFileNameNoExt + ".vtkhdf")
+        print("writing {0}...".format(fileName))
+        compression = None
+        compressionLevel = None
+        if self._compressor is not None:
+            # zlib is the gzip filter of hdf5
+            compression = "gzip"
+            if self._compressor.level >= 0:
+                compressionLevel = self._compressor.level
+        try:
+            writer = vtkhdf.VTKHDFWriter(
+                fileName,
+                self._points,
+                self._connectivity,
+                self._offsets,
+                self._cell_types,
+                compression,
+                compressionLevel,
+                self._hdf_chunk_rows,
+            )
+        except (ImportError, ValueError) as e:
+            sys.exit(str(e))
+        try:
+            for stepName, frameList in self._step_frame_map.items():
+                for frameIdx in frameList:
+                    self.ProfileFrame(
+                        stepName,
+                        frameIdx,
+                        lambda stepName, frameIdx: self.WriteVTKHDFStep(
+                            writer, stepName, frameIdx
+                        ),
+                    )
+                    self._profiler.Add(self.PopFrameTiming())
+        finally:
+            writer.Close()
+        print(
+            "{0} file completed, {1:.1f} MB written, {2:.1f} MB of unchanged DataArrays shared".format(
+                fileName,
+                writer.bytesWritten / 1024.0**2,
+                writer.bytesShared / 1024.0**2,
             )
-            bufferPointDataArray += pBuffer
-            bufferCellDataArray += cBuffer
+        )
 
-        # add material local coordinate CS
-        bufferCellDataArray += self.WriteLocalCS(
-            MATERIAL_ORIENTATION, stepName, frameIdx, celldata_map
+    def WriteVTKHDFStep(self, writer, stepName, frameIdx):
+        print("writing {0}_{1}...".format(stepName, frameIdx))
+        pointdata_map, celldata_map, pointDataArrays, cellDataArrays = self.PlanFrame(
+            stepName, frameIdx
         )
+        arrays = []
+        for dataArrays in (pointDataArrays, cellDataArrays):
+            arrays.append([])
+            for reader, args, vtkType, attributes in dataArrays:
+                self._frame_profile.field = attributes[0][1]
+                arrays[-1].append((attributes[0][1], reader(*args)))
+            self._frame_profile.field = None
+        bytesWritten = writer.bytesWritten
+        with self._frame_profile.Phase("disk"):
+            writer.WriteStep(
+                self.GetFrameValue(stepName, frameIdx), arrays[0], arrays[1]
+            )
+        self._frame_profile.AddBytes(writer.bytesWritten - bytesWritten)
 
-        # pointdata - e.g., U, RF
-        # <PointData>
-        print("    writing PointData")
-        pointDataHeader = ["<PointData "]
-        for dataArrayField, fldNames in pointdata_map.items():
+    def DataHeader(self, tag, data_map):
+        # e.g., <PointData Vectors="'U','RF'" >
+        dataHeader = ["<{0} ".format(tag)]
+        for dataArrayField, fldNames in data_map.items():
             if len(fldNames) != 0:
-                pointDataHeader.append(dataArrayField + "=")
-                pointDataHeader.append("\"'{0}'".format(fldNames[0]))
+                dataHeader.append(dataArrayField + "=")
+                dataHeader.append("\"'{0}'".format(fldNames[0]))
                 for i in range(1, len(fldNames)):
-                    pointDataHeader.append(",'{0}'".format(fldNames[i]))
-                pointDataHeader.append('" ')
-        pointDataHeader.append(">\n")
-        buffer.append("".join(pointDataHeader))
-        # <DataArray>
-        buffer += bufferPointDataArray
-        buffer.append("</PointData>\n")
-
-        # celldata - e.g., S, E
-        # <CellData>
-        print("    writing CellData")
-        cellDataHeader = ["<CellData "]
-        for dataArrayField, fldNames in celldata_map.items():
-            if len(fldNames) != 0:
-                cellDataHeader.append(dataArrayField + "=")
-                cellDataHeader.append("\"'{0}'".format(fldNames[0]))
-                for i in range(1, len(fldNames)):
-                    cellDataHeader.append(",'{0}'".format(fldNames[i]))
-                cellDataHeader.append('" ')
-        cellDataHeader.append(">\n")
-        buffer.append("".join(cellDataHeader))
-
-        # <DataArray>
-        buffer += bufferCellDataArray
-        buffer.append("</CellData>\n")
-
-        # write cells
-        print("    writing cell connectivity, offsets, and types")
-        buffer.append("<Cells>\n")
-        buffer.append('<DataArray type="Int64" Name="connectivity" format="ascii">\n')
-        buffer += cellConnectivityBuffer
-        buffer.append("</DataArray>\n")
-
-        buffer.append('<DataArray type="Int64" Name="offsets" format="ascii">\n')
-        buffer += cellOffsetBuffer
-        buffer.append("</DataArray>\n")
-
-        buffer.append('<DataArray type="Int64" Name="types" format="ascii">\n')
-        buffer += cellTypeBuffer
-        buffer.append("</DataArray>\n")
-        buffer.append("</Cells>\n")
-
-        buffer.append("</Piece>\n")
-        buffer.append("</UnstructuredGrid>\n")
-        buffer.append("</VTKFile>")
-        print("Complete.")
+                    dataHeader.append(",'{0}'".format(fldNames[i]))
+                dataHeader.append('" ')
+        dataHeader.append(">\n")
+        return "".join(dataHeader)
 
-        with open(
-            "{0}".format(
-                self.GetExportFileName(stepName + "_" + str(frameIdx)) + ".vtu"
-            ),
-            "w",
-        ) as f:
-            print("writing {0}...".format(f.name))
+    def WriteVTUPieces(
+        self,
+        fileNames,
+        pointdata_map,
+        celldata_map,
+        pointDataArrays,
+        cellDataArrays,
+    ):
+        # write the planned DataArrays into one .vtu file per piece of the mesh.
+        # every section is written to the files as soon as it is produced,
+        # every DataArray is read from the odb once and written to the pieces by a thread pool
+        frameProfile = self._frame_profile
+        with frameProfile.Phase("mesh"):
+            pieces = self.GetPieces()
+        files = []
+        writers = []
+        pool = None
+        try:
+            for piece, fileName in zip(pieces, fileNames):
+                f = open(fileName, "wb")
+                files.append(f)
+                with frameProfile.Phase("mesh"):
+                    pointsBuffer, cellsBuffer, meshEncoder = piece.EncodedMesh(
+                        self.NewEncoder()
+                    )
+                # appended field data is spilled to a temporary file next to the .vtu
+                encoder = meshEncoder.Copy(spillDir=os.path.dirname(fileName))
+                writers.append(
+                    (piece, vtkxml.FileBuffer(f), encoder, pointsBuffer, cellsBuffer)
+                )
+            if len(writers) > 1 and self._piece_threads > 1:
+                pool = ThreadPool(min(self._piece_threads, len(writers)))
+
+            def Each(function):
+                if pool is None:
+                    for writer in writers:
+                        function(*writer)
+                else:
+                    pool.map(lambda writer: function(*writer), writers)
+
+            def WriteHeader(piece, buffer, encoder, pointsBuffer, cellsBuffer):
+                buffer.append(encoder.FileHeader())
+                buffer.append("<UnstructuredGrid>\n")
+                buffer.append(
+                    '<Piece NumberOfPoints="{0}" NumberOfCells="{1}">\n'.format(
+                        piece.numberOfPoints, piece.numberOfCells
+                    )
+                )
+                buffer.append(pointsBuffer)
+                # pointdata - e.g., U, RF
+                buffer.append(self.DataHeader("PointData", pointdata_map))
+
+            def WriteCellDataHeader(piece, buffer, encoder, pointsBuffer, cellsBuffer):
+                buffer.append("</PointData>\n")
+                # celldata - e.g., S, E
+                buffer.append(self.DataHeader("CellData", celldata_map))
+
+            def WriteFooter(piece, buffer, encoder, pointsBuffer, cellsBuffer):
+                buffer.append("</CellData>\n")
+                buffer.append(cellsBuffer)
+                buffer.append("</Piece>\n")
+                buffer.append("</UnstructuredGrid>\n")
+                encoder.AppendedData(buffer)
+                buffer.append("</VTKFile>")
+
+            with frameProfile.Phase("encode"):
+                Each(WriteHeader)
+            print("    writing PointData")
+            self.WriteDataArrays(pointDataArrays, "PointData", writers, Each)
+            with frameProfile.Phase("encode"):
+                Each(WriteCellDataHeader)
+            print("    writing CellData")
+            self.WriteDataArrays(cellDataArrays, "CellData", writers, Each)
+            print("    writing cell connectivity, offsets, and types")
+            with frameProfile.Phase("encode"):
+                Each(WriteFooter)
+            for writer in writers:
+                frameProfile.Add("disk", writer[1].seconds)
+                frameProfile.AddBytes(writer[1].bytesWritten)
+        finally:
+            frameProfile.field = None
+            if pool is not None:
+                pool.close()
+                pool.join()
+            for writer in writers:
+                writer[2].Close()
+            for f in files:
+                f.close()
+
+    def WriteDataArrays(self, dataArrays, dataType, writers, each):
+        # write the planned DataArrays into every piece in order.
+        # with fieldThreads > 1 the odb is read by this thread while the DataArrays read
+        # before are mapped and encoded by the field pool, at most 2 x fieldThreads of them
+        # are held in memory
+        frameProfile = self._frame_profile
+
+        def PieceData(piece, dataArray):
+            if dataType == "PointData":
+                return piece.PointData(dataArray)
+            return piece.CellData(dataArray)
+
+        def WriteDataArray(dataArray, vtkType, attributes):
+            with frameProfile.Phase("encode"):
+                each(
+                    lambda piece, buffer, encoder, pointsBuffer, cellsBuffer: encoder.DataArray(
+                        PieceData(piece, dataArray), vtkType, attributes, buffer
+                    )
+                )
+
+        def Convert(values, vtkType, name):
+            # runs on the field pool, returns the encoded DataArray of every piece
+            with frameProfile.Phase("map", name):
+                dataArray = values()
+            with frameProfile.Phase("encode", name):
+                return [
+                    encoder.Encode(PieceData(piece, dataArray), vtkType)
+                    for piece, buffer, encoder, pointsBuffer, cellsBuffer in writers
+                ]
+
+        pending = collections.deque()
+
+        def Flush(maxPending):
+            # the DataArrays are written in the order they were planned
+            while len(pending) > maxPending:
+                result, vtkType, attributes = pending.popleft()
+                encoded = result.get()
+                with frameProfile.Phase("encode", attributes[0][1]):
+                    for writer, data in zip(writers, encoded):
+                        piece, buffer, encoder, pointsBuffer, cellsBuffer = writer
+                        encoder.EncodedDataArray(data, vtkType, attributes, buffer)
+
+        try:
+            for reader, args, vtkType, attributes in dataArrays:
+                # the read/map/encode phases are charged to the DataArray name
+                frameProfile.field = attributes[0][1]
+                if self._field_threads <= 1:
+                    WriteDataArray(reader(*args), vtkType, attributes)
+                    continue
+                values = self.FetchDataArray(reader, args)
+                if values is None:
+                    # a ChunkedArray is read while it is written
+                    Flush(0)
+                    WriteDataArray(reader(*args), vtkType, attributes)
+                    continue
+                pending.append(
+                    (
+                        self.GetFieldPool().apply_async(
+                            Convert, (values, vtkType, attributes[0][1])
+                        ),
+                        vtkType,
+                        attributes,
+                    )
+                )
+                Flush(2 * self._field_threads)
+            Flush(0)
+        finally:
+            frameProfile.field = None
+            # nothing may be left running on the files when they are closed
+            for result, vtkType, attributes in pending:
+                result.wait()
+
+    def WritePVTUFile(
+        self,
+        fileName,
+        pieceFileNames,
+        pointdata_map,
+        celldata_map,
+        pointDataArrays,
+        cellDataArrays,
+    ):
+        # the .pvtu lists the DataArrays and the .vtu file of every piece
+        def PDataArray(vtkType, attributes):
+            attributes = [
+                '{0}="{1}"'.format(key, value)
+                for (key, value) in attributes
+                if key in ("Name", "NumberOfComponents")
+            ]
+            return '<PDataArray type="{0}" {1}/>\n'.format(
+                vtkType, " ".join(attributes)
+            )
+
+        buffer = []
+        buffer.append(vtkxml.DataArrayEncoder().FileHeader("PUnstructuredGrid"))
+        buffer.append('<PUnstructuredGrid GhostLevel="0">\n')
+        buffer.append("<PPoints>\n")
+        buffer.append(PDataArray("Float64", [("NumberOfComponents", 3)]))
+        buffer.append("</PPoints>\n")
+        buffer.append(self.DataHeader("PPointData", pointdata_map))
+        for reader, args, vtkType, attributes in pointDataArrays:
+            buffer.append(PDataArray(vtkType, attributes))
+        buffer.append("</PPointData>\n")
+        buffer.append(self.DataHeader("PCellData", celldata_map))
+        for reader, args, vtkType, attributes in cellDataArrays:
+            buffer.append(PDataArray(vtkType, attributes))
+        buffer.append("</PCellData>\n")
+        for pieceFileName in pieceFileNames:
+            buffer.append(
+                '<Piece Source="{0}"/>\n'.format(
+                    os.path.relpath(pieceFileName, os.path.dirname(fileName)).replace(
+                        os.sep, "/"
+                    )
+                )
+            )
+        buffer.append("</PUnstructuredGrid>\n")
+        buffer.append("</VTKFile>")
+        with open(fileName, "w") as f:
             f.writelines(buffer)
 
     def WritePVDFile(self):
@@ -582,10 +1961,10 @@ class ODB2VTK:
         partId = 0
         for stepName, frameList in self._step_frame_map.items():
             for frameIdx in frameList:
-                fileName = stepName + "_" + str(frameIdx) + ".vtu"
+                fileName = self.GetFrameFileName(stepName, frameIdx)
                 buffer += (
                     '<DataSet timestep="{0}" part="{1}" file="{2}"/>'.format(
-                        self.odb.getFrame(stepName, frameIdx).frameValue,
+                        self.GetFrameValue(stepName, frameIdx),
                         partId,
                         fileName,
                     )
@@ -602,12 +1981,14 @@ class ODB2VTK:
             print("{0} file completed.".format(f.name))
 
     def WriteCSVFILE(self):
-        # extract all the historyOutputs from Abaqus and save them into CSV file
+        # extract all the historyOutputs from Abaqus and save them into one table,
+        # a Time column (total time of the analysis) and a column per historyOutput
         # TODO: we are assuming all historyOutput types are SCALAR.
         # Need to include other types in the future.
-        numOfDataArray = 0
-        numOfDataPoint = 0
+        names = []
+        columns = []
         for stepName in self._step_frame_map.keys():
+            totalTime = self.odb.getStep(stepName).totalTime
             for historyRegionName, historyRegionObj in self.odb.getHistoryRegions(
                 stepName
             ).items():
@@ -615,29 +1996,161 @@ class ODB2VTK:
                     historyOutputName,
                     historyOutputObj,
                 ) in historyRegionObj.historyOutputs.items():
-                    numOfDataArray += 1
-                    if numOfDataPoint < len(historyOutputObj.data):
-                        numOfDataPoint = len(historyOutputObj.data)
-
-        data = np.zeros((numOfDataPoint, numOfDataArray))
-        header = []
-        for stepName in self._step_frame_map.keys():
-            for historyRegionName, historyRegionObj in self.odb.getHistoryRegions(
-                stepName
-            ).items():
-                for j, (historyOutputName, historyOutputObj) in enumerate(
-                    historyRegionObj.historyOutputs.items()
-                ):
-                    name = stepName + "_" + historyRegionName + "_" + historyOutputName
-                    header.append(name)
-                    for i, d in enumerate(historyOutputObj.data):
-                        data[i][j] = d[1]
+                    names.append(
+                        stepName + "_" + historyRegionName + "_" + historyOutputName
+                    )
+                    # ((time, value), ...) converted at once
+                    column = np.array(historyOutputObj.data, dtype=np.float64)
+                    column = column.reshape(-1, 2)
+                    column[:, 0] += totalTime
+                    columns.append(column)
+        times, values = history.AlignOnTime(columns)
+        fileName = self.GetExportFileName(
+            self.odbFileNameNoExt + history.HISTORY_EXTENSIONS[self._history_format]
+        )
+        history.WriteHistory(
+            fileName,
+            self._history_format,
+            names,
+            times,
+            values,
+            self._ascii_precision,
+        )
+        print("{0} file completed.".format(fileName))
 
-        with open(
-            "{0}".format(self.GetExportFileName(self.odbFileNameNoExt) + ".csv"), "w"
-        ) as f:
-            np.savetxt(f, np.array([header]), "%s", ",")
-            np.savetxt(f, data, "%f", ",")
+    def ResolveProbes(self, specs, kind):
+        # {instanceName: LabelMap of the probe labels} of the 'nodes' or 'elements' specs
+        probes = collections.OrderedDict()
+        resolved = set()
+        for instanceName in self._instance_names:
+            instance = self.odb.getInstance(instanceName)
+            sets = instance.nodeSets if kind == "nodes" else instance.elementSets
+            labels = []
+            for spec in specs:
+                prefix, sep, name = spec.rpartition(".")
+                if sep != "" and prefix != instanceName:
+                    continue
+                if name.isdigit():
+                    labels.append(int(name))
+                elif name in sets.keys():
+                    labels += [member.label for member in getattr(sets[name], kind)]
+                else:
+                    continue
+                resolved.add(spec)
+            if len(labels) != 0:
+                probes[instanceName] = LabelMap(np.unique(labels))
+        missing = [spec for spec in specs if spec not in resolved]
+        if len(missing) != 0:
+            sys.exit(
+                "probe {0} {1} not found in the instances {2}".format(
+                    kind, missing, self._instance_names
+                )
+            )
+        return probes
+
+    def WriteProbes(self):
+        # the values of the selected fieldOutputs at the probes in every frame, without
+        # converting the mesh: one table with a row per time (total time of the analysis)
+        # and a column per probe, DataArray and component, e.g. 'Node PART-1-1.12:U:U1',
+        # named like the historyRegions. nodes probe the nodal fields,
+        # elements the centroid of the integration point fields
+        probes = {
+            NODAL: self.ResolveProbes(self._probe_nodes, "nodes"),
+            INTEGRATION_POINT: self.ResolveProbes(self._probe_elements, "elements"),
+        }
+        # {(kind, instanceName, label, DataArray name, component): [(time, value), ...]}
+        columns = {}
+        # DataArray and component in the order they are found
+        components = {}
+        for stepName, frameList in self._step_frame_map.items():
+            totalTime = self.odb.getStep(stepName).totalTime
+            for frameIdx in frameList:
+                time = totalTime + self.GetFrameValue(stepName, frameIdx)
+                for fldName in self.GetFieldOutputsKeys(stepName, frameIdx):
+                    if not self.IsFieldSelected(fldName):
+                        continue
+                    fldOutput = self.odb.getFieldOutput(stepName, frameIdx, fldName)
+                    vtkData = ABAQUS_VTK_FIELDOUPUTS_MAP(fldOutput)
+                    if vtkData[2] == NODAL:
+                        kind, position, suffix = "Node", NODAL, ""
+                    elif vtkData[2] == INTEGRATION_POINT:
+                        kind, position, suffix = "Element", CENTROID, "_Centroid"
+                    else:
+                        continue
+                    for instanceName, probeMap in probes[vtkData[2]].items():
+                        for block in self.GetBulkDataBlocks(
+                            fldOutput, instanceName, position
+                        ):
+                            if position == NODAL:
+                                labels = block.nodeLabels
+                            else:
+                                labels = block.elementLabels
+                            indices, found = probeMap.Find(labels)
+                            if not found.any():
+                                continue
+                            name = fldName + suffix
+                            if block.sectionPoint is not None:
+                                name += block.sectionPoint.description
+                            data = np.asarray(block.data).reshape(len(found), -1)
+                            for label, row in zip(
+                                probeMap.labels[indices[found]], data[found]
+                            ):
+                                for component, value in zip(vtkData[1], row):
+                                    components.setdefault(
+                                        (name, component), len(components)
+                                    )
+                                    columns.setdefault(
+                                        (
+                                            kind,
+                                            instanceName,
+                                            int(label),
+                                            name,
+                                            component,
+                                        ),
+                                        [],
+                                    ).append((time, value))
+                # the probes only read a few subsets, nothing is reused across frames
+                if self._subset_cache is not None:
+                    self._subset_cache.Clear()
+        probed = set(key[:3] for key in columns)
+        unknown = [
+            "{0} {1}.{2}".format(kind, instanceName, label)
+            for position, kind in ((NODAL, "Node"), (INTEGRATION_POINT, "Element"))
+            for instanceName, probeMap in probes[position].items()
+            for label in probeMap.labels
+            if (kind, instanceName, int(label)) not in probed
+        ]
+        if len(unknown) != 0:
+            print("no field values at the probes {0}".format(unknown))
+        keys = sorted(
+            columns,
+            key=lambda key: (
+                key[0] == "Element",
+                self._instance_names.index(key[1]),
+                key[2],
+                components[key[3:]],
+            ),
+        )
+        times, values = history.AlignOnTime(
+            [np.array(columns[key], dtype=np.float64) for key in keys]
+        )
+        fileName = self.GetExportFileName(
+            self.odbFileNameNoExt
+            + ".probes"
+            + history.HISTORY_EXTENSIONS[self._history_format]
+        )
+        history.WriteHistory(
+            fileName,
+            self._history_format,
+            [
+                "{0} {1}.{2}:{3}:{4}".format(kind, instanceName, label, name, component)
+                for kind, instanceName, label, name, component in keys
+            ],
+            times,
+            values,
+            self._ascii_precision,
+        )
+        print("{0} file completed.".format(fileName))
 
     def GetExportFileName(self, filName):
         if not os.path.exists(os.path.join(self.odbPath, self.odbFileNameNoExt)):
@@ -645,6 +2158,59 @@ class ODB2VTK:
         return os.path.join(self.odbPath, self.odbFileNameNoExt, filName)
 
 
+def DefaultThreads(workers):
+    # threads of every worker process when workers processes convert frames at the same time
+    return max(1, multiprocessing.cpu_count() // max(1, workers))
+
+
+def ConfigureConverter(converter, args):
+    # apply the command line options to a converter, shared with the worker processes
+    # the compression and piece threads share the cpus with the other workers by default
+    compressionThreads = args.compressionThreads
+    if compressionThreads is None:
+        compressionThreads = DefaultThreads(args.workers)
+    pieceThreads = args.pieceThreads
+    if pieceThreads is None:
+        pieceThreads = DefaultThreads(args.workers)
+    converter.SetDataFormat(args.format)
+    converter.SetAsciiPrecision(args.asciiPrecision or None)
+    converter.SetOutput(args.output, args.hdfChunkRows)
+    converter.SetCompression(
+        None if args.compress == "none" else args.compress,
+        args.compressionLevel,
+        args.compressionBlockSize,
+        compressionThreads,
+    )
+    converter.SetResume(args.resume)
+    converter.SetManifest(args.manifest)
+    positions = list(args.positions or DATA_POSITIONS)
+    if not args.integrationPoints and "INTEGRATION_POINT" in positions:
+        positions.remove("INTEGRATION_POINT")
+    converter.SetFieldSelection(args.fields, args.excludeFields, positions)
+    converter.SetPartition(
+        None if args.partition == "none" else args.partition, pieceThreads
+    )
+    converter.SetFieldThreads(args.fieldThreads)
+    converter.SetChunkMemory(args.chunkMemory * 1024**3)
+    if args.subsetCacheMemory is None:
+        converter.SetSubsetCache()
+    else:
+        converter.SetSubsetCache(args.subsetCacheMemory * 1024**3)
+    converter.SetDerived(args.derived, args.strengths)
+    converter.SetNodalAverage(args.nodalAverage)
+    converter.SetRegion(args.elementSets, args.nodeSets, args.box, args.sphere)
+    converter.SetProbes(args.probeNodes, args.probeElements)
+    converter.SetLocalCS(args.localCS, args.cacheLocalCS)
+    timingFile = args.timingFile
+    if timingFile is None and args.timing == "jsonl":
+        timingFile = converter.GetExportFileName(
+            converter.odbFileNameNoExt + ".timing.jsonl"
+        )
+    converter.SetTiming(args.timing, timingFile, args.profile)
+    converter.SetIndex(args.index)
+    converter.SetHistoryFormat(args.historyFormat)
+
+
 if __name__ == "__main__":
     start_time = timeit.default_timer()
 
@@ -662,12 +2228,28 @@ if __name__ == "__main__":
     )
     parser.add_argument(
         "--step",
-        help="selected step names and frames which are separated by whitespace, e.g., 'step1:1,2,3' 'step2:2,3,4'",
+        help="selected step names and frames which are separated by whitespace, e.g., 'step1:1,2,3' 'step2:2,3,4', 'step3:all' selects all frames of step3",
         nargs="*",
     )
     parser.add_argument(
         "--writeHistory", default=0, type=int, help="if 1, write history output."
     )
+    parser.add_argument(
+        "--historyFormat",
+        default="csv",
+        choices=history.HISTORY_FORMATS,
+        help="file format of the history output and of the probes, one row per time and one column per historyOutput or probe component",
+    )
+    parser.add_argument(
+        "--probeNodes",
+        help="write the nodal fields of these nodes over time instead of the .vtu files, node labels or node sets of the instances, 'INSTANCE.' selects one instance, e.g. '12' 'BOLT' 'PART-1-1.7'",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--probeElements",
+        help="write the centroid values of the integration point fields of these elements over time instead of the .vtu files, element labels or element sets of the instances",
+        nargs="*",
+    )
     parser.add_argument(
         "--odbFile", required=True, help="selected odb file (full path name)"
     )
@@ -675,6 +2257,215 @@ if __name__ == "__main__":
     parser.add_argument(
         "--suffix", default="", type=str, help="string appended to the file"
     )
+    parser.add_argument(
+        "--format",
+        default="ascii",
+        choices=vtkxml.DATA_FORMATS,
+        help="format of the <DataArray> in the .vtu file",
+    )
+    parser.add_argument(
+        "--output",
+        default="vtu",
+        choices=("vtu", "vtkhdf"),
+        help="'vtu' writes a .vtu file per frame and a .pvd file, 'vtkhdf' writes all frames into one .vtkhdf file storing the mesh and the unchanged DataArrays once",
+    )
+    parser.add_argument(
+        "--hdfChunkRows",
+        default=vtkhdf.CHUNK_ROWS,
+        type=int,
+        help="rows of the chunks of the .vtkhdf datasets, the unit of compression and of partial reads",
+    )
+    parser.add_argument(
+        "--asciiPrecision",
+        default=0,
+        type=int,
+        help="significant digits of the ascii floats, e.g. 6 for Float32 data, 0 writes the shortest representation which reads back the same value",
+    )
+    parser.add_argument(
+        "--compress",
+        default="none",
+        choices=("none",) + tuple(sorted(vtkxml.COMPRESSORS)),
+        help="compression of the binary and appended DataArrays",
+    )
+    parser.add_argument(
+        "--compressionLevel",
+        default=-1,
+        type=int,
+        help="compression level, -1 for the default of the compressor",
+    )
+    parser.add_argument(
+        "--compressionBlockSize",
+        default=vtkxml.COMPRESSION_BLOCK_SIZE,
+        type=int,
+        help="uncompressed size in bytes of the compressed blocks",
+    )
+    parser.add_argument(
+        "--compressionThreads",
+        default=None,
+        type=int,
+        help="number of threads compressing the blocks, the number of cpus divided by --workers by default",
+    )
+    parser.add_argument(
+        "--workers",
+        default=1,
+        type=int,
+        help="if > 1, convert the frames with a pool of worker processes and write the .pvd file once all frames are converted",
+    )
+    parser.add_argument(
+        "--workerMemory",
+        default=0,
+        type=float,
+        help="memory (GB) needed by one worker to limit the number of workers, if 0 it is estimated from the mesh size",
+    )
+    parser.add_argument(
+        "--resume",
+        default=0,
+        type=int,
+        help="if 1, skip the frames which are already converted with the same odb and options, see the .manifest.json file in the output directory",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=1,
+        type=int,
+        help="if 0, don't record the converted frames in the .manifest.json file, e.g. when several processes convert frames of the same export",
+    )
+    parser.add_argument(
+        "--watch",
+        default=0,
+        type=int,
+        help="if 1, keep converting the frames appended to the odb while the analysis is running (.lck file exists), then exit. The frames are converted one at a time, it can't be used with --workers",
+    )
+    parser.add_argument(
+        "--watchInterval",
+        default=60,
+        type=float,
+        help="seconds between two scans of the odb in --watch mode",
+    )
+    parser.add_argument(
+        "--fields",
+        help="fieldOutputs to convert, glob patterns separated by whitespace, e.g. 'U' 'S*' 'Material_Orientation'. All fieldOutputs if not given",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--excludeFields",
+        help="fieldOutputs not to convert, glob patterns separated by whitespace, e.g. 'SDV*'",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--positions",
+        help="positions of the DataArrays to write, any of NODAL CENTROID INTEGRATION_POINT. All if not given",
+        nargs="*",
+        choices=DATA_POSITIONS,
+    )
+    parser.add_argument(
+        "--integrationPoints",
+        default=1,
+        type=int,
+        help="if 0, skip the _IntegrationPoints DataArrays of integration point fields",
+    )
+    parser.add_argument(
+        "--partition",
+        default="none",
+        type=str,
+        help="'instance' or a number of cells to write a .pvtu per frame with one .vtu piece per instance or per chunk of cells, 'none' writes one .vtu per frame",
+    )
+    parser.add_argument(
+        "--chunkMemory",
+        default=1.0,
+        type=float,
+        help="DataArrays bigger than this (GB) are read and written one instance at a time, 0 to read them at once",
+    )
+    parser.add_argument(
+        "--subsetCacheMemory",
+        default=None,
+        type=float,
+        help="memory (GB) of the fieldOutput subsets kept during a frame to read them once, 0 to disable, half of --chunkMemory by default",
+    )
+    parser.add_argument(
+        "--pieceThreads",
+        default=None,
+        type=int,
+        help="number of threads writing the pieces of a partitioned frame, the number of cpus divided by --workers by default",
+    )
+    parser.add_argument(
+        "--fieldThreads",
+        default=1,
+        type=int,
+        help="number of threads mapping and encoding the DataArrays of a frame while the odb is read, 1 converts one DataArray after the other",
+    )
+    parser.add_argument(
+        "--elementSets",
+        help="only write the elements of these element sets of the instances",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--nodeSets",
+        help="only write the elements whose nodes are all in these node sets of the instances",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--box",
+        help="only write the elements whose center is in the box xmin ymin zmin xmax ymax zmax",
+        nargs=6,
+        type=float,
+    )
+    parser.add_argument(
+        "--sphere",
+        help="only write the elements whose center is within radius of the point x y z radius",
+        nargs=4,
+        type=float,
+    )
+    parser.add_argument(
+        "--nodalAverage",
+        default="none",
+        choices=NODAL_AVERAGE_SOURCES,
+        help="write the integration point fields averaged to the nodes as _Nodal PointData, from the centroid or the ELEMENT_NODAL values of the elements around each node",
+    )
+    parser.add_argument(
+        "--derived",
+        help="quantities derived from the fieldOutputs as FIELD:QUANTITY, FIELD is a glob pattern and QUANTITY one of mises principal magnitude maxstress tsaihill tsaiwu, e.g. 'S:mises' 'U:magnitude'",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--strengths",
+        help="strengths Xt Xc Yt Yc S of the failure indices maxstress tsaihill tsaiwu, all positive",
+        nargs=5,
+        type=float,
+    )
+    parser.add_argument(
+        "--localCS",
+        default="axis1",
+        choices=LOCAL_CS_OUTPUTS,
+        help="material orientation written as the local axis 1 vector, the local frame tensor or the quaternion",
+    )
+    parser.add_argument(
+        "--cacheLocalCS",
+        default=0,
+        type=int,
+        help="if 1, read the material orientation once and reuse it for every frame",
+    )
+    parser.add_argument(
+        "--timing",
+        default="none",
+        choices=("none", "summary", "jsonl"),
+        help="time the phases of every frame, print a summary table or append JSON lines to --timingFile",
+    )
+    parser.add_argument(
+        "--timingFile",
+        help="JSON lines file of the frame timings, <export dir>/<odb name>.timing.jsonl by default",
+    )
+    parser.add_argument(
+        "--profile",
+        default=0,
+        type=int,
+        help="if 1, dump the cProfile stats of every frame to <step>_<frame>.prof",
+    )
+    parser.add_argument(
+        "--index",
+        default=1,
+        type=int,
+        help="if 1, cache the metadata of the odb in <odb name>.index.json and reuse it while the odb is unchanged",
+    )
     args = parser.parse_args()
 
     # check odbfile
@@ -684,9 +2475,11 @@ if __name__ == "__main__":
         sys.exit("{0} doesn't exist".format(args.odbFile))
 
     odb2vtk = ODB2VTK(args.odbFile, args.suffix)
+    ConfigureConverter(odb2vtk, args)
     # if --header is on, ignore all others and extract header information
     if args.header:
         odb2vtk.ExtractHeader()
+        odb2vtk.SaveIndex()
         sys.exit(
             "{0} generated".format(
                 os.path.join(odb2vtk.odbPath, odb2vtk.odbFileNameNoExt)
@@ -704,17 +2497,60 @@ if __name__ == "__main__":
     step_frame_dict = {}
     for item in args.step:
         split = item.split(":")
-        step_frame_dict[split[0]] = []
+        if split[1] == "all":
+            step_frame_dict[split[0]] = None
+            continue
+        step_frame_dict.setdefault(split[0], [])
+        if step_frame_dict[split[0]] is None:
+            # all the frames of the step are converted already
+            continue
         for i in split[1].split(","):
             step_frame_dict[split[0]].append(int(i))
-    odb2vtk.ReadArgs(args.instance, step_frame_dict)
+    odb2vtk.ReadArgs(args.instance, odb2vtk.ExpandStepFrames(step_frame_dict))
     if args.writeHistory:
         odb2vtk.WriteCSVFILE()
+    if odb2vtk.HasProbes():
+        # only the probe table is written
+        odb2vtk.WriteProbes()
+        odb2vtk.SaveIndex()
+        sys.exit()
     if args.writePVD:
         odb2vtk.WritePVDFile()
+        odb2vtk.SaveIndex()
         sys.exit()
 
-    odb2vtk.ConstructMap()
-    odb2vtk.WriteVTUFiles()
+    if args.resume and not args.manifest:
+        sys.exit(
+            "--resume needs the frames recorded in the manifest, --manifest 0 can't resume"
+        )
+    failed = []
+    if args.output == "vtkhdf":
+        if args.watch or args.resume or args.workers > 1 or args.partition != "none":
+            sys.exit(
+                "--watch, --resume, --workers and --partition aren't supported by the vtkhdf output"
+            )
+        odb2vtk.ConstructMap()
+        odb2vtk.WriteVTKHDFFile()
+    elif args.watch:
+        # the frames are converted as they are appended, one at a time
+        if args.workers > 1:
+            sys.exit(
+                "--watch converts the frames one at a time, it can't be used with --workers"
+            )
+        odb2vtk.ConstructMap()
+        odb2vtk.WatchVTUFiles(step_frame_dict, args.watchInterval)
+    elif args.workers > 1:
+        import workerpool
+
+        failed = workerpool.WriteVTUFiles(
+            odb2vtk, args, args.workers, args.workerMemory * 1024**3
+        )
+    else:
+        odb2vtk.ConstructMap()
+        odb2vtk.WriteVTUFiles()
+    odb2vtk.SaveIndex()
+    odb2vtk.GetProfiler().PrintSummary()
+    if len(failed) != 0:
+        sys.exit(1)
 
     print("--- %s seconds ---" % (timeit.default_timer() - start_time))
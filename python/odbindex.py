@@ -0,0 +1,164 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  odbindex.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# odbindex.py caches the metadata of an odb in a JSON file next to it, so that the header,
+# the .pvd file and the planning of the DataArrays don't have to scan the odb again.
+# the index is only used while the odb path, mtime and size are the same as when it was written.
+# {
+#   "version": 1,
+#   "odb": {"path": ..., "mtime": ..., "size": ...},
+#   "instances": [[instanceName, number of nodes, number of elements], ...],
+#   "steps": [[stepName, [frameValue, ...]], ...],
+#   "frames": {"stepName:frameIdx": {
+#       "fieldOutputs": [fldName, ...],
+#       "fields": {fldName: {
+#           "type": "TENSOR_3D_FULL", "position": "INTEGRATION_POINT", "componentLabels": [...],
+#           "instances": {instanceName: [[sectionPoint description, ...], max integration points]}
+#       }}
+#   }}
+# }
+
+import json
+import os
+
+import manifest
+
+INDEX_VERSION = 1
+
+
+class OdbIndex(object):
+    def __init__(self, fileName, odbSignature):
+        self.fileName = fileName
+        self.odbSignature = odbSignature
+        self.instances = []
+        self.steps = []
+        self._frames = {}
+        self._dirty = False
+        content = self.Load()
+        if content is not None:
+            self.instances = content["instances"]
+            self.steps = content["steps"]
+            self._frames = content["frames"]
+
+    def Load(self):
+        # content of the index file, None if it doesn't exist or belongs to another odb
+        if not os.path.exists(self.fileName):
+            return None
+        try:
+            with open(self.fileName) as f:
+                content = json.load(f)
+            if (
+                content.get("version") == INDEX_VERSION
+                and content.get("odb") == self.odbSignature
+            ):
+                return content
+        except (ValueError, KeyError):
+            # a broken index is rebuilt from the odb
+            print("{0} is not a valid odb index, ignored".format(self.fileName))
+        return None
+
+    def HasHeader(self):
+        return len(self.steps) != 0
+
+    def SetHeader(self, instances, steps):
+        # instances - [[instanceName, nodesNum, elementsNum], ...]
+        # steps - [[stepName, [frameValue, ...]], ...]
+        self.instances = instances
+        self.steps = steps
+        self._dirty = True
+
+    def GetFrameValue(self, stepName, frameIdx):
+        # None if the frame isn't in the index
+        for name, frameValues in self.steps:
+            if name == stepName and frameIdx < len(frameValues):
+                return frameValues[frameIdx]
+        return None
+
+    def GetInstanceSize(self, instanceName):
+        # (nodesNum, elementsNum), None if the instance isn't in the index
+        for name, nodesNum, elementsNum in self.instances:
+            if name == instanceName:
+                return (nodesNum, elementsNum)
+        return None
+
+    def GetFrame(self, stepName, frameIdx):
+        return self._frames.get("{0}:{1}".format(stepName, frameIdx))
+
+    def SetFrame(self, stepName, frameIdx, frame):
+        # frame entry of another process, e.g. a worker of workerpool.py
+        if frame is not None:
+            self._frames["{0}:{1}".format(stepName, frameIdx)] = frame
+            self._dirty = True
+
+    def GetFieldOutputsKeys(self, stepName, frameIdx):
+        frame = self.GetFrame(stepName, frameIdx)
+        if frame is None:
+            return None
+        return frame.get("fieldOutputs")
+
+    def SetFieldOutputsKeys(self, stepName, frameIdx, fldNames):
+        frame = self._frames.setdefault("{0}:{1}".format(stepName, frameIdx), {})
+        frame["fieldOutputs"] = list(fldNames)
+        self._dirty = True
+
+    def GetField(self, stepName, frameIdx, fldName):
+        frame = self.GetFrame(stepName, frameIdx)
+        if frame is None:
+            return None
+        return frame.get("fields", {}).get(fldName)
+
+    def SetField(self, stepName, frameIdx, fldName, field):
+        frame = self._frames.setdefault("{0}:{1}".format(stepName, frameIdx), {})
+        frame.setdefault("fields", {})[fldName] = field
+        self._dirty = True
+
+    def Save(self):
+        # only written if something was added since it was loaded
+        if not self._dirty:
+            return
+        # keep the frames added by other processes since the index was loaded
+        content = self.Load()
+        if content is not None:
+            for key, frame in content["frames"].items():
+                self._frames.setdefault(key, frame)
+            if not self.HasHeader():
+                self.instances = content["instances"]
+                self.steps = content["steps"]
+        manifest.WriteJSON(
+            self.fileName,
+            {
+                "version": INDEX_VERSION,
+                "odb": self.odbSignature,
+                "instances": self.instances,
+                "steps": self.steps,
+                "frames": self._frames,
+            },
+        )
+        self._dirty = False
@@ -0,0 +1,150 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  partition.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# partition.py splits the mesh into pieces, each piece is written into its own .vtu file
+# and gathered by a .pvtu file so that ParaView can read the pieces in parallel
+
+import numpy as np
+
+import vtkxml
+
+
+class MeshPiece(object):
+    # cells [cellStart, cellEnd) of the mesh with their points numbered locally
+    # the points [pointStart, pointEnd) are used if given, otherwise only the points of the cells
+    def __init__(
+        self,
+        points,
+        connectivity,
+        offsets,
+        cellTypes,
+        cellStart=0,
+        cellEnd=None,
+        pointStart=None,
+        pointEnd=None,
+    ):
+        if cellEnd is None:
+            cellEnd = len(offsets)
+        connStart = int(offsets[cellStart - 1]) if cellStart > 0 else 0
+        connEnd = int(offsets[cellEnd - 1]) if cellEnd > 0 else 0
+        conn = connectivity[connStart:connEnd]
+        if pointStart is not None:
+            self.pointIndices = slice(pointStart, pointEnd)
+            self.connectivity = conn - pointStart
+        else:
+            self.pointIndices = np.unique(conn)
+            self.connectivity = np.searchsorted(self.pointIndices, conn)
+        self.cellIndices = slice(cellStart, cellEnd)
+        self.points = points[self.pointIndices]
+        self.offsets = offsets[cellStart:cellEnd] - connStart
+        self.cellTypes = cellTypes[cellStart:cellEnd]
+        # encoded <Points> and <Cells>, see EncodedMesh
+        self._encoded = None
+
+    @property
+    def numberOfPoints(self):
+        return len(self.points)
+
+    @property
+    def numberOfCells(self):
+        return len(self.offsets)
+
+    def PointData(self, array):
+        # a ChunkedArray is only read for a single piece of the whole mesh
+        if isinstance(array, vtkxml.ChunkedArray):
+            return array
+        return array[self.pointIndices]
+
+    def CellData(self, array):
+        if isinstance(array, vtkxml.ChunkedArray):
+            return array
+        return array[self.cellIndices]
+
+    def EncodedMesh(self, encoder):
+        # encode <Points> and <Cells> once, every frame starts from a copy of the encoder
+        # so that the appended geometry blocks are shared by all frames
+        # encoder - an empty DataArrayEncoder with the options of the output
+        # returns (points xml, cells xml, encoder)
+        if (
+            self._encoded is not None
+            and self._encoded[2].Settings() == encoder.Settings()
+        ):
+            return self._encoded
+        encoder = encoder.Copy()
+        pointsBuffer = ["<Points>\n"]
+        encoder.DataArray(
+            self.points, "Float64", [("NumberOfComponents", 3)], pointsBuffer
+        )
+        pointsBuffer.append("</Points>\n")
+        cellsBuffer = ["<Cells>\n"]
+        encoder.DataArray(
+            self.connectivity, "Int64", [("Name", "connectivity")], cellsBuffer
+        )
+        encoder.DataArray(self.offsets, "Int64", [("Name", "offsets")], cellsBuffer)
+        encoder.DataArray(self.cellTypes, "Int64", [("Name", "types")], cellsBuffer)
+        cellsBuffer.append("</Cells>\n")
+        self._encoded = ("".join(pointsBuffer), "".join(cellsBuffer), encoder)
+        return self._encoded
+
+
+def SplitMesh(points, connectivity, offsets, cellTypes, instanceRanges, partition):
+    # instanceRanges - [(pointStart, pointEnd, cellStart, cellEnd), ...] of every instance
+    # partition - None for one piece, "instance" for one piece per instance,
+    #             or the number of cells per piece
+    if partition is None:
+        return [
+            MeshPiece(points, connectivity, offsets, cellTypes, 0, None, 0, len(points))
+        ]
+    if partition == "instance":
+        return [
+            MeshPiece(
+                points,
+                connectivity,
+                offsets,
+                cellTypes,
+                cellStart,
+                cellEnd,
+                pointStart,
+                pointEnd,
+            )
+            for (pointStart, pointEnd, cellStart, cellEnd) in instanceRanges
+        ]
+    chunkSize = int(partition)
+    return [
+        MeshPiece(
+            points,
+            connectivity,
+            offsets,
+            cellTypes,
+            cellStart,
+            min(cellStart + chunkSize, len(offsets)),
+        )
+        for cellStart in range(0, max(len(offsets), 1), chunkSize)
+    ]
@@ -0,0 +1,277 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  profiler.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# profiler.py times the phases of the conversion of every frame
+# plan   - planning the DataArrays of the frame (fieldOutput keys, locations, section points)
+# read   - odb reads, getSubset and bulkDataBlocks
+# map    - label to index mapping and scattering the values into the DataArray
+# encode - formatting the DataArrays (ascii/base64/raw) and handing them to the file
+# disk   - time spent in file writes, part of encode (summed over the piece threads)
+# mesh   - encoding <Points> and <Cells>, only the first frame of a process
+# read, map and encode are also accumulated per DataArray.
+# counters of the frame, e.g. the hits and misses of the subset cache, are summed as well.
+# the frame records are written as JSON lines and/or printed as a summary table.
+
+import os
+import sys
+import json
+import timeit
+import cProfile
+import threading
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+PHASES = ("plan", "read", "map", "encode", "disk", "mesh")
+
+
+def PeakRSS():
+    # peak resident memory of this process in bytes, None if unknown
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return peak
+    return peak * 1024
+
+
+class PhaseTimer(object):
+    def __init__(self, frameProfile, phase, field=None):
+        self._frameProfile = frameProfile
+        self._phase = phase
+        self._field = field
+        self._start = None
+
+    def __enter__(self):
+        self._start = timeit.default_timer()
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        self._frameProfile.Add(
+            self._phase, timeit.default_timer() - self._start, self._field
+        )
+        return False
+
+
+class NullTimer(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, tb):
+        return False
+
+
+NULL_TIMER = NullTimer()
+
+
+class FrameProfile(object):
+    # timers of one frame, field is the DataArray the read/map/encode phases are charged to,
+    # threads working on other DataArrays pass their field to Phase
+    def __init__(self, stepName, frameIdx, cprofile=False):
+        self.stepName = stepName
+        self.frameIdx = frameIdx
+        self.field = None
+        self.phases = dict((phase, 0.0) for phase in PHASES)
+        self.fields = {}
+        self.bytesWritten = 0
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._start = timeit.default_timer()
+        self._cprofile = None
+        if cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def Phase(self, phase, field=None):
+        return PhaseTimer(self, phase, field)
+
+    def Add(self, phase, seconds, field=None):
+        if field is None:
+            field = self.field
+        with self._lock:
+            self.phases[phase] += seconds
+            if field is not None and phase in ("read", "map", "encode"):
+                fieldPhases = self.fields.setdefault(field, {})
+                fieldPhases[phase] = fieldPhases.get(phase, 0.0) + seconds
+
+    def AddBytes(self, bytesWritten):
+        self.bytesWritten += bytesWritten
+
+    def AddCounters(self, counters):
+        for name, count in counters.items():
+            self.counters[name] = self.counters.get(name, 0) + count
+
+    def Finish(self, profileFile=None):
+        # returns the JSON record of the frame, the cProfile stats are dumped to profileFile
+        seconds = timeit.default_timer() - self._start
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            if profileFile is not None:
+                self._cprofile.dump_stats(profileFile)
+        return {
+            "step": self.stepName,
+            "frame": self.frameIdx,
+            "seconds": seconds,
+            "phases": self.phases,
+            "fields": self.fields,
+            "bytes": self.bytesWritten,
+            "counters": self.counters,
+            "peakRSS": PeakRSS(),
+            "pid": os.getpid(),
+            "profile": profileFile if self._cprofile is not None else None,
+        }
+
+
+class NullFrameProfile(object):
+    # used when the timing is disabled, every phase is a no-op
+    field = None
+
+    def Phase(self, phase, field=None):
+        return NULL_TIMER
+
+    def Add(self, phase, seconds, field=None):
+        pass
+
+    def AddBytes(self, bytesWritten):
+        pass
+
+    def AddCounters(self, counters):
+        pass
+
+
+NULL_FRAME_PROFILE = NullFrameProfile()
+
+
+class Profiler(object):
+    # timing = 'none', 'summary' or 'jsonl'
+    # jsonl appends one line per frame to timingFile as soon as the frame is done
+    # cprofile = dump the cProfile stats of every frame next to its .vtu file
+    def __init__(self, timing="none", timingFile=None, cprofile=False):
+        self.timing = timing
+        self.timingFile = timingFile
+        self.cprofile = cprofile
+        self.records = []
+
+    @property
+    def enabled(self):
+        return self.timing != "none" or self.cprofile
+
+    def StartFrame(self, stepName, frameIdx):
+        if not self.enabled:
+            return NULL_FRAME_PROFILE
+        return FrameProfile(stepName, frameIdx, self.cprofile)
+
+    def Add(self, record):
+        # record of a frame converted in this process or in a worker
+        if record is None:
+            return
+        self.records.append(record)
+        if self.timing == "jsonl" and self.timingFile is not None:
+            # a single write per line, several processes may append to the same file
+            with open(self.timingFile, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def PrintSummary(self):
+        if self.timing == "summary" and len(self.records) != 0:
+            print(Summary(self.records))
+
+
+def ReadJSONLines(fileName):
+    records = []
+    with open(fileName) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    return records
+
+
+def Summary(records, maxFields=10):
+    # table of the phases summed over the frames and of the slowest DataArrays
+    lines = []
+    total = sum(record["seconds"] for record in records)
+    bytesWritten = sum(record["bytes"] for record in records)
+    peaks = [record["peakRSS"] for record in records if record["peakRSS"] is not None]
+    lines.append(
+        "{0} frames in {1:.2f}s ({2:.2f}s per frame), {3:.1f} MB written ({4:.1f} MB/s)".format(
+            len(records),
+            total,
+            total / max(1, len(records)),
+            bytesWritten / 1024.0**2,
+            bytesWritten / 1024.0**2 / total if total > 0 else 0.0,
+        )
+    )
+    if len(peaks) != 0:
+        lines.append(
+            "peak RSS {0:.1f} MB in {1} processes".format(
+                max(peaks) / 1024.0**2, len(set(record["pid"] for record in records))
+            )
+        )
+    lines.append("{0:<40} {1:>10} {2:>7}".format("phase", "seconds", "%"))
+    for phase in PHASES:
+        seconds = sum(record["phases"].get(phase, 0.0) for record in records)
+        lines.append(
+            "{0:<40} {1:>10.3f} {2:>6.1f}%".format(
+                phase, seconds, 100.0 * seconds / total if total > 0 else 0.0
+            )
+        )
+    counters = {}
+    for record in records:
+        for name, count in record.get("counters", {}).items():
+            counters[name] = counters.get(name, 0) + count
+    for name in sorted(counters):
+        lines.append("{0:<40} {1:>10}".format(name, counters[name]))
+    fields = {}
+    for record in records:
+        for field, fieldPhases in record["fields"].items():
+            summed = fields.setdefault(field, {})
+            for phase, seconds in fieldPhases.items():
+                summed[phase] = summed.get(phase, 0.0) + seconds
+    if len(fields) != 0:
+        lines.append(
+            "{0:<40} {1:>10} {2:>10} {3:>10}".format(
+                "DataArray", "read", "map", "encode"
+            )
+        )
+        slowest = sorted(fields.items(), key=lambda item: -sum(item[1].values()))
+        for field, fieldPhases in slowest[:maxFields]:
+            lines.append(
+                "{0:<40} {1:>10.3f} {2:>10.3f} {3:>10.3f}".format(
+                    field[:40],
+                    fieldPhases.get("read", 0.0),
+                    fieldPhases.get("map", 0.0),
+                    fieldPhases.get("encode", 0.0),
+                )
+            )
+    return "\n".join(lines)
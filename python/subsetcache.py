@@ -0,0 +1,121 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  subsetcache.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# subsetcache.py keeps the bulkDataBlocks of the fieldOutput subsets read during one frame,
+# so that the section points, the centroid/integration point DataArrays and the material
+# orientation don't call getSubset and bulkDataBlocks again for the same subset.
+# the entries are keyed by (fieldName, instanceName, position, sectionPoint description),
+# the blocks of all the section points are fetched at once and stored with the description None.
+# a subset bigger than the cache isn't kept, and the section points of a subset which wouldn't
+# fit are read one at a time without the cache, see ODB2VTK.GetBulkDataBlocks.
+
+from collections import OrderedDict
+
+# memory of the cached bulkDataBlocks as a fraction of the chunk memory of the converter,
+# the least recently used entries are evicted above it. the blocks of a subset take about
+# as much memory as its DataArray, which is bounded by the chunk memory
+SUBSET_CACHE_FRACTION = 0.5
+# memory of the cached bulkDataBlocks when the DataArrays aren't chunked (chunk memory 0)
+SUBSET_CACHE_MEMORY = 1024**3
+
+
+def DefaultMaxBytes(chunkMemory):
+    # the cache memory for a chunk memory in bytes
+    if chunkMemory <= 0:
+        return SUBSET_CACHE_MEMORY
+    return int(chunkMemory * SUBSET_CACHE_FRACTION)
+
+
+class SubsetCache(object):
+    def __init__(self, maxBytes):
+        self.maxBytes = maxBytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypasses = 0
+
+    def Fits(self, size):
+        # an entry bigger than the cache would evict every other entry and still exceed it
+        return size <= self.maxBytes
+
+    def Get(self, key):
+        # None if the key isn't cached
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        # most recently used last
+        self._entries[key] = entry
+        return entry[0]
+
+    def Put(self, key, blocks):
+        # returns False if the blocks are bigger than the cache, they aren't kept
+        size = sum(BlockBytes(block) for block in blocks)
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        if not self.Fits(size):
+            self.bypasses += 1
+            return False
+        self._entries[key] = (blocks, size)
+        self._bytes += size
+        # the new entry fits, it is the last one evicted
+        while self._bytes > self.maxBytes:
+            evictedKey, (evicted, evictedSize) = self._entries.popitem(last=False)
+            self._bytes -= evictedSize
+            self.evictions += 1
+        return True
+
+    def Clear(self):
+        # called at the end of every frame, the subsets belong to the frame
+        self._entries.clear()
+        self._bytes = 0
+
+    def PopCounters(self):
+        # hits, misses, evictions and bypasses since the last call
+        counters = {
+            "subsetHits": self.hits,
+            "subsetMisses": self.misses,
+            "subsetEvictions": self.evictions,
+            "subsetBypasses": self.bypasses,
+        }
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypasses = 0
+        return counters
+
+
+def BlockBytes(block):
+    size = 0
+    for name in ("data", "elementLabels", "nodeLabels", "integrationPoints"):
+        array = getattr(block, name, None)
+        size += getattr(array, "nbytes", 0)
+    return size
@@ -0,0 +1,153 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  test_celltypes.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# test_celltypes.py places the nodes of the Abaqus elements at their parametric coordinates
+# and checks that the reordered nodes are at the parametric coordinates of the vtk cell.
+# usage: python -m pytest python/tests
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, ".."))
+import celltypes
+
+# corners and edge midpoints of the 20 node hexahedron, the same in Abaqus and vtk
+HEXAHEDRON_20 = [
+    (-1, -1, -1),
+    (1, -1, -1),
+    (1, 1, -1),
+    (-1, 1, -1),
+    (-1, -1, 1),
+    (1, -1, 1),
+    (1, 1, 1),
+    (-1, 1, 1),
+    (0, -1, -1),
+    (1, 0, -1),
+    (0, 1, -1),
+    (-1, 0, -1),
+    (0, -1, 1),
+    (1, 0, 1),
+    (0, 1, 1),
+    (-1, 0, 1),
+    (-1, -1, 0),
+    (1, -1, 0),
+    (1, 1, 0),
+    (-1, 1, 0),
+]
+# Abaqus C3D27: the centers of the faces 1-2-3-4, 5-8-7-6, 1-5-6-2, 2-6-7-3, 3-7-8-4,
+# 4-8-5-1, then the center of the element
+ABAQUS_C3D27 = HEXAHEDRON_20 + [
+    (0, 0, -1),
+    (0, 0, 1),
+    (0, -1, 0),
+    (1, 0, 0),
+    (0, 1, 0),
+    (-1, 0, 0),
+    (0, 0, 0),
+]
+# vtkTriQuadraticHexahedron: the centers of the faces -x, +x, -y, +y, -z, +z, then the center
+VTK_TRIQUADRATIC_HEXAHEDRON = HEXAHEDRON_20 + [
+    (-1, 0, 0),
+    (1, 0, 0),
+    (0, -1, 0),
+    (0, 1, 0),
+    (0, 0, -1),
+    (0, 0, 1),
+    (0, 0, 0),
+]
+# Abaqus lines have the middle node second, vtkQuadraticEdge has it last
+ABAQUS_QUADRATIC_LINE = [(-1, 0, 0), (0, 0, 0), (1, 0, 0)]
+VTK_QUADRATIC_EDGE = [(-1, 0, 0), (1, 0, 0), (0, 0, 0)]
+
+
+def Reorder(elementTypes, cells):
+    # cells - [(abaqusElementType, parametric coordinates of the Abaqus nodes), ...]
+    # returns the coordinates of the nodes of every cell in the order of the connectivity
+    points = []
+    connectivity = []
+    cellSizes = []
+    cellTypeIds = []
+    for elementType, coordinates in cells:
+        connectivity += list(range(len(points), len(points) + len(coordinates)))
+        points += coordinates
+        cellSizes.append(len(coordinates))
+        cellTypeIds.append(elementTypes.index(elementType))
+    cellTypes = [celltypes.AbaqusVTKCellType(name) for name in elementTypes]
+    connectivity = celltypes.ReorderCellNodes(
+        np.array(connectivity, dtype=np.int64), cellSizes, cellTypeIds, cellTypes
+    )
+    coordinates = np.array(points)[connectivity]
+    starts = np.cumsum(cellSizes) - cellSizes
+    return [coordinates[start : start + size] for start, size in zip(starts, cellSizes)]
+
+
+def test_c3d27():
+    assert celltypes.AbaqusVTKCellType("C3D27")[0] == (
+        celltypes.VTK_TRIQUADRATIC_HEXAHEDRON
+    )
+    (reordered,) = Reorder(["C3D27"], [("C3D27", ABAQUS_C3D27)])
+    np.testing.assert_array_equal(reordered, VTK_TRIQUADRATIC_HEXAHEDRON)
+
+
+@pytest.mark.parametrize(
+    "elementType", ["B22", "B32", "PIPE32", "ELBOW32", "T2D3", "T3D3", "SAX2"]
+)
+def test_quadratic_line(elementType):
+    assert celltypes.AbaqusVTKCellType(elementType)[0] == (celltypes.VTK_QUADRATIC_EDGE)
+    (reordered,) = Reorder([elementType], [(elementType, ABAQUS_QUADRATIC_LINE)])
+    np.testing.assert_array_equal(reordered, VTK_QUADRATIC_EDGE)
+
+
+def test_mixed_cells():
+    # only the cells with a different node order are reordered, whatever their position
+    # in the connectivity. a C3D27 with optional nodes left out keeps the Abaqus order
+    elementTypes = ["C3D20R", "B32", "C3D27", "B31"]
+    cells = [
+        ("C3D20R", HEXAHEDRON_20),
+        ("B32", ABAQUS_QUADRATIC_LINE),
+        ("C3D27", ABAQUS_C3D27),
+        ("B31", ABAQUS_QUADRATIC_LINE[::2]),
+        ("C3D27", ABAQUS_C3D27[:21]),
+        ("B32", ABAQUS_QUADRATIC_LINE),
+    ]
+    expected = [
+        HEXAHEDRON_20,
+        VTK_QUADRATIC_EDGE,
+        VTK_TRIQUADRATIC_HEXAHEDRON,
+        ABAQUS_QUADRATIC_LINE[::2],
+        ABAQUS_C3D27[:21],
+        VTK_QUADRATIC_EDGE,
+    ]
+    for reordered, coordinates in zip(Reorder(elementTypes, cells), expected):
+        np.testing.assert_array_equal(reordered, coordinates)
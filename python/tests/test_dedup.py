@@ -0,0 +1,80 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  test_dedup.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# test_dedup.py checks that the content index finds the arrays written before.
+# usage: python -m pytest python/tests
+
+import os
+import sys
+
+import numpy as np
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, ".."))
+import dedup
+
+
+def test_same_content():
+    array = np.arange(12, dtype=np.float32).reshape(4, 3)
+    assert dedup.ContentHash(array) == dedup.ContentHash(array.copy())
+    # the hash is the one of the values, not of the memory layout
+    assert dedup.ContentHash(array) == dedup.ContentHash(np.asfortranarray(array))
+    changed = array.copy()
+    changed[3, 2] += 1
+    assert dedup.ContentHash(array) != dedup.ContentHash(changed)
+
+
+def test_stored_type():
+    # e.g. the local CS is computed in float64 and stored as Float32
+    array = np.linspace(1.0, 2.0, 12).reshape(4, 3)
+    changed = array + 1e-12
+    assert dedup.ContentHash(array) != dedup.ContentHash(changed)
+    assert dedup.ContentHash(array, np.float32) == dedup.ContentHash(
+        changed, np.float32
+    )
+    assert dedup.ContentHash(array, np.float32) == dedup.ContentHash(
+        array.astype(np.float32)
+    )
+
+
+def test_index():
+    index = dedup.ContentIndex()
+    zeros = dedup.ContentHash(np.zeros(8, dtype=np.float32))
+    ones = dedup.ContentHash(np.ones(8, dtype=np.float32))
+    assert index.Find(("CellData", "S"), zeros) is None
+    index.Add(("CellData", "S"), zeros, 0)
+    index.Add(("CellData", "S"), ones, 8)
+    # an identical array written again keeps pointing to the first copy
+    index.Add(("CellData", "S"), zeros, 16)
+    assert index.Find(("CellData", "S"), zeros) == 0
+    assert index.Find(("CellData", "S"), ones) == 8
+    # the arrays are only shared between the same key
+    assert index.Find(("CellData", "E"), zeros) is None
+    assert index.Find(("PointData", "S"), zeros) is None
@@ -0,0 +1,150 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  test_history.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# test_history.py writes the historyOutputs of a fake odb with several steps and history
+# regions and checks that every historyOutput has its own column, aligned on the total time.
+# usage: python -m pytest python/tests
+
+import os
+import sys
+import csv
+import json
+
+import numpy as np
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, "..", "benchmarks", "fakeodb"))
+sys.path.insert(0, os.path.join(tests_dir, ".."))
+import history
+from odb2vtk import ODB2VTK
+
+REGIONS = 3
+OUTPUTS = 2
+POINTS = 4
+# the regions of the fake odb have POINTS, POINTS - 1, ... points over the step
+STEPS = {"Step-1": 0.0, "Step-2": 1.0}
+MODEL = {
+    "instances": {"SOLID-1": {"type": "C3D8", "shape": [2, 2, 2]}},
+    "steps": dict(
+        (
+            stepName,
+            {
+                "frames": 1,
+                "historyRegions": REGIONS,
+                "historyOutputs": OUTPUTS,
+                "historyPoints": POINTS,
+            },
+        )
+        for stepName in STEPS
+    ),
+}
+
+
+def ExpectedColumns():
+    # {name: (total times, values)} of every historyOutput of the fake odb
+    columns = {}
+    for stepName, totalTime in STEPS.items():
+        for r in range(REGIONS):
+            time = np.linspace(0.0, 1.0, POINTS - r)
+            for h in range(OUTPUTS):
+                name = "{0}_Region {1}_H{2}".format(stepName, r, h)
+                columns[name] = (time + totalTime, time * (h + 1) + r)
+    return columns
+
+
+def WriteHistory(tmp_path, historyFormat):
+    odbFile = str(tmp_path / "model.odb")
+    with open(odbFile, "w") as f:
+        json.dump(MODEL, f)
+    converter = ODB2VTK(odbFile, "")
+    converter.SetHistoryFormat(historyFormat)
+    converter.ReadArgs(["SOLID-1"], dict((stepName, [0]) for stepName in STEPS))
+    converter.WriteCSVFILE()
+    converter.odb.close()
+    return converter.GetExportFileName(
+        converter.odbFileNameNoExt + history.HISTORY_EXTENSIONS[historyFormat]
+    )
+
+
+def ReadCSV(fileName):
+    with open(fileName) as f:
+        rows = list(csv.reader(f))
+    table = np.array([[float(value) for value in row] for row in rows[1:]])
+    return rows[0][1:], table[:, 0], table[:, 1:]
+
+
+def CheckColumns(names, times, values):
+    expected = ExpectedColumns()
+    assert sorted(names) == sorted(expected)
+    assert values.shape == (len(times), len(names))
+    assert np.all(np.diff(times) > 0)
+    for j, name in enumerate(names):
+        expectedTimes, expectedValues = expected[name]
+        rows = np.searchsorted(times, expectedTimes)
+        np.testing.assert_array_equal(times[rows], expectedTimes, err_msg=name)
+        np.testing.assert_array_equal(values[rows, j], expectedValues, err_msg=name)
+        # no value at the times of the other columns
+        missing = np.ones(len(times), dtype=bool)
+        missing[rows] = False
+        assert np.all(np.isnan(values[missing, j])), name
+
+
+def test_align_on_time():
+    columns = [
+        np.array([[0.0, 1.0], [1.0, 2.0]]),
+        np.array([[0.5, 3.0], [1.0, 4.0], [2.0, 5.0]]),
+    ]
+    times, values = history.AlignOnTime(columns)
+    np.testing.assert_array_equal(times, [0.0, 0.5, 1.0, 2.0])
+    np.testing.assert_array_equal(
+        values, [[1.0, np.nan], [np.nan, 3.0], [2.0, 4.0], [np.nan, 5.0]]
+    )
+    times, values = history.AlignOnTime([])
+    assert times.shape == (0,) and values.shape == (0, 0)
+
+
+def test_csv(tmp_path):
+    CheckColumns(*ReadCSV(WriteHistory(tmp_path, "csv")))
+
+
+def test_npz(tmp_path):
+    content = np.load(WriteHistory(tmp_path, "npz"))
+    CheckColumns(list(content["Names"]), content["Time"], content["Values"])
+
+
+def test_hdf5(tmp_path):
+    h5py = pytest.importorskip("h5py")
+    with h5py.File(WriteHistory(tmp_path, "hdf5"), "r") as f:
+        names = [
+            name.decode("utf-8") if isinstance(name, bytes) else name
+            for name in f["Names"][()]
+        ]
+        CheckColumns(names, f["Time"][()], f["Values"][()])
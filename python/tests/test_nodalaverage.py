@@ -0,0 +1,126 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  test_nodalaverage.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# test_nodalaverage.py converts a model of the fake odb of the benchmarks with the nodal
+# average of the stress and checks every node against the mean of the values of the
+# elements around it, only the elements written when the mesh is limited to a region.
+# usage: python -m pytest python/tests
+
+import os
+import sys
+import json
+
+import numpy as np
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, "..", "benchmarks", "fakeodb"))
+sys.path.insert(0, os.path.join(tests_dir, ".."))
+sys.path.insert(0, tests_dir)
+from odb2vtk import ODB2VTK
+from odbAccess import openOdb
+from abaqusConstants import CENTROID, ELEMENT_NODAL
+from test_roundtrip import ReadVTU
+
+STEP_NAME = "Step-1"
+INSTANCE_NAME = "SOLID-1"
+MODEL = {
+    "instances": {INSTANCE_NAME: {"type": "C3D8", "shape": [4, 3, 2]}},
+    "steps": {STEP_NAME: {"frames": 2}},
+}
+# element set of the fake odb with the first half of the elements
+REGION_SET = "HALF"
+
+
+def ExpectedAverage(odbFile, source, elementLabels=None):
+    # {node label: mean of the values of the elements of elementLabels around the node}
+    # elementLabels - None for every element
+    odb = openOdb(odbFile)
+    instance = odb.rootAssembly.instances[INSTANCE_NAME]
+    fldOutput = odb.steps[STEP_NAME].frames[1].fieldOutputs["S"]
+    position = ELEMENT_NODAL if source == "elementNodal" else CENTROID
+    subset = fldOutput.getSubset(region=instance, position=position)
+    connectivity = dict(
+        (element.label, element.connectivity) for element in instance.elements
+    )
+    values = {}
+    for block in subset.bulkDataBlocks:
+        data = np.asarray(block.data, dtype=np.float64)
+        if source == "elementNodal":
+            rows = zip(block.elementLabels, block.nodeLabels, data)
+        else:
+            rows = [
+                (elementLabel, nodeLabel, value)
+                for elementLabel, value in zip(block.elementLabels, data)
+                for nodeLabel in connectivity[elementLabel]
+            ]
+        for elementLabel, nodeLabel, value in rows:
+            if elementLabels is None or elementLabel in elementLabels:
+                values.setdefault(int(nodeLabel), []).append(value)
+    odb.close()
+    return dict((label, np.mean(value, axis=0)) for label, value in values.items())
+
+
+@pytest.fixture(scope="module")
+def odbFile(tmp_path_factory):
+    odbFile = str(tmp_path_factory.mktemp("nodalaverage") / "model.odb")
+    with open(odbFile, "w") as f:
+        json.dump(MODEL, f)
+    return odbFile
+
+
+@pytest.mark.parametrize("region", [None, REGION_SET])
+@pytest.mark.parametrize("source", ["centroid", "elementNodal"])
+def test_nodal_average(odbFile, source, region):
+    converter = ODB2VTK(odbFile, "_{0}_{1}".format(source, region))
+    converter.SetNodalAverage(source)
+    converter.SetRegion([region] if region else None)
+    converter.ReadArgs([INSTANCE_NAME], {STEP_NAME: [1]})
+    converter.ConstructMap()
+    converter.WriteVTUFiles()
+    converter.odb.close()
+    arrays = ReadVTU(converter.GetVTUFileName(STEP_NAME, 1))
+    nodal = arrays[("PointData", "S_Nodal")]
+    nodesMap = converter._nodes_map[INSTANCE_NAME]
+    elementLabels = set(converter._elements_map[INSTANCE_NAME].labels.tolist())
+    expected = ExpectedAverage(odbFile, source, elementLabels)
+    # every node written has elements around it
+    assert len(expected) == len(nodal)
+    indices, valid = nodesMap.Find(sorted(expected))
+    assert valid.all()
+    np.testing.assert_allclose(
+        nodal[indices], [expected[label] for label in sorted(expected)], rtol=1e-5
+    )
+    if region is not None:
+        # the nodes on the boundary of the region have elements outside of it
+        everyElement = ExpectedAverage(odbFile, source)
+        assert any(
+            not np.allclose(expected[label], everyElement[label]) for label in expected
+        )
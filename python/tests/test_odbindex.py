@@ -0,0 +1,161 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  test_odbindex.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# test_odbindex.py checks that a second conversion reads the metadata of the fake odb from
+# the odb index instead of the odb, writes the same files, and that the index is ignored
+# once the mtime or the size of the odb changed.
+# usage: python -m pytest python/tests
+
+import os
+import sys
+import json
+
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, "..", "benchmarks", "fakeodb"))
+sys.path.insert(0, os.path.join(tests_dir, ".."))
+from odb2vtk import ODB2VTK
+
+STEP_NAME = "Step-1"
+FRAMES = 2
+MODEL = {
+    "instances": {
+        "SOLID-1": {"type": "C3D8", "shape": [3, 3, 3]},
+        "SHELL-1": {"type": "S4R", "shape": [4, 4], "sectionPoints": 2},
+    },
+    "steps": {STEP_NAME: {"frames": FRAMES}},
+}
+
+
+class OdbCalls(object):
+    # counts the calls of the odb methods reading the metadata
+    METHODS = ("getFrames", "getFrame", "getFieldOutputsKeys", "getNodes")
+
+    def __init__(self, odb):
+        self.calls = dict((name, 0) for name in self.METHODS)
+        for name in self.METHODS:
+            setattr(odb, name, self.Counted(name, getattr(odb, name)))
+
+    def Counted(self, name, method):
+        def Call(*args):
+            self.calls[name] += 1
+            return method(*args)
+
+        return Call
+
+    def Total(self):
+        return sum(self.calls.values())
+
+
+def ExtractHeader(odbFile):
+    # the first call of a conversion, --header 1, scans the instances and the frames
+    converter = ODB2VTK(odbFile, "")
+    odbCalls = OdbCalls(converter.odb)
+    converter.ExtractHeader()
+    converter.SaveIndex()
+    converter.odb.close()
+    return odbCalls
+
+
+def Convert(odbFile, useIndex=True):
+    # returns (converter, odb calls, {file name: content}), the odb is closed
+    converter = ODB2VTK(odbFile, "")
+    converter.SetDataFormat("binary")
+    converter.SetIndex(useIndex)
+    odbCalls = OdbCalls(converter.odb)
+    converter.ReadArgs(
+        sorted(converter.odb.getInstancesKeys), {STEP_NAME: list(range(FRAMES))}
+    )
+    converter.ConstructMap()
+    converter.WriteVTUFiles()
+    converter.WritePVDFile()
+    converter.SaveIndex()
+    converter.odb.close()
+    contents = {}
+    for i in range(FRAMES):
+        fileName = converter.GetVTUFileName(STEP_NAME, i)
+        with open(fileName, "rb") as f:
+            contents[os.path.basename(fileName)] = f.read()
+    return converter, odbCalls, contents
+
+
+@pytest.fixture
+def odbFile(tmp_path):
+    odbFile = str(tmp_path / "model.odb")
+    with open(odbFile, "w") as f:
+        json.dump(MODEL, f)
+    return odbFile
+
+
+def test_index_hit(odbFile):
+    assert ExtractHeader(odbFile).calls["getFrames"] > 0
+    converter, scanned, expected = Convert(odbFile)
+    assert os.path.exists(converter.GetIndexFileName())
+    assert scanned.calls["getFieldOutputsKeys"] > 0
+    converter, indexed, contents = Convert(odbFile)
+    assert contents == expected
+    # the header and the fieldOutputs of the frames are in the index
+    assert ExtractHeader(odbFile).Total() == 0
+    assert indexed.calls["getFieldOutputsKeys"] == 0
+    assert indexed.Total() < scanned.Total()
+    # without the index every conversion scans the odb
+    converter, unindexed, contents = Convert(odbFile, useIndex=False)
+    assert contents == expected
+    assert unindexed.calls["getFieldOutputsKeys"] > 0
+
+
+@pytest.mark.parametrize("change", ["mtime", "size"])
+def test_index_invalidated(odbFile, change):
+    ExtractHeader(odbFile)
+    converter, scanned, expected = Convert(odbFile)
+    indexFileName = converter.GetIndexFileName()
+    assert ExtractHeader(odbFile).Total() == 0
+    stat = os.stat(odbFile)
+    if change == "mtime":
+        os.utime(odbFile, (stat.st_atime, stat.st_mtime + 10))
+    else:
+        # the fake odb is a JSON file, the model is the same
+        with open(odbFile, "a") as f:
+            f.write(" ")
+        os.utime(odbFile, (stat.st_atime, stat.st_mtime))
+    assert ExtractHeader(odbFile).calls["getFrames"] > 0
+    converter, rescanned, contents = Convert(odbFile)
+    assert contents == expected
+    assert (
+        rescanned.calls["getFieldOutputsKeys"] == scanned.calls["getFieldOutputsKeys"]
+    )
+    # the index is written again for the changed odb
+    with open(indexFileName) as f:
+        odbSignature = json.load(f)["odb"]
+    assert odbSignature["size"] == os.path.getsize(odbFile)
+    assert odbSignature["mtime"] == os.stat(odbFile).st_mtime
+    converter, indexed, contents = Convert(odbFile)
+    assert indexed.calls["getFieldOutputsKeys"] == 0
@@ -0,0 +1,156 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  test_partition.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# test_partition.py converts a model of the fake odb of the benchmarks into .pvtu files and
+# checks that the values of the pieces are the ones of the unpartitioned .vtu, and that
+# --resume converts a frame again when one of its pieces is corrupted.
+# usage: python -m pytest python/tests
+
+import os
+import sys
+import json
+
+import numpy as np
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, "..", "benchmarks", "fakeodb"))
+sys.path.insert(0, os.path.join(tests_dir, ".."))
+sys.path.insert(0, tests_dir)
+from odb2vtk import ODB2VTK
+from test_roundtrip import ReadVTU
+
+STEP_NAME = "Step-1"
+FRAMES = 2
+MODEL = {
+    "instances": {
+        "SOLID-1": {"type": "C3D8", "shape": [3, 3, 3]},
+        "SHELL-1": {"type": "S4R", "shape": [4, 4], "sectionPoints": 2},
+    },
+    "steps": {STEP_NAME: {"frames": FRAMES}},
+}
+
+
+def Convert(odbFile, partition=None, pieceThreads=1, resume=False):
+    # returns the converter, its odb is closed
+    suffix = "_{0}".format(partition)
+    converter = ODB2VTK(odbFile, suffix)
+    converter.SetDataFormat("binary")
+    converter.SetPartition(partition, pieceThreads)
+    converter.SetResume(resume)
+    converter.ReadArgs(
+        sorted(converter.odb.getInstancesKeys), {STEP_NAME: list(range(FRAMES))}
+    )
+    converter.ConstructMap()
+    converter.WriteVTUFiles()
+    converter.odb.close()
+    return converter
+
+
+@pytest.fixture(scope="module")
+def odbFile(tmp_path_factory):
+    odbFile = str(tmp_path_factory.mktemp("partition") / "model.odb")
+    with open(odbFile, "w") as f:
+        json.dump(MODEL, f)
+    return odbFile
+
+
+@pytest.fixture(scope="module")
+def reference(odbFile):
+    converter = Convert(odbFile)
+    return [ReadVTU(converter.GetVTUFileName(STEP_NAME, i)) for i in range(FRAMES)]
+
+
+@pytest.mark.parametrize("pieceThreads", [1, 2])
+@pytest.mark.parametrize("partition", ["instance", "10"])
+def test_pieces(odbFile, reference, partition, pieceThreads):
+    converter = Convert(odbFile, partition, pieceThreads)
+    for i, expected in enumerate(reference):
+        fileName = converter.GetVTUFileName(STEP_NAME, i)
+        assert fileName.endswith(".pvtu")
+        pieceFileNames = converter.ReadPieceFileNames(fileName)
+        assert len(pieceFileNames) > 1
+        pieces = [ReadVTU(pieceFileName) for pieceFileName in pieceFileNames]
+        for key in expected:
+            assert all(key in piece for piece in pieces), key
+        cellStart = 0
+        for piece in pieces:
+            # the points of a piece are numbered locally, compare them through the cells
+            offsets = piece[("Cells", "offsets")].ravel()
+            cellEnd = cellStart + len(offsets)
+            expectedOffsets = expected[("Cells", "offsets")].ravel()
+            connStart = int(expectedOffsets[cellStart - 1]) if cellStart > 0 else 0
+            connEnd = int(expectedOffsets[cellEnd - 1])
+            connectivity = piece[("Cells", "connectivity")].ravel()
+            expectedConnectivity = expected[("Cells", "connectivity")].ravel()[
+                connStart:connEnd
+            ]
+            np.testing.assert_array_equal(
+                offsets, expectedOffsets[cellStart:cellEnd] - connStart
+            )
+            for key in expected:
+                if key[0] in ("Points", "PointData"):
+                    np.testing.assert_array_equal(
+                        piece[key][connectivity],
+                        expected[key][expectedConnectivity],
+                        err_msg=str(key),
+                    )
+                elif key[0] == "CellData" or key == ("Cells", "types"):
+                    np.testing.assert_array_equal(
+                        piece[key], expected[key][cellStart:cellEnd], err_msg=str(key)
+                    )
+            cellStart = cellEnd
+        assert cellStart == len(expected[("Cells", "offsets")])
+
+
+def test_resume_corrupted_piece(odbFile, capsys):
+    converter = Convert(odbFile, "instance", resume=True)
+    fileNames = [converter.GetVTUFileName(STEP_NAME, i) for i in range(FRAMES)]
+    pieceFileName = converter.ReadPieceFileNames(fileNames[0])[-1]
+    with open(pieceFileName, "rb") as f:
+        content = f.read()
+    # same size, only the checksum tells the piece is corrupted
+    middle = len(content) // 2
+    byte = b"A" if content[middle : middle + 1] != b"A" else b"B"
+    with open(pieceFileName, "wb") as f:
+        f.write(content[:middle] + byte + content[middle + 1 :])
+    capsys.readouterr()
+    Convert(odbFile, "instance", resume=True)
+    out = capsys.readouterr().out
+    assert "{0}_0 is up to date".format(STEP_NAME) not in out
+    for i in range(1, FRAMES):
+        assert "{0}_{1} is up to date".format(STEP_NAME, i) in out
+    with open(pieceFileName, "rb") as f:
+        assert f.read() == content
+    # converted again, every frame is up to date now
+    Convert(odbFile, "instance", resume=True)
+    out = capsys.readouterr().out
+    for i in range(FRAMES):
+        assert "{0}_{1} is up to date".format(STEP_NAME, i) in out
@@ -0,0 +1,244 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  test_roundtrip.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# test_roundtrip.py writes DataArrays in every data format, decodes the DataArrays of the
+# .vtu files and checks they are equal to the arrays written. A model of the fake odb of
+# the benchmarks is converted in every format and compression, with whole and chunked
+# DataArrays, and the DataArrays of the frames compared.
+# usage: python -m pytest python/tests
+
+import os
+import sys
+import json
+import zlib
+import base64
+from xml.etree import ElementTree
+
+import numpy as np
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, "..", "benchmarks", "fakeodb"))
+sys.path.insert(0, os.path.join(tests_dir, ".."))
+import vtkxml
+from odb2vtk import ODB2VTK
+
+HEADER_DTYPE = vtkxml.VTK_DATA_TYPES[vtkxml.HEADER_TYPE]
+STEP_NAME = "Step-1"
+FRAMES = 2
+MODEL = {
+    "instances": {
+        "SOLID-1": {"type": "C3D8", "shape": [3, 3, 3]},
+        "SHELL-1": {"type": "S4R", "shape": [4, 4], "sectionPoints": 2},
+    },
+    "steps": {STEP_NAME: {"frames": FRAMES}},
+}
+# small blocks so that the DataArrays are compressed in several blocks
+COMPRESSION_BLOCK_SIZE = 1024
+# rows of the DataArrays written by the encoder
+ROWS = 200
+# (name, vtk type, array) of every type written by the converter
+ARRAYS = [
+    ("Points", "Float64", np.linspace(-1.0, 1.0, 3 * ROWS).reshape(ROWS, 3) / 3.0),
+    ("U", "Float32", np.sin(np.arange(3 * ROWS, dtype=np.float32)).reshape(ROWS, 3)),
+    ("S", "Float32", np.cos(np.arange(6 * ROWS, dtype=np.float64)).reshape(ROWS, 6)),
+    ("connectivity", "Int64", np.arange(4 * ROWS, dtype=np.int64)),
+    ("offsets", "Int32", np.arange(4, 4 * ROWS + 4, 4, dtype=np.int32)),
+    ("types", "UInt8", np.full(ROWS, 9, dtype=np.uint8)),
+]
+
+
+def WriteVTU(fileName, dataFormat, compress=None):
+    compressor = None
+    if compress is not None:
+        compressor = vtkxml.Compressor(compress, blockSize=COMPRESSION_BLOCK_SIZE)
+    encoder = vtkxml.DataArrayEncoder(dataFormat, compressor=compressor)
+    buffer = [encoder.FileHeader(), "<UnstructuredGrid>\n"]
+    buffer.append(
+        '<Piece NumberOfPoints="{0}" NumberOfCells="{0}">\n<PointData>\n'.format(ROWS)
+    )
+    for name, vtkType, array in ARRAYS:
+        components = 1 if array.ndim == 1 else array.shape[1]
+        encoder.DataArray(
+            array, vtkType, [("Name", name), ("NumberOfComponents", components)], buffer
+        )
+    buffer.append("</PointData>\n</Piece>\n</UnstructuredGrid>\n")
+    encoder.AppendedData(buffer)
+    buffer.append("</VTKFile>\n")
+    with open(fileName, "wb") as f:
+        for item in buffer:
+            f.write(item if isinstance(item, bytes) else item.encode("utf-8"))
+
+
+def Convert(odbFile, dataFormat, compress=None, chunkMemory=0):
+    # returns the .vtu files of the frames
+    # chunkMemory - 1 byte reads and writes every DataArray one instance at a time
+    suffix = "_{0}_{1}_{2}".format(dataFormat, compress, chunkMemory)
+    converter = ODB2VTK(odbFile, suffix)
+    converter.SetDataFormat(dataFormat)
+    converter.SetCompression(compress, blockSize=COMPRESSION_BLOCK_SIZE)
+    converter.SetChunkMemory(chunkMemory)
+    converter.ReadArgs(
+        sorted(converter.odb.getInstancesKeys), {STEP_NAME: list(range(FRAMES))}
+    )
+    converter.ConstructMap()
+    converter.WriteVTUFiles()
+    converter.odb.close()
+    return [converter.GetVTUFileName(STEP_NAME, i) for i in range(FRAMES)]
+
+
+def Decompress(compressor, data):
+    # the blocks of the vtk compressed format, see vtkxml.Compressor
+    itemSize = HEADER_DTYPE.itemsize
+    blocks = int(np.frombuffer(data[:itemSize], dtype=HEADER_DTYPE)[0])
+    header = np.frombuffer(data[: (3 + blocks) * itemSize], dtype=HEADER_DTYPE)
+    uncompressed = []
+    start = len(header) * itemSize
+    for size in header[3:]:
+        block = data[start : start + int(size)]
+        if compressor == "vtkZLibDataCompressor":
+            uncompressed.append(zlib.decompress(block))
+        else:
+            import lz4.block
+
+            uncompressed.append(
+                lz4.block.decompress(block, uncompressed_size=int(header[1]))
+            )
+        start += int(size)
+    return b"".join(uncompressed)
+
+
+def DecodeBinary(text, compressor):
+    # the header and the data are base64 encoded separately
+    itemSize = HEADER_DTYPE.itemsize
+    if compressor is None:
+        headerLength = 4 * ((itemSize + 2) // 3)
+        return base64.b64decode(text[headerLength:])
+    blocks = int(np.frombuffer(base64.b64decode(text[:32])[:itemSize], HEADER_DTYPE)[0])
+    headerLength = 4 * (((3 + blocks) * itemSize + 2) // 3)
+    header = base64.b64decode(text[:headerLength])
+    return Decompress(compressor, header + base64.b64decode(text[headerLength:]))
+
+
+def DecodeAppended(appended, offset, compressor):
+    itemSize = HEADER_DTYPE.itemsize
+    if compressor is None:
+        size = int(np.frombuffer(appended[offset : offset + itemSize], HEADER_DTYPE)[0])
+        return appended[offset + itemSize : offset + itemSize + size]
+    return Decompress(compressor, appended[offset:])
+
+
+def ReadVTU(fileName):
+    # {(section, name): array} of every DataArray of the .vtu file
+    with open(fileName, "rb") as f:
+        content = f.read()
+    appended = None
+    marker = b'<AppendedData encoding="raw">'
+    if marker in content:
+        content, appended = content.split(marker, 1)
+        appended = appended[appended.index(b"_") + 1 :]
+        content += b"</VTKFile>"
+    root = ElementTree.fromstring(content)
+    compressor = root.get("compressor")
+    arrays = {}
+    for section in root.find("UnstructuredGrid").find("Piece"):
+        for dataArray in section.iter("DataArray"):
+            dtype = vtkxml.VTK_DATA_TYPES[dataArray.get("type")]
+            dataFormat = dataArray.get("format")
+            if dataFormat == "ascii":
+                # the floats are parsed as float64 first, the same as the values
+                # converted to the DataArray type by the binary formats
+                values = np.array(dataArray.text.split(), dtype=np.float64)
+                values = values.astype(dtype)
+            elif dataFormat == "binary":
+                data = DecodeBinary(dataArray.text.strip(), compressor)
+                values = np.frombuffer(data, dtype=dtype)
+            else:
+                data = DecodeAppended(
+                    appended, int(dataArray.get("offset")), compressor
+                )
+                values = np.frombuffer(data, dtype=dtype)
+            components = int(dataArray.get("NumberOfComponents", 1))
+            arrays[(section.tag, dataArray.get("Name", ""))] = values.reshape(
+                -1, components
+            )
+    return arrays
+
+
+def SkipUnsupported(dataFormat, compress):
+    if dataFormat == "ascii" and compress is not None:
+        pytest.skip("ascii DataArrays aren't compressed")
+    if compress == "lz4":
+        pytest.importorskip("lz4.block")
+
+
+@pytest.mark.parametrize("compress", [None, "zlib", "lz4"])
+@pytest.mark.parametrize("dataFormat", ["ascii", "binary", "appended"])
+def test_encoder_roundtrip(tmp_path, dataFormat, compress):
+    SkipUnsupported(dataFormat, compress)
+    fileName = str(tmp_path / "arrays.vtu")
+    WriteVTU(fileName, dataFormat, compress)
+    arrays = ReadVTU(fileName)
+    assert len(arrays) == len(ARRAYS)
+    for name, vtkType, array in ARRAYS:
+        expected = array.astype(vtkxml.VTK_DATA_TYPES[vtkType])
+        np.testing.assert_array_equal(
+            arrays[("PointData", name)].reshape(expected.shape), expected, err_msg=name
+        )
+
+
+@pytest.fixture(scope="module")
+def odbFile(tmp_path_factory):
+    odbFile = str(tmp_path_factory.mktemp("roundtrip") / "model.odb")
+    with open(odbFile, "w") as f:
+        json.dump(MODEL, f)
+    return odbFile
+
+
+@pytest.fixture(scope="module")
+def reference(odbFile):
+    return [ReadVTU(fileName) for fileName in Convert(odbFile, "ascii")]
+
+
+@pytest.mark.parametrize("chunkMemory", [0, 1])
+@pytest.mark.parametrize("compress", [None, "zlib", "lz4"])
+@pytest.mark.parametrize("dataFormat", ["ascii", "binary", "appended"])
+def test_roundtrip(odbFile, reference, dataFormat, compress, chunkMemory):
+    if dataFormat == "ascii" and chunkMemory == 0:
+        pytest.skip("ascii with whole DataArrays is the reference")
+    SkipUnsupported(dataFormat, compress)
+    fileNames = Convert(odbFile, dataFormat, compress, chunkMemory)
+    for fileName, expected in zip(fileNames, reference):
+        arrays = ReadVTU(fileName)
+        assert sorted(arrays) == sorted(expected)
+        assert len(arrays) > 0
+        for key in expected:
+            assert arrays[key].dtype == expected[key].dtype, key
+            np.testing.assert_array_equal(arrays[key], expected[key], err_msg=str(key))
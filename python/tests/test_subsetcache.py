@@ -0,0 +1,149 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  test_subsetcache.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# test_subsetcache.py checks that the subset cache evicts the least recently used entries,
+# doesn't keep the subsets bigger than its memory, and that the section points read without
+# the cache give the same bulkDataBlocks.
+# usage: python -m pytest python/tests
+
+import os
+import sys
+import json
+
+import numpy as np
+import pytest
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(tests_dir, "..", "benchmarks", "fakeodb"))
+sys.path.insert(0, os.path.join(tests_dir, ".."))
+import subsetcache
+from odb2vtk import ODB2VTK
+from abaqusConstants import INTEGRATION_POINT
+
+STEP_NAME = "Step-1"
+MODEL = {
+    "instances": {
+        "SOLID-1": {"type": "C3D8", "shape": [3, 3, 3]},
+        "SHELL-1": {"type": "S4R", "shape": [4, 4], "sectionPoints": 2},
+    },
+    "steps": {STEP_NAME: {"frames": 1}},
+}
+
+
+class Block(object):
+    def __init__(self, size):
+        self.data = np.zeros(size, dtype=np.uint8)
+
+
+def test_eviction():
+    cache = subsetcache.SubsetCache(100)
+    assert cache.Put("a", [Block(40)])
+    assert cache.Put("b", [Block(40)])
+    # "a" is the most recently used
+    assert cache.Get("a") is not None
+    assert cache.Put("c", [Block(40)])
+    assert cache.Get("b") is None
+    assert cache.Get("a") is not None
+    assert cache.Get("c") is not None
+    assert cache.evictions == 1
+    # every other entry is evicted for one which fills the cache
+    assert cache.Put("d", [Block(100)])
+    assert cache.Get("a") is None and cache.Get("c") is None
+    assert cache.Get("d") is not None
+    assert cache.evictions == 3
+
+
+def test_oversized():
+    cache = subsetcache.SubsetCache(100)
+    assert cache.Put("a", [Block(40)])
+    assert not cache.Put("b", [Block(60), Block(41)])
+    assert cache.Get("b") is None
+    # the entries which fit are kept
+    assert cache.Get("a") is not None
+    # a smaller entry replaced by one too big is dropped
+    assert not cache.Put("a", [Block(101)])
+    assert cache.Get("a") is None
+    counters = cache.PopCounters()
+    assert counters["subsetBypasses"] == 2
+    assert counters["subsetEvictions"] == 0
+    assert cache.PopCounters()["subsetBypasses"] == 0
+
+
+@pytest.fixture
+def converter(tmp_path):
+    odbFile = str(tmp_path / "model.odb")
+    with open(odbFile, "w") as f:
+        json.dump(MODEL, f)
+    converter = ODB2VTK(odbFile, "")
+    converter.ReadArgs(sorted(converter.odb.getInstancesKeys), {STEP_NAME: [0]})
+    converter.ConstructMap()
+    yield converter
+    converter.odb.close()
+
+
+def ReadSectionPoints(converter, maxBytes, sectionPointBytes):
+    # (elementLabels, data) of the blocks of every section point of the shell stress
+    converter.SetSubsetCache(maxBytes)
+    fldOutput = converter.odb.getFieldOutput(STEP_NAME, 0, "S")
+    values = []
+    for sectionPoint in fldOutput.locations[0].sectionPoints:
+        blocks = converter.GetBulkDataBlocks(
+            fldOutput, "SHELL-1", INTEGRATION_POINT, sectionPoint, sectionPointBytes
+        )
+        assert len(blocks) > 0
+        for block in blocks:
+            assert block.sectionPoint.description == sectionPoint.description
+        values.append(
+            (
+                np.concatenate([block.elementLabels for block in blocks]),
+                np.concatenate([block.data for block in blocks]),
+            )
+        )
+    return values
+
+
+def test_bypass(converter):
+    expected = ReadSectionPoints(converter, 0, None)
+    cases = [
+        # all the section points fit, read once
+        (subsetcache.SUBSET_CACHE_MEMORY, 1, {"subsetMisses": 1, "subsetHits": 1}),
+        # the section points don't fit together, each one is read alone
+        (1000, 600, {"subsetMisses": 0, "subsetHits": 0, "subsetBypasses": 2}),
+        # chunked, the size isn't known
+        (subsetcache.SUBSET_CACHE_MEMORY, None, {"subsetBypasses": 2}),
+    ]
+    for maxBytes, sectionPointBytes, counters in cases:
+        values = ReadSectionPoints(converter, maxBytes, sectionPointBytes)
+        popped = converter._subset_cache.PopCounters()
+        for name, count in counters.items():
+            assert popped[name] == count, (maxBytes, sectionPointBytes, name)
+        for (labels, data), (expectedLabels, expectedData) in zip(values, expected):
+            np.testing.assert_array_equal(labels, expectedLabels)
+            np.testing.assert_array_equal(data, expectedData)
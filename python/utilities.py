@@ -40,6 +40,9 @@ class ReadableOdb(object):
     def open(self, odb, readOnly):
         return odbAccess.openOdb(odb, readOnly)
 
+    def close(self):
+        self._odb.close()
+
     def getFrames(self, stepName):
         return self._odb.steps[stepName].frames
 
@@ -64,6 +67,9 @@ class ReadableOdb(object):
     def getFieldOutputs(self, stepName, frameIdx):
         return self._odb.steps[stepName].frames[frameIdx].fieldOutputs.items()
 
+    def getStep(self, stepName):
+        return self._odb.steps[stepName]
+
     def getHistoryRegions(self, stepName):
         return self._odb.steps[stepName].historyRegions
 
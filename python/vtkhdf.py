@@ -0,0 +1,250 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  vtkhdf.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# vtkhdf.py writes the frames into a single VTKHDF file, an UnstructuredGrid with a Steps group
+# see https://docs.vtk.org/en/latest/design_documents/VTKFileFormats.html#vtkhdf-file-format
+# the mesh is identical across frames, it is written once and every step points to it.
+# a DataArray is only written when its content changed: its content hash is compared with
+# the arrays of the same name already written and the step offset points to the first copy,
+# see dedup.py
+
+import dedup
+import numpy as np
+
+try:
+    import h5py
+except ImportError:
+    # optional dependency, only needed for the vtkhdf output
+    h5py = None
+
+VTKHDF_VERSION = (2, 1)
+
+# rows of a chunk of the datasets, the arrays are appended frame by frame in chunks
+CHUNK_ROWS = 65536
+# h5py filters which are always available, gzip is zlib
+COMPRESSIONS = ("gzip", "lzf")
+
+
+class VTKHDFWriter(object):
+    # offsets - end offset of every cell in connectivity, like the .vtu <Cells>
+    # compression - None or one of COMPRESSIONS, applied to every dataset
+    # compressionLevel - gzip level 0-9, None for the default
+    # chunkRows - rows of a chunk, a chunk is the unit of compression and of partial reads
+    def __init__(
+        self,
+        fileName,
+        points,
+        connectivity,
+        offsets,
+        cellTypes,
+        compression=None,
+        compressionLevel=None,
+        chunkRows=CHUNK_ROWS,
+    ):
+        if h5py is None:
+            raise ImportError("the vtkhdf output needs the h5py python package")
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(
+                "{0} is not a valid compression, use one of {1}".format(
+                    compression, COMPRESSIONS
+                )
+            )
+        self.fileName = fileName
+        self._compression = compression
+        self._compression_level = compressionLevel if compression == "gzip" else None
+        self._chunk_rows = max(1, chunkRows)
+        self.bytesWritten = 0
+        self.bytesShared = 0
+        self._numberOfPoints = len(points)
+        self._numberOfCells = len(offsets)
+        self._numberOfSteps = 0
+        # the row offset of every content of the (group name, array name) datasets
+        self._index = dedup.ContentIndex()
+
+        self._file = h5py.File(fileName, "w")
+        root = self._file.create_group("VTKHDF")
+        root.attrs["Version"] = np.array(VTKHDF_VERSION, dtype=np.int64)
+        typeName = "UnstructuredGrid".encode("ascii")
+        root.attrs.create(
+            "Type", typeName, dtype=h5py.string_dtype("ascii", len(typeName))
+        )
+        # a single part shared by every step
+        root.create_dataset(
+            "NumberOfPoints", data=np.array([len(points)], dtype=np.int64)
+        )
+        root.create_dataset(
+            "NumberOfCells", data=np.array([len(offsets)], dtype=np.int64)
+        )
+        root.create_dataset(
+            "NumberOfConnectivityIds",
+            data=np.array([len(connectivity)], dtype=np.int64),
+        )
+        self.CreateDataset(
+            root, "Points", np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        )
+        self.CreateDataset(
+            root, "Connectivity", np.asarray(connectivity, dtype=np.int64)
+        )
+        # VTKHDF offsets start with 0
+        self.CreateDataset(
+            root,
+            "Offsets",
+            np.concatenate([[0], np.asarray(offsets, dtype=np.int64)]),
+        )
+        self.CreateDataset(root, "Types", np.asarray(cellTypes, dtype=np.uint8))
+        self._root = root
+        root.create_group("PointData")
+        root.create_group("CellData")
+
+        steps = root.create_group("Steps")
+        steps.attrs["NSteps"] = 0
+        for name, dtype in (
+            ("Values", np.float64),
+            ("PartOffsets", np.int64),
+            ("NumberOfParts", np.int64),
+            ("PointOffsets", np.int64),
+            ("CellOffsets", np.int64),
+            ("ConnectivityIdOffsets", np.int64),
+        ):
+            steps.create_dataset(name, shape=(0,), maxshape=(None,), dtype=dtype)
+        steps.create_group("PointDataOffsets")
+        steps.create_group("CellDataOffsets")
+        self._steps = steps
+
+    def CreateDataset(self, group, name, data=None, shape=None, dtype=None):
+        # chunked and compressed dataset, resizable along the rows if data is None
+        if data is not None:
+            shape = data.shape
+            dtype = data.dtype
+            maxshape = None
+            chunks = (min(self._chunk_rows, max(1, shape[0])),) + tuple(shape[1:])
+        else:
+            maxshape = (None,) + tuple(shape[1:])
+            chunks = (self._chunk_rows,) + tuple(shape[1:])
+        return group.create_dataset(
+            name,
+            shape=shape,
+            maxshape=maxshape,
+            dtype=dtype,
+            data=data,
+            chunks=chunks,
+            compression=self._compression,
+            compression_opts=self._compression_level,
+        )
+
+    def WriteStep(self, time, pointArrays, cellArrays):
+        # pointArrays, cellArrays - [(name, array), ...] of the step
+        step = self._numberOfSteps
+        for name, value in (
+            ("Values", time),
+            ("PartOffsets", 0),
+            ("NumberOfParts", 1),
+            ("PointOffsets", 0),
+            ("CellOffsets", 0),
+            ("ConnectivityIdOffsets", 0),
+        ):
+            dataset = self._steps[name]
+            dataset.resize((step + 1,))
+            dataset[step] = value
+        for groupName, arrays, rows in (
+            ("PointData", pointArrays, self._numberOfPoints),
+            ("CellData", cellArrays, self._numberOfCells),
+        ):
+            written = set()
+            for name, array in arrays:
+                self.WriteArray(groupName, name, array, rows)
+                written.add(name)
+            # every array needs an offset in every step, zeros if it isn't in this frame
+            for name in self._root[groupName]:
+                if name not in written:
+                    dataset = self._root[groupName][name]
+                    self.WriteArray(
+                        groupName, name, np.zeros((rows,) + dataset.shape[1:]), rows
+                    )
+        self._numberOfSteps = step + 1
+        self._steps.attrs["NSteps"] = self._numberOfSteps
+        self._file.flush()
+
+    def WriteArray(self, groupName, name, array, rows):
+        # append the array, or point the step to an identical array already written
+        # the array is written as it is and converted to Float32 by hdf5
+        data = np.ascontiguousarray(array).reshape(rows, -1)
+        if data.shape[1] == 1:
+            data = data.reshape(rows)
+        group = self._root[groupName]
+        offsets = self._steps[groupName + "Offsets"]
+        step = self._numberOfSteps
+        if name not in group:
+            self.CreateDataset(
+                group, name, shape=(0,) + data.shape[1:], dtype=np.float32
+            )
+            offsets.create_dataset(name, shape=(0,), maxshape=(None,), dtype=np.int64)
+            if step > 0:
+                # the array didn't exist in the previous steps, they point to zeros
+                zeros = self.AppendRows(group[name], np.zeros_like(data))
+                self._index.Add(
+                    (groupName, name),
+                    dedup.ContentHash(np.zeros_like(data), np.float32),
+                    zeros,
+                )
+                offsets[name].resize((step,))
+                offsets[name][:] = zeros
+        dataset = group[name]
+        if dataset.shape[1:] != data.shape[1:]:
+            raise ValueError(
+                "{0} has {1} components, {2} in the previous steps".format(
+                    name, data.shape[1:], dataset.shape[1:]
+                )
+            )
+        # the content as it is stored, a float64 change lost by the conversion isn't a change
+        digest = dedup.ContentHash(data, dataset.dtype)
+        offset = self._index.Find((groupName, name), digest)
+        if offset is not None:
+            self.bytesShared += data.size * dataset.dtype.itemsize
+        else:
+            offset = self.AppendRows(dataset, data)
+            self._index.Add((groupName, name), digest, offset)
+        offsets[name].resize((step + 1,))
+        offsets[name][step] = offset
+
+    def AppendRows(self, dataset, data):
+        # returns the row offset of data in dataset
+        offset = dataset.shape[0]
+        dataset.resize((offset + len(data),) + dataset.shape[1:])
+        dataset[offset:] = data
+        self.bytesWritten += (
+            len(data) * dataset.dtype.itemsize * max(1, int(np.prod(dataset.shape[1:])))
+        )
+        return offset
+
+    def Close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,431 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  vtkxml.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# vtkxml.py encodes numpy arrays into VTK XML <DataArray> elements
+# see https://docs.vtk.org/en/latest/design_documents/VTKFileFormats.html
+
+import base64
+import tempfile
+import threading
+import timeit
+import zlib
+from multiprocessing.pool import ThreadPool
+import numpy as np
+
+# supported <DataArray> formats
+# ascii    - whitespace separated values
+# binary   - base64 encoded values inlined in the <DataArray>
+# appended - raw values stored in the <AppendedData> section at the end of the file
+DATA_FORMATS = ("ascii", "binary", "appended")
+
+# every binary block is preceded by its size in bytes stored as UInt64
+HEADER_TYPE = "UInt64"
+
+VTK_DATA_TYPES = {
+    "Float32": np.dtype("<f4"),
+    "Float64": np.dtype("<f8"),
+    "Int32": np.dtype("<i4"),
+    "Int64": np.dtype("<i8"),
+    "UInt8": np.dtype("<u1"),
+    "UInt64": np.dtype("<u8"),
+}
+
+# number of rows formatted at once in ascii
+ASCII_CHUNK_ROWS = 65536
+# size of the chunks copied from the appended data spill file
+COPY_CHUNK_SIZE = 16 * 1024 * 1024
+
+# compressors of the binary DataArrays and the name of the vtk class which reads them
+COMPRESSORS = {
+    "zlib": "vtkZLibDataCompressor",
+    "lz4": "vtkLZ4DataCompressor",
+}
+# uncompressed size of a compressed block, the same default as vtkXMLWriter
+COMPRESSION_BLOCK_SIZE = 32768
+
+# thread pool shared by the compressors of the process, see Compressor.Map
+_compression_pool = None
+_compression_pool_size = 0
+# DataArrays may be compressed by several threads at once, see DataArrayEncoder.Encode
+_compression_pool_lock = threading.Lock()
+
+
+class Compressor(object):
+    # compresses the binary data in blocks of blockSize bytes, the vtk compressed format is
+    # [number of blocks, block size, size of the last block if partial, compressed size of every block]
+    # followed by the compressed blocks.
+    # level = compression level, -1 for the default of the compressor
+    # threads = number of threads compressing the blocks, zlib and lz4 release the GIL
+    def __init__(self, name, level=-1, blockSize=COMPRESSION_BLOCK_SIZE, threads=1):
+        if name not in COMPRESSORS:
+            raise ValueError(
+                "{0} is not a valid compressor, use one of {1}".format(
+                    name, sorted(COMPRESSORS)
+                )
+            )
+        if name == "lz4":
+            # optional dependency, only needed for lz4
+            try:
+                import lz4.block
+            except ImportError:
+                raise ValueError("lz4 compression needs the lz4 python package")
+            self._lz4 = lz4.block
+        self.name = name
+        self.vtkName = COMPRESSORS[name]
+        self.level = level
+        self.blockSize = blockSize
+        self.threads = threads
+
+    def Settings(self):
+        # every option which changes the compressed data
+        return (self.name, self.level, self.blockSize)
+
+    def CompressBlock(self, block):
+        if self.name == "zlib":
+            return zlib.compress(block, self.level)
+        if self.level > 0:
+            return self._lz4.compress(
+                block,
+                mode="high_compression",
+                compression=self.level,
+                store_size=False,
+            )
+        return self._lz4.compress(block, store_size=False)
+
+    def Map(self, blocks):
+        global _compression_pool, _compression_pool_size
+        if self.threads <= 1 or len(blocks) <= 1:
+            return [self.CompressBlock(block) for block in blocks]
+        with _compression_pool_lock:
+            if _compression_pool is None or _compression_pool_size != self.threads:
+                if _compression_pool is not None:
+                    _compression_pool.close()
+                _compression_pool = ThreadPool(self.threads)
+                _compression_pool_size = self.threads
+            pool = _compression_pool
+        return pool.map(self.CompressBlock, blocks)
+
+    def Compress(self, data):
+        # returns (header, compressed blocks) of the bytes data
+        header, compressed = self.CompressChunks([data])
+        return header, b"".join(compressed)
+
+    def CompressChunks(self, chunks):
+        # compress the concatenation of the bytes chunks without joining them,
+        # returns (header, [compressed block, ...])
+        size = 0
+        pending = b""
+        compressed = []
+        for chunk in chunks:
+            size += len(chunk)
+            pending += chunk
+            end = len(pending) - len(pending) % self.blockSize
+            if end > 0:
+                compressed += self.Map(
+                    [
+                        pending[start : start + self.blockSize]
+                        for start in range(0, end, self.blockSize)
+                    ]
+                )
+                pending = pending[end:]
+        if len(pending) > 0:
+            compressed += self.Map([pending])
+        header = np.array(
+            [len(compressed), self.blockSize, size % self.blockSize]
+            + [len(block) for block in compressed],
+            dtype=VTK_DATA_TYPES[HEADER_TYPE],
+        ).tobytes()
+        return header, compressed
+
+
+class ChunkedArray(object):
+    # a DataArray which is produced in consecutive chunks of rows instead of one array,
+    # so that it never has to be held in memory at once.
+    # shape - (rows, components) of the whole array
+    # chunks - function returning an iterator over the chunks, called once per encoding
+    def __init__(self, shape, chunks):
+        self.shape = tuple(shape)
+        self._chunks = chunks
+
+    def __len__(self):
+        return self.shape[0]
+
+    def Chunks(self):
+        return self._chunks()
+
+
+def ArrayChunks(array):
+    # the chunks of a ChunkedArray, or the array itself
+    if isinstance(array, ChunkedArray):
+        return array.Chunks()
+    return [array]
+
+
+def Base64Chunks(chunks):
+    # base64 of the concatenation of the bytes chunks, a chunk is encoded as soon as it comes
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        end = len(pending) - len(pending) % 3
+        if end > 0:
+            yield base64.b64encode(pending[:end]).decode("ascii")
+            pending = pending[end:]
+    if len(pending) > 0:
+        yield base64.b64encode(pending).decode("ascii")
+
+
+class FileBuffer(object):
+    # list-like buffer which writes every item to the file as soon as it is appended
+    # so that a frame never has to be held in memory
+    def __init__(self, f):
+        self._file = f
+        self.bytesWritten = 0
+        # time spent in the file writes
+        self.seconds = 0.0
+
+    def append(self, item):
+        if not isinstance(item, bytes):
+            item = item.encode("utf-8")
+        start = timeit.default_timer()
+        self._file.write(item)
+        self.seconds += timeit.default_timer() - start
+        self.bytesWritten += len(item)
+
+    def __iadd__(self, items):
+        for item in items:
+            self.append(item)
+        return self
+
+
+class DataArrayEncoder(object):
+    # one encoder per .vtu file since appended offsets are relative to the file
+    # appended blocks are kept in memory, unless spillDir is given in which case
+    # they are written to a temporary file in spillDir and copied by AppendedData
+    # asciiPrecision = number of significant digits of the ascii floats,
+    # None writes the shortest representation which reads back the same value
+    # compressor = Compressor of the binary and appended data, None to write it uncompressed
+    def __init__(
+        self, dataFormat="ascii", spillDir=None, asciiPrecision=None, compressor=None
+    ):
+        if dataFormat not in DATA_FORMATS:
+            raise ValueError(
+                "{0} is not a valid format, use one of {1}".format(
+                    dataFormat, DATA_FORMATS
+                )
+            )
+        if compressor is not None and dataFormat == "ascii":
+            raise ValueError("ascii DataArrays can't be compressed")
+        self.dataFormat = dataFormat
+        self._appendedData = []
+        self._offset = 0
+        self._spillDir = spillDir
+        self._spill = None
+        self.asciiPrecision = asciiPrecision
+        self.compressor = compressor
+
+    def Settings(self):
+        # every option which changes the encoded DataArrays
+        return (
+            self.dataFormat,
+            self.asciiPrecision,
+            None if self.compressor is None else self.compressor.Settings(),
+        )
+
+    def Copy(self, spillDir=None):
+        # a new encoder which already holds the in-memory appended blocks of this one
+        encoder = DataArrayEncoder(
+            self.dataFormat, spillDir, self.asciiPrecision, self.compressor
+        )
+        encoder._appendedData = list(self._appendedData)
+        encoder._offset = self._offset
+        return encoder
+
+    def FileHeader(self, fileType="UnstructuredGrid"):
+        compressor = ""
+        if self.compressor is not None:
+            compressor = ' compressor="{0}"'.format(self.compressor.vtkName)
+        return '<VTKFile type="{0}" version="1.0" byte_order="LittleEndian" header_type="{1}"{2}>\n'.format(
+            fileType, HEADER_TYPE, compressor
+        )
+
+    def DataArray(self, array, vtkType, attributes, buffer=None):
+        # attributes is a list of (key, value) to keep the order of the xml attributes
+        # array is a numpy array or a ChunkedArray which is encoded a chunk at a time
+        if buffer is None:
+            buffer = []
+        header = self.DataArrayHeader(vtkType, attributes)
+
+        if self.dataFormat == "ascii":
+            buffer.append(" ".join(header) + ">\n")
+            self.EncodeAscii(array, buffer)
+            buffer.append("</DataArray>\n")
+        elif self.dataFormat == "binary":
+            buffer.append(" ".join(header) + ">\n")
+            if isinstance(array, ChunkedArray):
+                # header and data are encoded separately, the data as it is produced
+                dataHeader, data = self.EncodeHeaderAndChunks(array, vtkType)
+                buffer.append(base64.b64encode(dataHeader).decode("ascii"))
+                for text in Base64Chunks(data):
+                    buffer.append(text)
+            else:
+                buffer.append(self.EncodeBinary(array, vtkType))
+            buffer.append("\n</DataArray>\n")
+        else:
+            header.append('offset="{0}"'.format(self._offset))
+            buffer.append(" ".join(header) + "/>\n")
+            if isinstance(array, ChunkedArray):
+                dataHeader, data = self.EncodeHeaderAndChunks(array, vtkType)
+                self.AppendBlock(dataHeader)
+                for block in data:
+                    self.AppendBlock(block)
+            else:
+                self.AppendBlock(self.EncodeRaw(array, vtkType))
+        return buffer
+
+    def DataArrayHeader(self, vtkType, attributes):
+        header = ['<DataArray type="{0}"'.format(vtkType)]
+        header += ['{0}="{1}"'.format(key, value) for (key, value) in attributes]
+        header.append('format="{0}"'.format(self.dataFormat))
+        return header
+
+    def Encode(self, array, vtkType):
+        # the encoded data of a numpy array without the xml, the encoder isn't changed
+        # so that several threads can encode DataArrays at once, see EncodedDataArray
+        if self.dataFormat == "ascii":
+            return self.EncodeAscii(array, [])
+        if self.dataFormat == "binary":
+            return [self.EncodeBinary(array, vtkType)]
+        return [self.EncodeRaw(array, vtkType)]
+
+    def EncodedDataArray(self, encoded, vtkType, attributes, buffer=None):
+        # the same as DataArray with the data returned by Encode,
+        # the DataArrays have to be written in order for the appended offsets
+        if buffer is None:
+            buffer = []
+        header = self.DataArrayHeader(vtkType, attributes)
+        if self.dataFormat == "ascii":
+            buffer.append(" ".join(header) + ">\n")
+            buffer += encoded
+            buffer.append("</DataArray>\n")
+        elif self.dataFormat == "binary":
+            buffer.append(" ".join(header) + ">\n")
+            buffer += encoded
+            buffer.append("\n</DataArray>\n")
+        else:
+            header.append('offset="{0}"'.format(self._offset))
+            buffer.append(" ".join(header) + "/>\n")
+            for block in encoded:
+                self.AppendBlock(block)
+        return buffer
+
+    def AppendBlock(self, block):
+        if self._spillDir is None:
+            self._appendedData.append(block)
+        else:
+            if self._spill is None:
+                self._spill = tempfile.TemporaryFile(dir=self._spillDir)
+            self._spill.write(block)
+        self._offset += len(block)
+
+    def AppendedData(self, buffer=None):
+        # <AppendedData> has to be written after </UnstructuredGrid>
+        if buffer is None:
+            buffer = []
+        if self.dataFormat != "appended":
+            return buffer
+        buffer.append('<AppendedData encoding="raw">\n_')
+        buffer += self._appendedData
+        if self._spill is not None:
+            self._spill.seek(0)
+            chunk = self._spill.read(COPY_CHUNK_SIZE)
+            while chunk:
+                buffer.append(chunk)
+                chunk = self._spill.read(COPY_CHUNK_SIZE)
+        buffer.append("\n</AppendedData>\n")
+        self.Close()
+        return buffer
+
+    def Close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+        self._appendedData = []
+        self._offset = 0
+
+    def EncodeAscii(self, array, buffer):
+        # a whole chunk of rows is formatted by a single % operation,
+        # every value is followed by a space and every row by a newline
+        for array in ArrayChunks(array):
+            array = np.asarray(array)
+            if array.ndim == 1:
+                array = array.reshape(-1, 1)
+            if array.dtype.kind == "f":
+                if self.asciiPrecision is None:
+                    # the same digits as str(float)
+                    valueFormat = "%r "
+                else:
+                    valueFormat = "%.{0}g ".format(self.asciiPrecision)
+            else:
+                valueFormat = "%d "
+            rowFormat = valueFormat * array.shape[1] + "\n"
+            for start in range(0, len(array), ASCII_CHUNK_ROWS):
+                chunk = array[start : start + ASCII_CHUNK_ROWS]
+                buffer.append((rowFormat * len(chunk)) % tuple(chunk.ravel().tolist()))
+        return buffer
+
+    def EncodeHeaderAndData(self, array, vtkType):
+        data = np.ascontiguousarray(array, dtype=VTK_DATA_TYPES[vtkType]).tobytes()
+        if self.compressor is not None:
+            return self.compressor.Compress(data)
+        header = np.array([len(data)], dtype=VTK_DATA_TYPES[HEADER_TYPE]).tobytes()
+        return header, data
+
+    def EncodeHeaderAndChunks(self, array, vtkType):
+        # returns (header, iterator over the data bytes) of a ChunkedArray,
+        # compressed blocks are kept until the header with their sizes is known
+        dtype = VTK_DATA_TYPES[vtkType]
+        data = (
+            np.ascontiguousarray(chunk, dtype=dtype).tobytes()
+            for chunk in array.Chunks()
+        )
+        if self.compressor is not None:
+            return self.compressor.CompressChunks(data)
+        size = int(np.prod(array.shape)) * dtype.itemsize
+        header = np.array([size], dtype=VTK_DATA_TYPES[HEADER_TYPE]).tobytes()
+        return header, data
+
+    def EncodeRaw(self, array, vtkType):
+        header, data = self.EncodeHeaderAndData(array, vtkType)
+        return header + data
+
+    def EncodeBinary(self, array, vtkType):
+        # header and data are encoded separately, the same as vtkXMLWriter does
+        header, data = self.EncodeHeaderAndData(array, vtkType)
+        return (base64.b64encode(header) + base64.b64encode(data)).decode("ascii")
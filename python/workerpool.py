@@ -0,0 +1,202 @@
+# /*=========================================================================
+#    Program: ODB2VTK
+#    Module:  workerpool.py
+#    Copyright (c) Arris Composites Inc.
+#    All rights reserved.
+#
+#    Arris Composites Inc.
+#    745 Heinz Ave
+#    Berkeley, CA 94710
+#    USA
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# ========================================================================*/
+
+# workerpool.py converts frames in parallel inside a single 'abaqus python' call.
+# Every worker process opens the odb and constructs the maps once,
+# then converts the (step, frame) jobs it takes from the queue.
+
+import multiprocessing
+import traceback
+import timeit
+import sys
+import os
+
+import odb2vtk
+
+# rough memory footprint of a worker, used when --workerMemory isn't given
+# base memory of the abaqus python process with the odb opened
+WORKER_BASE_MEMORY = 512 * 1024**2
+# cached coordinates, label maps and node objects read by ConstructMap
+WORKER_BYTES_PER_NODE = 256
+# cached topology plus the largest field array (e.g. 27 integration points x 6 components)
+WORKER_BYTES_PER_CELL = 2048
+
+# converter of the current worker process
+_converter = None
+_init_error = None
+
+
+def AvailableMemory():
+    # bytes of memory available to new processes, None if it can't be found
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+
+def EstimateWorkerMemory(nodesNum, cellsNum):
+    return (
+        WORKER_BASE_MEMORY
+        + WORKER_BYTES_PER_NODE * nodesNum
+        + WORKER_BYTES_PER_CELL * cellsNum
+    )
+
+
+def NumberOfWorkers(requested, jobsNum, workerMemory):
+    # limit the requested workers by the number of jobs and the available memory
+    workers = max(1, min(requested, jobsNum))
+    available = AvailableMemory()
+    if available is not None and workerMemory > 0:
+        byMemory = max(1, int(available // workerMemory))
+        if byMemory < workers:
+            print(
+                "limiting workers from {0} to {1}: {2:.1f} GB available, {3:.1f} GB per worker".format(
+                    workers, byMemory, available / 1024.0**3, workerMemory / 1024.0**3
+                )
+            )
+            workers = byMemory
+    return workers
+
+
+def InitWorker(odbFile, instanceNames, stepsFramesDict, args):
+    global _converter, _init_error
+    try:
+        _converter = odb2vtk.ODB2VTK(odbFile, args.suffix)
+        odb2vtk.ConfigureConverter(_converter, args)
+        _converter.ReadArgs(instanceNames, stepsFramesDict)
+        _converter.ConstructMap()
+    except (Exception, SystemExit):
+        # an exception raised here would make the pool respawn the worker forever,
+        # report it with every job of this worker instead. ConstructMap calls
+        # sys.exit for an unknown element type or a missing region set
+        _converter = None
+        _init_error = traceback.format_exc()
+
+
+def ConvertFrame(job):
+    # returns (stepName, frameIdx, error, seconds, dataArrays, timing, indexFrame), error is None on success
+    # timing is the phase timing record of the frame, see profiler.py
+    # indexFrame is the metadata of the frame added to the odb index, see odbindex.py
+    stepName, frameIdx = job
+    start = timeit.default_timer()
+    if _converter is None:
+        return (stepName, frameIdx, _init_error, 0.0, None, None, None)
+    dataArrays = None
+    try:
+        dataArrays = _converter.WriteVTUFile([stepName, frameIdx])
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return (
+        stepName,
+        frameIdx,
+        error,
+        timeit.default_timer() - start,
+        dataArrays,
+        _converter.PopFrameTiming(),
+        _converter.GetIndexFrame(stepName, frameIdx),
+    )
+
+
+def WriteVTUFiles(converter, args, workers, workerMemory=0):
+    # converter has ReadArgs already called, it writes the .pvd once all frames succeeded
+    # returns the list of failed (stepName, frameIdx, error)
+    # only the parent process writes the manifest, the timing file and the odb index
+    jobs = converter.GetPendingFrames()
+    if len(jobs) == 0:
+        converter.WritePVDFile()
+        return []
+    if workerMemory <= 0:
+        nodesNum = 0
+        cellsNum = 0
+        for instanceName in converter._instance_names:
+            instanceNodesNum, instanceCellsNum = converter.GetInstanceSize(instanceName)
+            nodesNum += instanceNodesNum
+            cellsNum += instanceCellsNum
+        workerMemory = EstimateWorkerMemory(nodesNum, cellsNum)
+    workers = NumberOfWorkers(workers, len(jobs), workerMemory)
+    print("converting {0} frames with {1} workers".format(len(jobs), workers))
+    # the workers read the index saved so far
+    converter.SaveIndex()
+
+    failed = []
+    pool = multiprocessing.Pool(
+        processes=workers,
+        initializer=InitWorker,
+        initargs=(
+            converter.fileFullName,
+            converter._instance_names,
+            converter._step_frame_map,
+            args,
+        ),
+    )
+    try:
+        for (
+            stepName,
+            frameIdx,
+            error,
+            seconds,
+            dataArrays,
+            timing,
+            indexFrame,
+        ) in pool.imap_unordered(ConvertFrame, jobs):
+            if error is None:
+                converter.SetIndexFrame(stepName, frameIdx, indexFrame)
+                converter.RecordFrame(stepName, frameIdx, dataArrays)
+                # the timings of all workers are gathered by the parent
+                converter.GetProfiler().Add(timing)
+                print("{0}_{1} done in {2:.1f}s".format(stepName, frameIdx, seconds))
+            else:
+                print("{0}_{1} failed:\n{2}".format(stepName, frameIdx, error))
+                failed.append((stepName, frameIdx, error))
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    # the .pvd references every frame, only write it once they all exist
+    if len(failed) == 0:
+        converter.WritePVDFile()
+    else:
+        print(
+            "{0} of {1} frames failed, {2} not written: {3}".format(
+                len(failed),
+                len(jobs),
+                converter.odbFileNameNoExt + ".pvd",
+                ", ".join("{0}_{1}".format(s, f) for s, f, _ in failed),
+            )
+        )
+    return failed